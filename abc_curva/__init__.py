@@ -0,0 +1,193 @@
+from .classify import (
+    CLASSES,
+    DEFAULT_CUTS,
+    NO_CLASS,
+    ABCMatrix,
+    ABCResult,
+    classify_abc,
+    classify_abc_grouped,
+    classify_abc_matrix,
+    cross_counts,
+    cross_frame,
+)
+from .pipeline import (
+    ANALYSIS_QTD,
+    ANALYSIS_TYPES,
+    ANALYSIS_VOLUME,
+    COL_ACUMULADO,
+    COL_CLASSE,
+    COL_DESCRICAO,
+    COL_INDIVIDUAL,
+    COL_TIPO,
+    INPUT_FORMATS,
+    OPTIONAL_METRICS,
+    PRIMARY_METRICS,
+    DatasetError,
+    MetricClasses,
+    PreparedDataset,
+    RawDataset,
+    available_metrics,
+    classify_dataset,
+    classify_metrics,
+    content_hash,
+    detect_analysis_type,
+    detect_input_format,
+    ingest_dataset,
+    normalize_dataset,
+    prepare_dataset,
+    select_metric,
+)
+from .bench import compare_results, load_results, run_benchmark, save_results
+from .diagnostics import (
+    DIAGNOSTICS_HISTORY,
+    DIAGNOSTICS_LOGGER,
+    emit_record,
+    measure_result,
+    rerun_record,
+    stage_frame,
+    stats_frame,
+)
+from .downsample import RankBins, bin_ranks, lttb
+from .exports import EXPORT_FORMATS, summary_frame, write_csv, write_frame, write_parquet, write_xlsx
+from .indexes import THRESHOLD_EPS, CumulativeIndex, NameSearchIndex, PartitionIndex
+from .memory import compact_frame, frame_nbytes, memory_table, retained_nbytes
+from .outofcore import (
+    OUT_OF_CORE_MEMORY_MB,
+    CutPoint,
+    OutOfCoreResult,
+    classify_file_out_of_core,
+    classify_out_of_core,
+)
+from .parsing import LOCALES, parse_numbers
+from .periods import (
+    PERIOD_COLUMNS,
+    PeriodClasses,
+    PeriodSlice,
+    classify_periods,
+    period_labels,
+    split_periods,
+)
+from .readers import find_col, iter_chunks, read_csv_chunked, read_parquet_columns, read_xlsx_streaming
+from .sidecar import ContentCache, content_key, ingest_cached, ingest_with_sidecar, load_with_sidecar, sidecar_path
+from .sources import (
+    COL_CLASSE_ORIGEM,
+    COL_ORIGEM,
+    COL_PERIODO,
+    collect_inputs,
+    consolidate_sources,
+    ingest_sources,
+    source_summary,
+)
+from .sqlstore import SQL_BACKENDS, SQLStore, available_sql_backends
+from .stages import PHASES, SharedMemo, StageGraph, StageRun, StageSession, StageStats
+from .synthetic import SYNTHETIC_TIPOS, XLSX_MAX_ROWS, synthetic_dataset, write_dataset
+
+__all__ = [
+    "ABCMatrix",
+    "ABCResult",
+    "ANALYSIS_QTD",
+    "ANALYSIS_TYPES",
+    "ANALYSIS_VOLUME",
+    "CLASSES",
+    "COL_ACUMULADO",
+    "COL_CLASSE",
+    "COL_CLASSE_ORIGEM",
+    "COL_DESCRICAO",
+    "COL_INDIVIDUAL",
+    "COL_ORIGEM",
+    "COL_PERIODO",
+    "COL_TIPO",
+    "ContentCache",
+    "CumulativeIndex",
+    "CutPoint",
+    "DEFAULT_CUTS",
+    "DIAGNOSTICS_HISTORY",
+    "DIAGNOSTICS_LOGGER",
+    "DatasetError",
+    "EXPORT_FORMATS",
+    "INPUT_FORMATS",
+    "LOCALES",
+    "MetricClasses",
+    "NO_CLASS",
+    "NameSearchIndex",
+    "OPTIONAL_METRICS",
+    "OUT_OF_CORE_MEMORY_MB",
+    "OutOfCoreResult",
+    "PERIOD_COLUMNS",
+    "PHASES",
+    "PRIMARY_METRICS",
+    "PartitionIndex",
+    "PeriodClasses",
+    "PeriodSlice",
+    "PreparedDataset",
+    "RankBins",
+    "RawDataset",
+    "SQLStore",
+    "SQL_BACKENDS",
+    "SYNTHETIC_TIPOS",
+    "SharedMemo",
+    "StageGraph",
+    "StageRun",
+    "StageSession",
+    "StageStats",
+    "THRESHOLD_EPS",
+    "XLSX_MAX_ROWS",
+    "available_metrics",
+    "available_sql_backends",
+    "bin_ranks",
+    "classify_abc",
+    "classify_abc_grouped",
+    "classify_abc_matrix",
+    "classify_dataset",
+    "classify_file_out_of_core",
+    "classify_metrics",
+    "classify_out_of_core",
+    "classify_periods",
+    "collect_inputs",
+    "compact_frame",
+    "compare_results",
+    "consolidate_sources",
+    "content_hash",
+    "content_key",
+    "cross_counts",
+    "cross_frame",
+    "detect_analysis_type",
+    "detect_input_format",
+    "emit_record",
+    "find_col",
+    "frame_nbytes",
+    "ingest_cached",
+    "ingest_dataset",
+    "ingest_sources",
+    "ingest_with_sidecar",
+    "iter_chunks",
+    "load_results",
+    "load_with_sidecar",
+    "lttb",
+    "measure_result",
+    "memory_table",
+    "normalize_dataset",
+    "parse_numbers",
+    "period_labels",
+    "prepare_dataset",
+    "read_csv_chunked",
+    "read_parquet_columns",
+    "read_xlsx_streaming",
+    "rerun_record",
+    "retained_nbytes",
+    "run_benchmark",
+    "save_results",
+    "select_metric",
+    "sidecar_path",
+    "source_summary",
+    "split_periods",
+    "stage_frame",
+    "stats_frame",
+    "summary_frame",
+    "synthetic_dataset",
+    "write_csv",
+    "write_dataset",
+    "write_frame",
+    "write_parquet",
+    "write_xlsx",
+]
@@ -0,0 +1,276 @@
+"""Benchmark do pipeline sobre bases sintéticas (ver ``synthetic``).
+
+Cada estágio é medido isolado, com a entrada já pronta do estágio anterior,
+e vale o menor tempo de ``repeat`` execuções. Os estágios do dashboard
+(gráficos, tabela de ranking) vêm do próprio log de estágios do app, rodado
+pelo ``streamlit.testing`` sobre o mesmo arquivo. O resultado é um JSON com
+as versões das bibliotecas; ``compare_results`` compara duas execuções.
+``bench_cold_start`` mede o início a frio: um processo novo abrindo o
+dashboard na seleção padrão ("Planilhas fixas").
+"""
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .exports import write_csv
+from .indexes import CumulativeIndex, PartitionIndex
+from .parsing import parse_numbers
+from .pipeline import COL_CLASSE, INPUT_FORMATS, classify_metrics, ingest_dataset, normalize_dataset, select_metric
+from .sidecar import sidecar_path
+from .synthetic import SYNTHETIC_TIPOS, XLSX_MAX_ROWS, synthetic_dataset, write_dataset
+
+BENCH_ROWS = (10_000, 100_000, 1_000_000, 10_000_000)
+BENCH_FORMATS = tuple(INPUT_FORMATS.values())
+BENCH_VERSION = 2
+# Estágios da biblioteca, na ordem do pipeline
+LIBRARY_STAGES = ("leitura", "parse_numeros", "recalculo", "classificacao", "kpis_threshold", "filtro", "export_csv")
+_DASHBOARD = Path(__file__).resolve().parent.parent / "dashboard_abc.py"
+# Planilha aberta pela seleção padrão do dashboard
+_DEFAULT_FIXED_FILE = _DASHBOARD.parent / "ABC PLAN.xlsx"
+# Roda num processo novo: nada importado nem em cache.
+_COLD_START_SCRIPT = """
+import json, logging, sys, time
+start = time.perf_counter()
+logging.disable(logging.WARNING)
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+at.run()
+print(json.dumps({
+    "importacao": imported - start,
+    "primeiro_grafico": time.perf_counter() - imported,
+    "graficos": len(at.get("plotly_chart")),
+    "erro": at.exception[0].message if at.exception else None,
+}))
+"""
+_KPI_THRESHOLD = 80.0
+# Diferença mínima para uma medição contar como regressão
+REGRESSION_MIN_SECONDS = 0.01
+
+
+class _CountingSink:
+    # Destino do CSV: conta os bytes sem guardá-los.
+    def __init__(self):
+        self.nbytes = 0
+
+    def write(self, data: bytes) -> int:
+        self.nbytes += len(data)
+        return len(data)
+
+
+def _timed(func, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def dataset_path(data_dir: Path, n_rows: int, fmt: str, seed: int = 0) -> Path:
+    # "abc plan" no nome: o tipo de análise (volume) é deduzido como nas planilhas modelo.
+    ext = next(ext for ext, f in INPUT_FORMATS.items() if f == fmt)
+    return data_dir / f"sintetico_{n_rows}_s{seed} abc plan{ext}"
+
+
+def prepare_files(n_rows: int, formats, data_dir: Path, seed: int = 0) -> tuple[pd.DataFrame, dict]:
+    """Base em memória e ``{formato: caminho}``; arquivos já gerados com a mesma semente são reaproveitados.
+
+    O Parquet é sempre gravado: serve de cópia da base para as próximas execuções.
+    """
+    parquet = dataset_path(data_dir, n_rows, "parquet", seed)
+    if parquet.exists():
+        frame = pd.read_parquet(parquet)
+    else:
+        frame = synthetic_dataset(n_rows, seed=seed)
+        write_dataset(frame, parquet)
+    paths = {}
+    for fmt in formats:
+        if fmt == "xlsx" and n_rows > XLSX_MAX_ROWS:
+            continue
+        path = dataset_path(data_dir, n_rows, fmt, seed)
+        if not path.exists():
+            write_dataset(frame, path)
+        paths[fmt] = path
+    return frame, paths
+
+
+def bench_library(path: Path, frame: pd.DataFrame, repeat: int = 3, streaming: bool = False) -> dict:
+    """Segundos por estágio do pipeline (sem o Streamlit) para o arquivo ``path``."""
+    seconds = {}
+    raw, seconds["leitura"] = _timed(lambda: ingest_dataset(path, path.name, streaming=streaming), repeat)
+    text_columns = [c for c in (raw.col_quantidade, raw.col_individual, raw.col_acumulado) if c in frame.columns]
+    _, seconds["parse_numeros"] = _timed(lambda: [parse_numbers(frame[c]) for c in text_columns], repeat)
+    normalized, seconds["recalculo"] = _timed(lambda: normalize_dataset(raw), repeat)
+    dataset, seconds["classificacao"] = _timed(lambda: select_metric(normalized, classify_metrics(normalized)), repeat)
+
+    def _kpis():
+        index = CumulativeIndex.from_frame(dataset.df, dataset.col_quantidade, dataset.col_acumulado)
+        return index.up_to(_KPI_THRESHOLD)
+
+    def _filter():
+        index = PartitionIndex.from_frame(dataset.df, dataset.col_tipo, COL_CLASSE)
+        return index.select(dataset.df, SYNTHETIC_TIPOS[0], ["A", "B"])
+
+    _, seconds["kpis_threshold"] = _timed(_kpis, repeat)
+    _, seconds["filtro"] = _timed(_filter, repeat)
+    _, seconds["export_csv"] = _timed(lambda: write_csv(dataset.df, _CountingSink()), repeat)
+    return seconds
+
+
+def bench_dashboard(path: Path, timeout: float = 600) -> dict:
+    """Roda o dashboard sobre ``path`` (pasta da visão "Várias planilhas") e lê o log de estágios.
+
+    ``primeiro_grafico`` é o tempo do rerun que carrega a base até a página
+    pronta, com todos os gráficos.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    # Fora do servidor o Streamlit registra avisos a cada widget; só erros interessam aqui.
+    logging.disable(logging.WARNING)
+    try:
+        at = AppTest.from_file(str(_DASHBOARD), default_timeout=timeout)
+        at.run()
+        [r for r in at.radio if r.label == "Fonte dos dados"][0].set_value("Várias planilhas").run()
+        folder_input = [t for t in at.text_input if "pasta" in t.label][0]
+        start = time.perf_counter()
+        folder_input.set_value(str(path.parent)).run()
+        first_render = time.perf_counter() - start
+    finally:
+        logging.disable(logging.NOTSET)
+    if at.exception:
+        raise RuntimeError(f"dashboard falhou: {at.exception[0].message}")
+    (log,) = [d.value for d in at.dataframe if "Estágio" in d.value.columns]
+    ran = log[log["Status"] == "executado"]
+    return {
+        "primeiro_grafico": first_render,
+        "estagios": dict(zip(ran["Estágio"], ran["Tempo (ms)"] / 1000)),
+    }
+
+
+def bench_cold_start(timeout: float = 600) -> dict:
+    """Tempo até o primeiro gráfico com a seleção padrão, numa sessão nova de um processo novo.
+
+    ``frio``: sem o cache .abc.parquet da planilha (o XLSX é lido);
+    ``sidecar``: com o cache gravado pela rodada anterior. ``importacao`` é
+    o import do Streamlit (igual para todos os apps) e fica separado.
+    """
+    env = {k: v for k, v in os.environ.items() if k != "ABC_PREWARM"}
+    results = {}
+    sidecar_path(_DEFAULT_FIXED_FILE).unlink(missing_ok=True)
+    for mode in ("frio", "sidecar"):
+        out = subprocess.run(
+            [sys.executable, "-c", _COLD_START_SCRIPT, str(_DASHBOARD), str(timeout)],
+            capture_output=True, text=True, cwd=_DASHBOARD.parent, env=env, check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if result["erro"]:
+            raise RuntimeError(f"dashboard falhou: {result['erro']}")
+        results[mode] = result
+    return results
+
+
+def environment() -> dict:
+    versions = {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__}
+    for module in ("pyarrow", "streamlit", "plotly", "openpyxl"):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {"plataforma": platform.platform(), "processador": platform.processor() or platform.machine(), **versions}
+
+
+def run_benchmark(rows=BENCH_ROWS, formats=BENCH_FORMATS, data_dir: Path = Path("bench_data"), repeat: int = 3,
+                  seed: int = 0, streaming: bool = False, dashboard: bool = True, on_result=None) -> dict:
+    """Mede todos os tamanhos × formatos; ``on_result(resultado)`` a cada combinação concluída.
+
+    Com ``dashboard``, mede também o início a frio (``bench_cold_start``) antes das bases.
+    """
+    data_dir = Path(data_dir)
+    cold_start = bench_cold_start() if dashboard and _DEFAULT_FIXED_FILE.exists() else None
+    results = []
+    for n_rows in rows:
+        frame, paths = prepare_files(n_rows, formats, data_dir, seed)
+        for fmt in formats:
+            result = {"linhas": n_rows, "formato": fmt}
+            if fmt not in paths:
+                result["ignorado"] = f"o Excel aceita até {XLSX_MAX_ROWS:,} linhas"
+            else:
+                path = paths[fmt]
+                result["bytes_arquivo"] = path.stat().st_size
+                result["segundos"] = bench_library(path, frame, repeat, streaming)
+                if dashboard and _DASHBOARD.exists():
+                    # Uma pasta por arquivo: a visão consolidada lê tudo o que estiver nela.
+                    isolated = data_dir / f"_app_{path.stem.replace(' ', '_')}_{fmt}" / path.name
+                    isolated.parent.mkdir(exist_ok=True)
+                    if not isolated.exists():
+                        try:
+                            isolated.hardlink_to(path)
+                        except OSError:
+                            shutil.copyfile(path, isolated)
+                    # Sem o cache .abc.parquet de uma execução anterior: a carga é sempre a frio.
+                    sidecar_path(isolated).unlink(missing_ok=True)
+                    result["dashboard"] = bench_dashboard(isolated)
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return {
+        "versao": BENCH_VERSION,
+        "quando": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "ambiente": environment(),
+        "parametros": {"repeat": repeat, "seed": seed, "streaming": streaming},
+        "inicio": cold_start,
+        "resultados": results,
+    }
+
+
+def save_results(report: dict, path: Path) -> None:
+    Path(path).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def load_results(path: Path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _flatten(report: dict) -> pd.DataFrame:
+    rows = []
+    for result in report["resultados"]:
+        stages = dict(result.get("segundos", {}))
+        dash = result.get("dashboard") or {}
+        if "primeiro_grafico" in dash:
+            stages["dashboard:primeiro_grafico"] = dash["primeiro_grafico"]
+        stages.update({f"dashboard:{name}": s for name, s in dash.get("estagios", {}).items()})
+        rows.extend((result["linhas"], result["formato"], stage, s) for stage, s in stages.items())
+    # Início a frio: sem base sintética (linhas = 0), na planilha fixa padrão.
+    for mode, result in (report.get("inicio") or {}).items():
+        rows.append((0, "planilha_fixa", f"inicio:{mode}", result["primeiro_grafico"]))
+    return pd.DataFrame(rows, columns=["linhas", "formato", "estagio", "segundos"])
+
+
+def compare_results(baseline: dict, current: dict) -> pd.DataFrame:
+    """Tempos lado a lado por (linhas, formato, estágio) e a razão atual/base (>1 = mais lento)."""
+    keys = ["linhas", "formato", "estagio"]
+    merged = _flatten(baseline).merge(_flatten(current), on=keys, suffixes=("_base", "_atual"))
+    merged["razao"] = merged["segundos_atual"] / merged["segundos_base"].where(merged["segundos_base"] > 0)
+    return merged
+
+
+def regressions(comparison: pd.DataFrame, tolerance: float = 0.2, min_seconds: float = REGRESSION_MIN_SECONDS) -> pd.DataFrame:
+    """Linhas de ``compare_results`` mais lentas que ``1 + tolerance`` vezes a base.
+
+    Diferenças abaixo de ``min_seconds`` são ruído de medição (estágios de
+    microssegundos) e ficam de fora.
+    """
+    slower = comparison["razao"] > 1 + tolerance
+    relevant = (comparison["segundos_atual"] - comparison["segundos_base"]) >= min_seconds
+    return comparison[slower & relevant]
@@ -0,0 +1,227 @@
+"""Motor vetorizado de classificação ABC.
+
+Recebe um vetor de quantidades e devolve a classe de cada linha junto com o
+% individual e o % acumulado, sem nenhum laço Python por linha: uma ordenação
+decrescente, ``cumsum`` e ``searchsorted`` para achar os pontos de corte.
+
+Regra de corte (a mesma do dashboard): ordenando por quantidade decrescente,
+a classe A vai até a primeira posição cujo acumulado atinge 80%, a B até a
+primeira que atinge 95% e o restante é C. Empates na quantidade que cruzam
+um ponto de corte são resolvidos pela ordem original das linhas.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+CLASSES = ("A", "B", "C")
+DEFAULT_CUTS = (80.0, 95.0)
+NO_CLASS = "Sem classe"
+
+
+@dataclass
+class ABCResult:
+    classes: pd.Categorical
+    pct_individual: np.ndarray
+    pct_acumulado: np.ndarray
+
+
+def _cut_positions(pct_acum_sorted: np.ndarray, cuts, monotonic: bool = False) -> np.ndarray:
+    # Com quantidades negativas o acumulado deixa de ser monótono; o máximo
+    # corrente preserva a "primeira posição que atinge o corte".
+    running_max = pct_acum_sorted if monotonic else np.maximum.accumulate(pct_acum_sorted)
+    pos = np.searchsorted(running_max, np.asarray(cuts, dtype=float), side="left")
+    return np.minimum(pos, len(pct_acum_sorted) - 1)
+
+
+def _descending_order(q: np.ndarray) -> np.ndarray:
+    # argsort dos bits do float64 como int64 (mais rápido que o de floats):
+    # sem negativos a ordem dos bits já é a dos valores; com negativos, o XOR
+    # inverte os bits de magnitude dos negativos e dá a ordem total. O ``~``
+    # inverte a ordem, para a decrescente sair contígua.
+    key = np.ascontiguousarray(q).view(np.int64)
+    if q.min() < 0:
+        key = key ^ ((key >> 63) & np.int64(0x7FFFFFFFFFFFFFFF))
+    return np.argsort(~key, kind="quicksort")
+
+
+def _classify_column(q: np.ndarray, cuts, codes: np.ndarray, pct_ind: np.ndarray, pct_acum: np.ndarray) -> None:
+    # Preenche codes/pct_ind/pct_acum (vetores contíguos, sem valor inicial) para uma métrica.
+    nan_mask = np.isnan(q)
+    if nan_mask.any():
+        valid = np.flatnonzero(~nan_mask)
+        q_valid = q[valid]
+        codes[nan_mask] = -1
+        pct_acum[nan_mask] = np.nan
+    else:
+        valid = None
+        q_valid = q
+    total = float(q_valid.sum())
+    if len(q_valid) == 0 or total <= 0:
+        codes.fill(-1)
+        pct_ind.fill(np.nan)
+        pct_acum.fill(np.nan)
+        return
+
+    order = _descending_order(q_valid)
+    q_sorted = q_valid[order]
+    if valid is not None:
+        order = valid[order]
+    np.divide(q, total, out=pct_ind)
+    np.multiply(pct_ind, 100, out=pct_ind)
+    acum_sorted = np.divide(q_sorted, total)
+    np.multiply(acum_sorted, 100, out=acum_sorted)
+    np.cumsum(acum_sorted, out=acum_sorted)
+
+    # Sem negativos o acumulado é não decrescente: dispensa o máximo corrente.
+    cut_pos = _cut_positions(acum_sorted, cuts, monotonic=q_sorted[-1] >= 0)
+    codes_sorted = np.empty(len(order), dtype=np.int8)
+    start = 0
+    for cls_code, stop in enumerate([*(p + 1 for p in cut_pos), len(order)]):
+        codes_sorted[start:max(start, stop)] = cls_code
+        start = max(start, stop)
+
+    # Empates no ponto de corte: a ordem entre quantidades iguais é arbitrária
+    # no quicksort, então redistribui o trecho empatado pela ordem original.
+    # O trecho sai de duas buscas binárias na ordem crescente (vista invertida).
+    ascending = q_sorted[::-1]
+    n = len(q_sorted)
+    for p in np.unique(cut_pos):
+        v = q_sorted[p]
+        lo = n - int(np.searchsorted(ascending, v, side="right"))
+        hi = n - int(np.searchsorted(ascending, v, side="left"))
+        if hi - lo > 1:
+            order[lo:hi].sort()
+
+    codes[order] = codes_sorted
+    pct_acum[order] = acum_sorted
+
+
+@dataclass
+class ABCMatrix:
+    """Classes e percentuais de várias métricas (uma coluna por métrica)."""
+
+    codes: np.ndarray  # (linhas, métricas) int8: 0=A, 1=B, 2=C, -1=sem classe
+    pct_individual: np.ndarray
+    pct_acumulado: np.ndarray
+
+    def classes(self, j: int) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.codes[:, j], categories=CLASSES)
+
+
+def classify_abc_matrix(values, cuts=DEFAULT_CUTS) -> ABCMatrix:
+    """``classify_abc`` de todas as colunas de ``values`` (linhas × métricas) numa chamada.
+
+    Cada métrica é ordenada como vetor contíguo (um ``argsort`` 2D não é mais
+    rápido e deixa o acumulado com acesso espaçado); os resultados vão direto
+    para matrizes em layout de coluna, sem cópias intermediárias.
+    """
+    q = np.asarray(values, dtype=np.float64)
+    q = np.asfortranarray(q if q.ndim == 2 else q.reshape(-1, 1))
+    n, k = q.shape
+    # Layout de coluna: cada métrica é um vetor contíguo, preenchido por inteiro
+    # em ``_classify_column`` (sem inicialização prévia).
+    codes = np.empty((n, k), dtype=np.int8, order="F")
+    pct_ind = np.empty((n, k), order="F")
+    pct_acum = np.empty((n, k), order="F")
+    for j in range(k):
+        _classify_column(q[:, j], cuts, codes[:, j], pct_ind[:, j], pct_acum[:, j])
+    return ABCMatrix(codes, pct_ind, pct_acum)
+
+
+def _classify_grouped_column(q: np.ndarray, groups: np.ndarray, cuts,
+                             codes: np.ndarray, pct_ind: np.ndarray, pct_acum: np.ndarray) -> None:
+    # Uma ordenação (grupo, quantidade decrescente) e um cumsum para todos os grupos.
+    valid = np.flatnonzero(~np.isnan(q) & (groups >= 0))
+    if len(valid) == 0:
+        return
+    # Ordenações estáveis: empates na quantidade ficam na ordem original das
+    # linhas, a mesma regra de desempate do corte em ``_classify_column``.
+    order = valid[np.argsort(-q[valid], kind="stable")]
+    order = order[np.argsort(groups[order], kind="stable")]
+    g_sorted = groups[order]
+    q_sorted = q[order]
+    starts = np.flatnonzero(np.r_[True, g_sorted[1:] != g_sorted[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    sizes = ends - starts
+
+    totals = np.add.reduceat(q_sorted, starts)
+    total_of = np.repeat(totals, sizes)
+    # Grupos com total <= 0 ficam sem classe, como a base inteira em ``_classify_column``.
+    keep = total_of > 0
+    terms = np.where(keep, q_sorted / np.where(keep, total_of, 1.0) * 100, np.nan)
+    running = np.cumsum(np.where(keep, terms, 0.0))
+    # Acumulado dentro do grupo: o cumsum global menos o que veio antes do grupo.
+    before = np.repeat(running[starts] - terms[starts], sizes)
+    acum_sorted = running - before
+    # A subtração deixa resíduo na última casa; nos grupos com algum acumulado
+    # colado num corte, refaz o total e o cumsum do grupo como ``_classify_column``,
+    # para a classe sair igual à de classificar o grupo sozinho.
+    near = np.zeros(len(order), dtype=bool)
+    for cut in cuts:
+        near |= np.abs(acum_sorted - cut) <= 1e-9
+    for gi in np.unique(np.searchsorted(starts, np.flatnonzero(near & keep), side="right") - 1):
+        s, e = starts[gi], ends[gi]
+        total = float(q[np.sort(order[s:e])].sum())
+        if total <= 0:
+            continue
+        terms[s:e] = q_sorted[s:e] / total * 100
+        acum_sorted[s:e] = np.cumsum(terms[s:e])
+
+    # Ponto de corte de cada grupo: a primeira posição que atinge o corte (senão, a última).
+    positions = np.arange(len(order))
+    within = np.zeros(len(order), dtype=np.int8)
+    for cut in cuts:
+        reached = np.where(acum_sorted >= cut, positions, len(order))
+        cut_pos = np.minimum(np.minimum.reduceat(reached, starts), ends - 1)
+        within += positions <= np.repeat(cut_pos, sizes)
+    codes_sorted = (len(cuts) - within).astype(np.int8)
+
+    codes[order] = np.where(keep, codes_sorted, -1)
+    pct_ind[order] = terms
+    pct_acum[order] = np.where(keep, acum_sorted, np.nan)
+
+
+def classify_abc_grouped(values, groups, cuts=DEFAULT_CUTS) -> ABCMatrix:
+    """``classify_abc_matrix`` dentro de cada grupo (ex.: tipo de item), todos os grupos de uma vez.
+
+    ``groups`` são códigos inteiros por linha (``-1``: sem grupo, fica sem
+    classe). Percentuais e classes de cada linha são relativos ao total do
+    seu grupo; custa uma ordenação e um ``cumsum`` por métrica, qualquer que
+    seja o número de grupos.
+    """
+    q = np.asarray(values, dtype=np.float64)
+    q = np.asfortranarray(q if q.ndim == 2 else q.reshape(-1, 1))
+    groups = np.asarray(groups, dtype=np.int64)
+    n, k = q.shape
+    codes = np.full((n, k), -1, dtype=np.int8, order="F")
+    pct_ind = np.full((n, k), np.nan, order="F")
+    pct_acum = np.full((n, k), np.nan, order="F")
+    for j in range(k):
+        _classify_grouped_column(q[:, j], groups, cuts, codes[:, j], pct_ind[:, j], pct_acum[:, j])
+    return ABCMatrix(codes, pct_ind, pct_acum)
+
+
+def classify_abc(quantities, cuts=DEFAULT_CUTS) -> ABCResult:
+    result = classify_abc_matrix(np.asarray(quantities, dtype=np.float64).reshape(-1, 1), cuts)
+    return ABCResult(result.classes(0), result.pct_individual[:, 0], result.pct_acumulado[:, 0])
+
+
+def cross_counts(codes_a: np.ndarray, codes_b: np.ndarray, n_classes: int = len(CLASSES)) -> np.ndarray:
+    """Matriz (classe em ``a``) × (classe em ``b``); a última linha/coluna conta "sem classe" (-1)."""
+    slots = n_classes + 1
+    a = np.where(codes_a < 0, n_classes, codes_a).astype(np.int64)
+    b = np.where(codes_b < 0, n_classes, codes_b).astype(np.int64)
+    return np.bincount(a * slots + b, minlength=slots * slots).reshape(slots, slots)
+
+
+def cross_frame(codes_a: np.ndarray, codes_b: np.ndarray, name_a: str, name_b: str) -> pd.DataFrame:
+    """``cross_counts`` como tabela (linhas: classe em ``a``; colunas: classe em ``b``).
+
+    A linha/coluna "Sem classe" só aparece quando tem alguma contagem.
+    """
+    labels = [*CLASSES, NO_CLASS]
+    matrix = pd.DataFrame(cross_counts(codes_a, codes_b), index=pd.Index(labels, name=name_a), columns=pd.Index(labels, name=name_b))
+    keep_rows = [*CLASSES] + ([NO_CLASS] if matrix.loc[NO_CLASS].any() else [])
+    keep_cols = [*CLASSES] + ([NO_CLASS] if matrix[NO_CLASS].any() else [])
+    return matrix.loc[keep_rows, keep_cols]
@@ -0,0 +1,355 @@
+"""Classificação ABC em lote, sem navegador, e benchmarks.
+
+    python -m abc_curva classify PLANILHAS_OU_PASTAS... -o SAIDA [--jobs N]
+    python -m abc_curva generate LINHAS... -o PASTA [--format xlsx csv parquet]
+    python -m abc_curva bench [--rows 10000 100000] [-o bench.json] [--compare base.json]
+    python -m abc_curva warm PLANILHAS_OU_PASTAS...
+    python -m abc_curva classify-large BASE.csv -o SAIDA.parquet [--memory-mb 256]
+
+Cada arquivo (XLSX, CSV ou Parquet) passa pelo mesmo pipeline do dashboard
+(``ingest_dataset`` → ``normalize_dataset`` → ``classify_dataset``) num pool
+de processos; a base classificada de cada um é gravada em ``SAIDA`` e um
+índice (``indice_abc.csv``) resume linhas, classes, total e tempo por arquivo.
+``generate`` grava bases sintéticas e ``bench`` mede cada estágio sobre elas
+(ver ``bench``). ``warm`` grava o cache ``.abc.parquet`` das planilhas (ver
+``sidecar``), para o dashboard não ler o XLSX na primeira sessão depois de
+subir o servidor. ``classify-large`` classifica um CSV ou Parquet maior que a
+memória em passadas por blocos (ver ``outofcore``).
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from . import bench
+from .classify import CLASSES, DEFAULT_CUTS
+from .exports import EXPORT_FORMATS, write_csv, write_frame
+from .outofcore import OUT_OF_CORE_MEMORY_MB, classify_file_out_of_core
+from .parsing import LOCALES
+from .pipeline import (
+    ANALYSIS_QTD,
+    ANALYSIS_VOLUME,
+    COL_CLASSE,
+    DatasetError,
+    classify_dataset,
+    ingest_dataset,
+    normalize_dataset,
+)
+from .sidecar import ingest_with_sidecar
+from .sources import collect_inputs
+from .synthetic import synthetic_dataset, write_dataset
+
+INDEX_FILE = "indice_abc.csv"
+_ANALYSIS_CHOICES = {"volume": ANALYSIS_VOLUME, "qtd": ANALYSIS_QTD}
+_OUTPUT_SUFFIX = "_abc"
+
+
+def _index_row(path: Path) -> dict:
+    row = {"arquivo": path.name, "status": "ok", "tipo_analise": None, "linhas": 0}
+    row.update({f"classe_{c}": 0 for c in CLASSES})
+    row.update({"total": 0.0, "saida": None, "segundos": 0.0, "erro": None})
+    return row
+
+
+def _error_text(error: Exception) -> str:
+    # Erros esperados (arquivo ilegível, disco) já têm mensagem para o usuário.
+    if isinstance(error, (DatasetError, OSError)):
+        return str(error)
+    return f"{type(error).__name__}: {error}"
+
+
+def _output_names(inputs: list[Path]) -> list[str]:
+    """Nome-base da saída de cada arquivo: ``<nome>``, ou ``<nome>_<ext>[_N]`` se o nome se repete no lote.
+
+    Arquivos de pastas ou formatos diferentes com o mesmo nome (``a/x.xlsx``,
+    ``b/x.csv``) gravariam a mesma saída; a comparação ignora maiúsculas, como
+    nos sistemas de arquivos do Windows e do macOS.
+    """
+    repeated = pd.Series([p.stem.lower() for p in inputs]).duplicated(keep=False).to_numpy()
+    names, taken = [], set()
+    for path, is_repeated in zip(inputs, repeated):
+        name = f"{path.stem}_{path.suffix.lstrip('.').lower()}" if is_repeated else path.stem
+        candidate, n = name, 1
+        while candidate.lower() in taken:
+            n += 1
+            candidate = f"{name}_{n}"
+        taken.add(candidate.lower())
+        names.append(candidate)
+    return names
+
+
+def classify_file(path: Path, out_dir: Path, output_format: str = "csv", analysis_type: str | None = None,
+                  locale: str = "pt-BR", cuts=DEFAULT_CUTS, by_type: bool = False, output_name: str | None = None) -> dict:
+    """Classifica um arquivo e grava o resultado; devolve a linha do índice (erros não interrompem o lote).
+
+    Com ``by_type``, cada item é classificado dentro do seu ``Tipo Item``. A
+    saída é ``<output_name>_abc.<ext>`` (padrão: o nome do arquivo sem extensão).
+    """
+    start = time.perf_counter()
+    row = _index_row(path)
+    try:
+        raw = ingest_dataset(path, path.name, analysis_type=analysis_type, locale=locale, streaming=True)
+        normalized = normalize_dataset(raw)
+        dataset = classify_dataset(normalized, cuts=cuts, group_by=normalized.col_tipo if by_type else None)
+        out_file = out_dir / f"{output_name or path.stem}{_OUTPUT_SUFFIX}{EXPORT_FORMATS[output_format][1]}"
+        with open(out_file, "wb") as out:
+            write_frame(dataset.df, out, output_format, sheet_name="Curva ABC")
+        counts = dataset.df[COL_CLASSE].value_counts()
+        row.update({
+            "tipo_analise": dataset.analysis_type,
+            "linhas": len(dataset.df),
+            "total": float(dataset.df[dataset.col_quantidade].sum()),
+            "saida": out_file.name,
+        })
+        row.update({f"classe_{c}": int(counts.get(c, 0)) for c in CLASSES})
+    except Exception as e:
+        # Qualquer falha fica na linha do arquivo; o lote segue e o índice é gravado.
+        row.update({"status": "erro", "erro": _error_text(e)})
+    row["segundos"] = round(time.perf_counter() - start, 3)
+    return row
+
+
+def run_batch(inputs: list[Path], out_dir: Path, jobs: int = 1, on_done=None, **classify_kwargs) -> pd.DataFrame:
+    """Classifica ``inputs`` com até ``jobs`` processos; ``on_done(linha)`` a cada arquivo concluído."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    names = _output_names(inputs)
+    # Índice na ordem dos arquivos, não na de conclusão.
+    rows = [None] * len(inputs)
+    if jobs <= 1 or len(inputs) <= 1:
+        for i, path in enumerate(inputs):
+            rows[i] = classify_file(path, out_dir, output_name=names[i], **classify_kwargs)
+            if on_done:
+                on_done(rows[i])
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(inputs))) as pool:
+            futures = {
+                pool.submit(classify_file, path, out_dir, output_name=names[i], **classify_kwargs): i
+                for i, path in enumerate(inputs)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    rows[i] = future.result()
+                except Exception as e:
+                    # O processo do arquivo morreu (ex.: falta de memória): só esse arquivo falha.
+                    rows[i] = {**_index_row(inputs[i]), "status": "erro", "erro": _error_text(e)}
+                if on_done:
+                    on_done(rows[i])
+    index = pd.DataFrame(rows)
+    with open(out_dir / INDEX_FILE, "wb") as out:
+        write_csv(index, out)
+    return index
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m abc_curva", description="Curva ABC sem o dashboard.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    classify = commands.add_parser("classify", help="classifica planilhas em lote")
+    classify.add_argument("inputs", nargs="+", help="arquivos .xlsx/.csv/.parquet ou pastas com eles")
+    classify.add_argument("-o", "--output", default="saida_abc", help="pasta de saída (padrão: %(default)s)")
+    classify.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                          help="processos em paralelo (padrão: núcleos da máquina, %(default)s)")
+    classify.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv", dest="output_format",
+                          help="formato dos arquivos classificados (padrão: %(default)s)")
+    classify.add_argument("--analysis", choices=list(_ANALYSIS_CHOICES),
+                          help="tipo de análise; sem ele, deduzido pelo nome do arquivo")
+    classify.add_argument("--locale", default="pt-BR", choices=LOCALES,
+                          help="formato dos números no arquivo (padrão: %(default)s)")
+    classify.add_argument("--cuts", type=float, nargs=2, default=DEFAULT_CUTS, metavar=("A", "B"),
+                          help="cortes de %% acumulado das classes A e B (padrão: 80 95)")
+    classify.add_argument("--por-tipo", action="store_true", dest="by_type",
+                          help="uma curva ABC dentro de cada Tipo Item (percentuais sobre o total do tipo)")
+
+    generate = commands.add_parser("generate", help="grava bases sintéticas no formato das planilhas ABC")
+    generate.add_argument("rows", type=int, nargs="+", help="linhas de cada base (ex.: 10000 1000000)")
+    generate.add_argument("-o", "--output", default="bench_data", help="pasta de saída (padrão: %(default)s)")
+    generate.add_argument("--format", choices=bench.BENCH_FORMATS, nargs="+", default=list(bench.BENCH_FORMATS),
+                          dest="formats", help="formatos gravados (padrão: todos)")
+    generate.add_argument("--seed", type=int, default=0, help="semente do gerador (padrão: %(default)s)")
+
+    bench_cmd = commands.add_parser("bench", help="mede cada estágio do pipeline em bases sintéticas")
+    bench_cmd.add_argument("--rows", type=int, nargs="+", default=list(bench.BENCH_ROWS),
+                           help="tamanhos das bases (padrão: 10 mil a 10 milhões de linhas)")
+    bench_cmd.add_argument("--format", choices=bench.BENCH_FORMATS, nargs="+", default=list(bench.BENCH_FORMATS),
+                           dest="formats", help="formatos medidos (padrão: todos)")
+    bench_cmd.add_argument("--data-dir", default="bench_data", help="pasta das bases geradas, reaproveitadas entre execuções")
+    bench_cmd.add_argument("-o", "--output", default="bench.json", help="resultado em JSON (padrão: %(default)s)")
+    bench_cmd.add_argument("--repeat", type=int, default=3, help="execuções por estágio; vale a mais rápida (padrão: %(default)s)")
+    bench_cmd.add_argument("--seed", type=int, default=0, help="semente do gerador (padrão: %(default)s)")
+    bench_cmd.add_argument("--streaming", action="store_true", help="XLSX lido em lotes, como no modo do dashboard")
+    bench_cmd.add_argument("--no-dashboard", action="store_false", dest="dashboard",
+                           help="não roda o dashboard (gráficos e tabela ficam de fora)")
+    bench_cmd.add_argument("--compare", metavar="BASE.json", help="compara com um resultado anterior")
+    bench_cmd.add_argument("--tolerance", type=float, default=0.2,
+                           help="com --compare, razão acima de 1+TOL conta como regressão (padrão: %(default)s)")
+    bench_cmd.add_argument("--min-seconds", type=float, default=bench.REGRESSION_MIN_SECONDS,
+                           help="com --compare, diferenças menores que isso são ignoradas (padrão: %(default)s s)")
+
+    warm = commands.add_parser("warm", help="grava o cache .abc.parquet das planilhas (ex.: antes de subir o dashboard)")
+    warm.add_argument("inputs", nargs="+", help="arquivos .xlsx/.csv/.parquet ou pastas com eles")
+
+    large = commands.add_parser("classify-large", help="classifica um CSV/Parquet maior que a memória, em blocos")
+    large.add_argument("input", help="arquivo .csv ou .parquet")
+    large.add_argument("-o", "--output", required=True, help="arquivo classificado (.parquet ou .csv)")
+    large.add_argument("--analysis", choices=list(_ANALYSIS_CHOICES),
+                       help="tipo de análise; sem ele, deduzido pelo nome do arquivo")
+    large.add_argument("--column", help="coluna de quantidade (no lugar do tipo de análise)")
+    large.add_argument("--locale", default="pt-BR", choices=LOCALES,
+                       help="formato dos números no arquivo (padrão: %(default)s)")
+    large.add_argument("--cuts", type=float, nargs=2, default=DEFAULT_CUTS, metavar=("A", "B"),
+                       help="cortes de %% acumulado das classes A e B (padrão: 80 95)")
+    large.add_argument("--memory-mb", type=float, default=OUT_OF_CORE_MEMORY_MB,
+                       help="memória de trabalho: tamanho dos blocos e do refinamento (padrão: %(default)s MB)")
+    return parser
+
+
+def _print_row(row: dict, position: int, total: int) -> None:
+    width = len(str(total))
+    prefix = f"[{position:>{width}}/{total}] {row['arquivo']}"
+    if row["status"] == "ok":
+        classes = "/".join(str(row[f"classe_{c}"]) for c in CLASSES)
+        print(f"{prefix}: {row['linhas']} linhas, A/B/C={classes}, {row['segundos']:.2f} s", flush=True)
+    else:
+        print(f"{prefix}: ERRO ({row['segundos']:.2f} s) {row['erro']}", file=sys.stderr, flush=True)
+
+
+def _generate(args) -> int:
+    out_dir = Path(args.output)
+    for n_rows in args.rows:
+        frame = synthetic_dataset(n_rows, seed=args.seed)
+        for fmt in args.formats:
+            path = bench.dataset_path(out_dir, n_rows, fmt, args.seed)
+            try:
+                write_dataset(frame, path)
+            except ValueError as e:
+                print(f"{path.name}: ignorado ({e})", file=sys.stderr)
+                continue
+            print(f"{path}: {n_rows:,} linhas, {path.stat().st_size / 1024 ** 2:,.1f} MB", flush=True)
+    return 0
+
+
+def _warm(args) -> int:
+    # Mesmos argumentos da seleção padrão do dashboard: tipo de análise deduzido pelo nome.
+    n_errors = 0
+    for path in collect_inputs(args.inputs):
+        start = time.perf_counter()
+        try:
+            dataset = ingest_with_sidecar(path, path.name)
+        except DatasetError as e:
+            n_errors += 1
+            print(f"{path}: ERRO {e}", file=sys.stderr, flush=True)
+            continue
+        print(f"{path}: {len(dataset.df):,} linhas em cache, {time.perf_counter() - start:.2f} s", flush=True)
+    return 1 if n_errors else 0
+
+
+def _classify_large(args) -> int:
+    start = time.perf_counter()
+    try:
+        result = classify_file_out_of_core(
+            Path(args.input),
+            Path(args.output),
+            analysis_type=_ANALYSIS_CHOICES.get(args.analysis),
+            col_quantidade=args.column,
+            cuts=tuple(args.cuts),
+            locale=args.locale,
+            memory_mb=args.memory_mb,
+        )
+    except (DatasetError, ValueError) as e:
+        print(f"{args.input}: ERRO {e}", file=sys.stderr)
+        return 1
+    classes = "/".join(str(result.class_counts[c]) for c in CLASSES)
+    print(f"{args.input}: {result.rows:,} linhas, A/B/C={classes}, {result.passes} passadas em blocos de até "
+          f"{result.chunk_rows:,} linhas, {time.perf_counter() - start:.2f} s → {args.output}")
+    return 0
+
+
+def _print_bench_result(result: dict) -> None:
+    prefix = f"{result['linhas']:>12,} {result['formato']:<8}"
+    if "ignorado" in result:
+        print(f"{prefix} ignorado: {result['ignorado']}", flush=True)
+        return
+    stages = " ".join(f"{name}={result['segundos'][name]:.3f}" for name in bench.LIBRARY_STAGES)
+    dash = result.get("dashboard")
+    if dash:
+        stages += f" dashboard={dash['primeiro_grafico']:.3f}"
+    print(f"{prefix} {stages} (s)", flush=True)
+
+
+def _bench(args) -> int:
+    if args.dashboard:
+        print("Medindo o início a frio do dashboard...", flush=True)
+    report = bench.run_benchmark(
+        rows=args.rows,
+        formats=args.formats,
+        data_dir=Path(args.data_dir),
+        repeat=args.repeat,
+        seed=args.seed,
+        streaming=args.streaming,
+        dashboard=args.dashboard,
+        on_result=_print_bench_result,
+    )
+    for mode, result in (report["inicio"] or {}).items():
+        print(f"início ({mode}): primeiro gráfico em {result['primeiro_grafico']:.3f} s "
+              f"(+{result['importacao']:.3f} s do import do Streamlit)")
+    bench.save_results(report, Path(args.output))
+    print(f"Resultado: {args.output}")
+    if not args.compare:
+        return 0
+
+    comparison = bench.compare_results(bench.load_results(Path(args.compare)), report)
+    slower = bench.regressions(comparison, args.tolerance, args.min_seconds)
+    for row in slower.itertuples():
+        print(f"⚠️ {row.linhas:,} {row.formato} {row.estagio}: {row.segundos_base:.3f} s → {row.segundos_atual:.3f} s "
+              f"({row.razao:.2f}x)", file=sys.stderr)
+    print(f"{len(slower)} de {len(comparison)} medições mais lentas que {args.compare} (tolerância {args.tolerance:.0%}).")
+    return 1 if len(slower) else 0
+
+
+def main(argv=None) -> int:
+    args = _build_parser().parse_args(argv)
+    if args.command == "generate":
+        return _generate(args)
+    if args.command == "bench":
+        return _bench(args)
+    if args.command == "warm":
+        return _warm(args)
+    if args.command == "classify-large":
+        return _classify_large(args)
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("Nenhum arquivo .xlsx, .csv ou .parquet encontrado.", file=sys.stderr)
+        return 2
+
+    out_dir = Path(args.output)
+    done = []
+
+    def _on_done(row: dict) -> None:
+        done.append(row)
+        _print_row(row, len(done), len(inputs))
+
+    start = time.perf_counter()
+    index = run_batch(
+        inputs,
+        out_dir,
+        jobs=max(1, args.jobs),
+        on_done=_on_done,
+        output_format=args.output_format,
+        analysis_type=_ANALYSIS_CHOICES.get(args.analysis),
+        locale=args.locale,
+        cuts=tuple(args.cuts),
+        by_type=args.by_type,
+    )
+    elapsed = time.perf_counter() - start
+    n_errors = int((index["status"] != "ok").sum())
+    print(
+        f"{len(index) - n_errors} de {len(index)} arquivos classificados em {elapsed:.2f} s "
+        f"(soma dos arquivos: {index['segundos'].sum():.2f} s, {max(1, args.jobs)} processos). "
+        f"Índice: {out_dir / INDEX_FILE}"
+    )
+    return 1 if n_errors else 0
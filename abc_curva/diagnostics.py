@@ -0,0 +1,95 @@
+"""Diagnóstico de desempenho: um registro estruturado por atualização (rerun).
+
+O registro junta o que o ``StageSession`` mediu (tempo, pico de memória,
+linhas e bytes de cada estágio; execuções × reaproveitamentos acumulados) e
+vai para o logger ``abc_curva.diagnostics`` como uma linha JSON e,
+opcionalmente, para um arquivo JSON Lines para análise fora do app.
+"""
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .stages import StageRun, StageStats
+
+DIAGNOSTICS_LOGGER = "abc_curva.diagnostics"
+# Registros guardados na sessão para o download
+DIAGNOSTICS_HISTORY = 50
+
+logger = logging.getLogger(DIAGNOSTICS_LOGGER)
+
+
+def measure_result(value) -> dict:
+    """Linhas de tabelas/arrays e bytes do JSON enviado ao navegador para figuras Plotly."""
+    details = {}
+    frame = getattr(value, "df", value)
+    if isinstance(frame, (pd.DataFrame, pd.Series, np.ndarray)):
+        details["linhas"] = len(frame)
+    # Figura Plotly sem importar o plotly: é esse JSON que o st.plotly_chart envia.
+    if hasattr(value, "to_plotly_json") and hasattr(value, "to_json"):
+        details["payload_bytes"] = len(value.to_json().encode("utf-8"))
+    return details
+
+
+def rerun_record(runs: list[StageRun], stats: dict[str, StageStats], rerun: int, wall_seconds: float, **context) -> dict:
+    """Registro JSON de uma atualização; ``context`` entra como está (ex.: arquivo, linhas da base)."""
+    ran = sum(s.ran for s in stats.values())
+    reused = sum(s.reused for s in stats.values())
+    return {
+        "evento": "rerun",
+        "quando": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rerun": rerun,
+        "segundos": round(wall_seconds, 6),
+        **context,
+        "estagios": [
+            {
+                "nome": r.name,
+                "fase": r.phase,
+                "status": r.status,
+                "segundos": round(r.seconds, 6),
+                "pico_bytes": r.peak_bytes,
+                **r.details,
+            }
+            for r in runs
+        ],
+        "cache": {
+            "executados": ran,
+            "reaproveitados": reused,
+            "taxa_acerto": reused / (ran + reused) if ran + reused else None,
+        },
+    }
+
+
+def emit_record(record: dict, path: Path | str | None = None) -> None:
+    """Uma linha JSON no logger de diagnóstico e, com ``path``, acrescentada ao arquivo."""
+    line = json.dumps(record, ensure_ascii=False)
+    logger.info(line)
+    if path:
+        with open(path, "a", encoding="utf-8") as out:
+            out.write(line + "\n")
+
+
+def stage_frame(runs: list[StageRun]) -> pd.DataFrame:
+    """Estágios da atualização com as medidas do diagnóstico."""
+    frame = pd.DataFrame(
+        [
+            (r.name, r.phase, r.status, r.seconds * 1000,
+             r.peak_bytes / 1024 ** 2 if r.peak_bytes is not None else None,
+             r.details.get("linhas"),
+             r.details["payload_bytes"] / 1024 if "payload_bytes" in r.details else None)
+            for r in runs
+        ],
+        columns=["Estágio", "Fase", "Status", "Tempo (ms)", "Pico (MB)", "Linhas", "Payload (KB)"],
+    )
+    return frame.astype({"Pico (MB)": float, "Linhas": "Int64", "Payload (KB)": float})
+
+
+def stats_frame(stats: dict[str, StageStats]) -> pd.DataFrame:
+    """Execuções × reaproveitamentos de cada estágio desde o início da sessão."""
+    return pd.DataFrame(
+        [(name, s.ran, s.reused, s.hit_rate, s.seconds * 1000) for name, s in stats.items()],
+        columns=["Estágio", "Executado", "Reaproveitado", "Taxa de acerto", "Tempo total (ms)"],
+    )
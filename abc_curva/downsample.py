@@ -0,0 +1,61 @@
+"""Redução de pontos para gráficos de bases grandes.
+
+- ``lttb``: Largest-Triangle-Three-Buckets, mantém a forma da curva com
+  poucos pontos (o primeiro e o último sempre entram).
+- ``bin_ranks``: agrega posições consecutivas do ranking em faixas, para as
+  barras da cauda longa.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int, keep=None) -> np.ndarray:
+    """Índices (crescentes) dos pontos escolhidos; ``keep`` força índices extras (ex.: cortes)."""
+    n = len(x)
+    if n_out >= n or n <= 2:
+        selected = np.arange(n)
+    else:
+        n_out = max(n_out, 3)
+        selected = np.empty(n_out, dtype=np.int64)
+        selected[0] = 0
+        selected[-1] = n - 1
+        # Baldes internos: [1, n-1) dividido em n_out-2 partes
+        edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+        prev = 0
+        for i in range(n_out - 2):
+            lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+            # Ponto médio do próximo balde (ou o último ponto)
+            if i + 2 < len(edges):
+                nxt_lo, nxt_hi = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+                nx, ny = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+            else:
+                nx, ny = x[-1], y[-1]
+            px, py = x[prev], y[prev]
+            bx, by = x[lo:hi], y[lo:hi]
+            area = np.abs((px - nx) * (by - py) - (px - bx) * (ny - py))
+            prev = lo + int(np.argmax(area))
+            selected[i + 1] = prev
+    if keep is not None and len(keep):
+        selected = np.union1d(selected, np.asarray(keep, dtype=np.int64))
+    return selected
+
+
+@dataclass
+class RankBins:
+    start: np.ndarray  # posição inicial (0-based) de cada faixa
+    stop: np.ndarray  # posição final exclusiva
+    total: np.ndarray  # soma dos valores da faixa
+    mean: np.ndarray
+
+
+def bin_ranks(values: np.ndarray, start: int, stop: int, n_bins: int) -> RankBins:
+    """Agrupa ``values[start:stop]`` em até ``n_bins`` faixas de posições consecutivas."""
+    segment = values[start:stop]
+    if len(segment) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return RankBins(start=empty, stop=empty, total=np.zeros(0), mean=np.zeros(0))
+    n_bins = max(1, min(n_bins, len(segment)))
+    edges = np.unique(np.linspace(0, len(segment), n_bins + 1).astype(np.int64))
+    sums = np.add.reduceat(segment, edges[:-1])
+    return RankBins(start=edges[:-1] + start, stop=edges[1:] + start, total=sums, mean=sums / np.diff(edges))
@@ -0,0 +1,97 @@
+"""Exportação da base e do relatório em CSV, Parquet e Excel.
+
+Os escritores percorrem o DataFrame em fatias de ``chunk_rows`` linhas e
+gravam cada uma em ``out`` (arquivo ou buffer binário) antes de montar a
+próxima: a conversão (texto do CSV, tabela Arrow, células do Excel) nunca
+existe para a base inteira de uma vez. O arquivo pronto, porém, fica onde
+``out`` o guarda: num arquivo em disco, fora da memória; num ``BytesIO``
+(caso do botão de download do dashboard, que entrega os bytes inteiros ao
+Streamlit), inteiro na memória. O Excel usa o modo ``write_only`` do
+openpyxl, que não mantém as células na memória.
+"""
+from typing import BinaryIO
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 50_000
+# Limite de nome de aba do Excel
+_SHEET_NAME_MAX = 31
+
+# formato: (rótulo, extensão, mime)
+EXPORT_FORMATS = {
+    "csv": ("CSV", ".csv", "text/csv"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    "xlsx": ("Excel", ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def _chunks(df: pd.DataFrame, chunk_rows: int):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start: start + chunk_rows]
+
+
+def write_csv(df: pd.DataFrame, out: BinaryIO, chunk_rows: int = CHUNK_ROWS, sep: str = ";", decimal: str = ",") -> None:
+    """CSV no padrão brasileiro (``;`` e vírgula decimal, UTF-8 com BOM), igual a ``df.to_csv`` de uma vez."""
+    out.write("\ufeff".encode("utf-8"))
+    for i, chunk in enumerate(_chunks(df, chunk_rows)):
+        out.write(chunk.to_csv(index=False, header=i == 0, sep=sep, decimal=decimal).encode("utf-8"))
+
+
+def write_parquet(df: pd.DataFrame, out: BinaryIO, chunk_rows: int = CHUNK_ROWS) -> None:
+    """Um row group por fatia; categóricos continuam como dicionário."""
+    writer = None
+    try:
+        for chunk in _chunks(df, chunk_rows):
+            table = pa.Table.from_pandas(chunk, preserve_index=False, schema=writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _cell_rows(chunk: pd.DataFrame):
+    # Tipos Python para o openpyxl; NaN/NA viram célula vazia.
+    columns = []
+    for col in chunk.columns:
+        values = chunk[col].to_numpy(dtype=object, na_value=None)
+        if pd.api.types.is_float_dtype(chunk[col].dtype):
+            values = [None if v is None or v != v else float(v) for v in values]
+        elif pd.api.types.is_integer_dtype(chunk[col].dtype):
+            values = [None if v is None else int(v) for v in values]
+        columns.append(values)
+    return zip(*columns)
+
+
+def write_xlsx(sheets: dict, out: BinaryIO, chunk_rows: int = CHUNK_ROWS) -> None:
+    """Uma aba por item de ``sheets`` ({nome: DataFrame}), no modo de memória constante do openpyxl."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for name, df in sheets.items():
+        ws = wb.create_sheet(title=str(name)[:_SHEET_NAME_MAX])
+        ws.append([str(c) for c in df.columns])
+        for chunk in _chunks(df, chunk_rows):
+            for row in _cell_rows(chunk):
+                ws.append(row)
+    wb.save(out)
+
+
+def write_frame(df: pd.DataFrame, out: BinaryIO, fmt: str, sheet_name: str = "Base") -> None:
+    if fmt == "csv":
+        write_csv(df, out)
+    elif fmt == "parquet":
+        write_parquet(df, out)
+    elif fmt == "xlsx":
+        write_xlsx({sheet_name: df}, out)
+    else:
+        raise ValueError(f"formato de exportação inválido: {fmt!r} (use um de {tuple(EXPORT_FORMATS)})")
+
+
+def summary_frame(values: dict, label: str = "Indicador", value: str = "Valor") -> pd.DataFrame:
+    """Dicionário {rótulo: valor} como tabela de duas colunas (aba de resumo)."""
+    return pd.DataFrame({label: list(values), value: list(values.values())})
+
@@ -0,0 +1,189 @@
+"""Índices pré-calculados sobre o dataset classificado.
+
+Montados uma vez por dataset (e memorizados pelo dashboard), respondem às
+consultas dos filtros e KPIs sem varrer o DataFrame a cada rerun.
+"""
+import unicodedata
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Folga para "% acumulado <= limite" não perder a linha que fecha exatamente no limite.
+THRESHOLD_EPS = 1e-9
+
+
+@dataclass
+class CumulativeIndex:
+    """Somas prefixadas da quantidade, na ordem crescente de ``% acumulado``.
+
+    "Produtos até X%" e "quantidade até X%" viram uma busca binária em
+    ``pct_acumulado`` e uma leitura em ``prefix_quantidade``.
+    """
+
+    pct_acumulado: np.ndarray
+    prefix_quantidade: np.ndarray
+    total_quantidade: float
+    n_quantidade: int
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, col_quantidade: str, col_acumulado: str) -> "CumulativeIndex":
+        acum = df[col_acumulado].to_numpy(dtype=float, na_value=np.nan)
+        qtd = df[col_quantidade].to_numpy(dtype=float, na_value=np.nan)
+        # Empates em "% acumulado" entram ou saem juntos da busca, então a ordem entre eles não importa.
+        order = np.argsort(acum)
+        qtd_sorted = np.nan_to_num(qtd[order], nan=0.0)
+        prefix = np.zeros(len(order) + 1)
+        np.cumsum(qtd_sorted, out=prefix[1:])
+        return cls(
+            pct_acumulado=acum[order],
+            prefix_quantidade=prefix,
+            total_quantidade=float(np.nansum(qtd)),
+            n_quantidade=int(np.count_nonzero(~np.isnan(qtd))),
+        )
+
+    def up_to(self, threshold: float) -> tuple[int, float]:
+        """(produtos, quantidade) com ``% acumulado <= threshold``; 100% ou mais é a base toda."""
+        if threshold >= 100:
+            return self.n_quantidade, self.total_quantidade
+        # NaN ficam no fim da ordenação e nunca entram na contagem.
+        count = int(np.searchsorted(self.pct_acumulado, threshold + THRESHOLD_EPS, side="right"))
+        return count, float(self.prefix_quantidade[count])
+
+
+@dataclass
+class PartitionIndex:
+    """Posições das linhas agrupadas por tipo de item e por (tipo, classe ABC).
+
+    Montado uma vez por dataset. Filtrar custa O(tamanho do resultado) e as
+    contagens, O(1) (matriz ``counts``). Dentro de cada grupo as posições
+    ficam na ordem original das linhas.
+    """
+
+    tipos: list
+    classes: tuple
+    counts: np.ndarray  # (tipo, classe); a última coluna conta linhas sem classe
+    by_tipo: np.ndarray
+    tipo_starts: np.ndarray
+    by_group: np.ndarray
+    group_starts: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, col_tipo: str, col_classe: str, classes=("A", "B", "C")) -> "PartitionIndex":
+        tipo = df[col_tipo]
+        tipo_cat = tipo.array if isinstance(tipo.dtype, pd.CategoricalDtype) else pd.Categorical(tipo)
+        tipos = [str(t) for t in tipo_cat.categories]
+        n_tipos = len(tipos) + 1  # +1: tipo vazio (NaN)
+        tipo_codes = np.where(tipo_cat.codes < 0, n_tipos - 1, tipo_cat.codes).astype(np.int64)
+
+        classe = df[col_classe]
+        if isinstance(classe.dtype, pd.CategoricalDtype) and tuple(classe.cat.categories) == tuple(classes):
+            class_codes = classe.cat.codes.to_numpy()
+        else:
+            class_codes = pd.Categorical(classe, categories=classes).codes
+        n_slots = len(classes) + 1  # +1: sem classe
+        class_codes = np.where(class_codes < 0, n_slots - 1, class_codes).astype(np.int64)
+
+        group = tipo_codes * n_slots + class_codes
+        # Chaves pequenas: o sort estável do numpy vira radix sort.
+        key_dtype = np.int16 if n_tipos * n_slots < np.iinfo(np.int16).max else np.int32
+        counts = np.bincount(group, minlength=n_tipos * n_slots).reshape(n_tipos, n_slots)
+        return cls(
+            tipos=tipos,
+            classes=tuple(classes),
+            counts=counts,
+            by_tipo=np.argsort(tipo_codes.astype(key_dtype), kind="stable"),
+            tipo_starts=np.concatenate(([0], np.cumsum(counts.sum(axis=1)))),
+            by_group=np.argsort(group.astype(key_dtype), kind="stable"),
+            group_starts=np.concatenate(([0], np.cumsum(counts.ravel()))),
+        )
+
+    def _tipo_code(self, tipo: str | None) -> int | None:
+        if tipo is None:
+            return None
+        try:
+            return self.tipos.index(str(tipo))
+        except ValueError:
+            return -1
+
+    def class_counts(self, tipo: str | None = None) -> dict:
+        """Linhas por classe; ``tipo=None`` conta a base toda."""
+        code = self._tipo_code(tipo)
+        if code == -1:
+            row = np.zeros(self.counts.shape[1], dtype=np.int64)
+        else:
+            row = self.counts.sum(axis=0) if code is None else self.counts[code]
+        return {c: int(row[i]) for i, c in enumerate(self.classes)}
+
+    def count(self, tipo: str | None = None) -> int:
+        code = self._tipo_code(tipo)
+        if code == -1:
+            return 0
+        return int(self.counts.sum() if code is None else self.counts[code].sum())
+
+    def rows(self, tipo: str | None = None, classes=None) -> np.ndarray | None:
+        """Posições das linhas do tipo/classes pedidos; ``None`` quando é a base toda."""
+        code = self._tipo_code(tipo)
+        if code == -1:
+            return np.zeros(0, dtype=np.int64)
+        if classes is None:
+            if code is None:
+                return None
+            return self.by_tipo[self.tipo_starts[code]: self.tipo_starts[code + 1]]
+        # Com filtro de classe os blocos vêm classe a classe (ordem original dentro de cada uma).
+        tipo_range = range(self.counts.shape[0]) if code is None else [code]
+        return self._classes_rows(tipo_range, classes)
+
+    def select(self, df: pd.DataFrame, tipo: str | None = None, classes=None) -> pd.DataFrame:
+        """``df`` restrito ao tipo/classes; a base toda volta sem cópia."""
+        positions = self.rows(tipo, classes)
+        return df if positions is None else df.take(positions)
+
+    def _classes_rows(self, tipo_codes, classes) -> np.ndarray:
+        n_slots = self.counts.shape[1]
+        slots = [self.classes.index(c) for c in classes if c in self.classes]
+        blocks = [
+            self.by_group[self.group_starts[t * n_slots + s]: self.group_starts[t * n_slots + s + 1]]
+            for t in tipo_codes
+            for s in slots
+        ]
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int64)
+
+
+def _fold_text(text: str) -> str:
+    # Mesma normalização das chaves do índice: minúsculas e sem acentos.
+    decomposed = unicodedata.normalize("NFD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+@dataclass
+class NameSearchIndex:
+    """Nomes normalizados (minúsculas, sem acento) num array Arrow contíguo.
+
+    Montado uma vez por ranking; cada busca é uma varredura vetorizada em C
+    (``match_substring``), sem laço Python por linha. Várias palavras na
+    busca precisam aparecer todas, em qualquer ordem.
+    """
+
+    keys: pa.Array
+
+    @classmethod
+    def from_series(cls, names: pd.Series) -> "NameSearchIndex":
+        arr = pa.array(names.astype(pd.StringDtype("pyarrow")).array).cast(pa.large_string())
+        if isinstance(arr, pa.ChunkedArray):
+            arr = arr.combine_chunks()
+        keys = pc.utf8_lower(pc.utf8_normalize(arr, "NFD"))
+        keys = pc.replace_substring_regex(keys, pattern=r"\p{Mn}", replacement="")
+        return cls(keys=keys)
+
+    def search(self, query: str) -> np.ndarray:
+        """Posições (crescentes) cujo nome contém todas as palavras de ``query``."""
+        mask = None
+        for word in _fold_text(query).split():
+            hit = pc.fill_null(pc.match_substring(self.keys, pattern=word), False)
+            mask = hit if mask is None else pc.and_(mask, hit)
+        if mask is None:
+            return np.arange(len(self.keys))
+        return np.flatnonzero(mask.to_numpy(zero_copy_only=False))
@@ -0,0 +1,159 @@
+"""Layout compacto do DataFrame e relatório de memória.
+
+Textos repetidos (tipo, classe) viram categóricos: um código inteiro por
+linha mais um dicionário com cada texto uma única vez; textos quase todos
+distintos (descrição) viram strings Arrow, num buffer contíguo. Colunas
+numéricas só são reduzidas quando a conversão é exata (ex.: quantidades
+inteiras cabem em int32), para não mudar nenhum total exibido.
+"""
+import sys
+from dataclasses import fields, is_dataclass
+
+import numpy as np
+import pandas as pd
+
+# Acima dessa proporção de textos distintos o dicionário do categórico não
+# compensa (ex.: descrições, quase uma por linha); usa-se string Arrow.
+_MAX_UNIQUE_RATIO = 0.5
+_POINTER_BYTES = 8
+# sys.getsizeof("") de uma str ASCII do CPython
+_PY_STR_OVERHEAD = sys.getsizeof("")
+# ArrowExtensionArray e NumpyExtensionArray (antigo PandasArray) só existem
+# com esses nomes no pandas >= 2.1; ArrowStringArray cobre as versões anteriores.
+_ARROW_ARRAYS = tuple(
+    cls for cls in (getattr(pd.arrays, "ArrowExtensionArray", None), getattr(pd.arrays, "ArrowStringArray", None))
+    if cls is not None
+)
+_NUMPY_ARRAYS = (np.ndarray, getattr(pd.arrays, "NumpyExtensionArray", None) or pd.arrays.PandasArray)
+
+
+def _is_arrow_string(dtype) -> bool:
+    return isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow"
+
+
+def _compact_text(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if series.nunique(dropna=True) <= max(1, len(series) * _MAX_UNIQUE_RATIO):
+        return series.astype("category")
+    if _is_arrow_string(series.dtype):
+        return series
+    return series.astype(pd.StringDtype("pyarrow"))
+
+
+def _downcast_exact(series: pd.Series) -> pd.Series:
+    if not pd.api.types.is_float_dtype(series.dtype) or series.isna().any():
+        return series
+    values = series.to_numpy()
+    info = np.iinfo(np.int32)
+    if len(values) and np.all(np.mod(values, 1) == 0) and values.min() >= info.min and values.max() <= info.max:
+        return series.astype(np.int32)
+    return series
+
+
+def compact_frame(df: pd.DataFrame, text_columns: list[str], integer_columns: list[str] = ()) -> pd.DataFrame:
+    """Textos compactos e, em ``integer_columns``, float → int32 quando todos os valores são inteiros."""
+    converted = {}
+    for col in text_columns:
+        if col in df.columns:
+            converted[col] = _compact_text(df[col])
+    for col in integer_columns:
+        if col in df.columns:
+            converted[col] = _downcast_exact(df[col])
+    changed = {k: v for k, v in converted.items() if v is not df[k]}
+    return df.assign(**changed) if changed else df
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _column_object_nbytes(series: pd.Series) -> int:
+    # Custo estimado da mesma coluna como strings Python (objeto) ou float64.
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        sizes = np.fromiter((sys.getsizeof(c) for c in series.cat.categories), dtype=np.int64, count=len(series.cat.categories))
+        codes = series.cat.codes.to_numpy()
+        return int(sizes[codes[codes >= 0]].sum()) + _POINTER_BYTES * len(series)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return 8 * len(series)
+    if _is_arrow_string(series.dtype):
+        text_bytes = int(series.str.len().sum())
+        return text_bytes + (_PY_STR_OVERHEAD + _POINTER_BYTES) * int(series.notna().sum())
+    return int(series.memory_usage(index=False, deep=True))
+
+
+def memory_table(df: pd.DataFrame) -> pd.DataFrame:
+    """Bytes por coluna no layout atual e no layout "objeto + float64" de antes."""
+    rows = [
+        (col, str(df[col].dtype), _column_object_nbytes(df[col]), int(df[col].memory_usage(index=False, deep=True)))
+        for col in df.columns
+    ]
+    index_bytes = int(df.index.memory_usage(deep=True))
+    rows.append(("(índice)", str(df.index.dtype), index_bytes, index_bytes))
+    return pd.DataFrame(rows, columns=["coluna", "dtype", "bytes_antes", "bytes_agora"])
+
+
+def _array_buffers(values):
+    # (endereço, bytes) da memória de um array: views e cópias rasas (copy-on-write)
+    # apontam para os mesmos buffers e não contam duas vezes.
+    if isinstance(values, (pd.Series, pd.Index)):
+        if isinstance(values, pd.RangeIndex):
+            # Sem buffer: cada coluna lida do DataFrame traz um RangeIndex novo e igual.
+            yield (("range", values.start, values.stop, values.step), int(values.memory_usage()))
+            return
+        values = values.array
+    if isinstance(values, pd.Categorical):
+        yield from _array_buffers(values.codes)
+        yield from _array_buffers(values.categories)
+    elif isinstance(values, _ARROW_ARRAYS):
+        for chunk in values.__arrow_array__().chunks:
+            yield from ((b.address, b.size) for b in chunk.buffers() if b is not None)
+    elif isinstance(values, _NUMPY_ARRAYS):
+        array = np.asarray(values)
+        while isinstance(array.base, np.ndarray):
+            array = array.base
+        if array.dtype == object:
+            yield (array.__array_interface__["data"][0], int(pd.Series(array.ravel(), copy=False).memory_usage(index=False, deep=True)))
+        else:
+            yield (array.__array_interface__["data"][0], array.nbytes)
+    else:
+        yield (id(values), int(values.nbytes))
+
+
+def _reachable_buffers(values):
+    seen = set()
+    stack = list(values)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, pd.DataFrame):
+            stack.append(obj.index)
+            stack.extend(obj[col] for col in obj.columns)
+        elif isinstance(obj, pd.Series):
+            yield from _array_buffers(obj)
+            stack.append(obj.index)
+        elif isinstance(obj, (pd.Index, np.ndarray, pd.Categorical)):
+            yield from _array_buffers(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif is_dataclass(obj) and not isinstance(obj, type):
+            stack.extend(getattr(obj, f.name) for f in fields(obj))
+
+
+def retained_nbytes(values, exclude=()) -> int:
+    """Bytes dos DataFrames/Series/arrays alcançáveis em ``values``, cada buffer de memória uma vez.
+
+    Buffers também alcançáveis em ``exclude`` (ex.: bases compartilhadas entre
+    sessões) ficam de fora.
+    """
+    counted = {address for address, _ in _reachable_buffers(exclude)}
+    total = 0
+    for address, nbytes in _reachable_buffers(values):
+        if address not in counted:
+            counted.add(address)
+            total += nbytes
+    return total
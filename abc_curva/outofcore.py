@@ -0,0 +1,334 @@
+"""Classificação ABC fora da memória, em blocos, para bases maiores que a RAM.
+
+A curva pede a ordenação global por quantidade; aqui ela é trocada por
+passadas sobre a entrada (``chunks``: função que devolve um iterador novo
+de DataFrames a cada chamada):
+
+1. Total e histograma das quantidades positivas. Os grupos do histograma
+   são os bits mais altos do float64 (expoente e início da mantissa), que
+   seguem a ordem dos números: somando os grupos do maior para o menor,
+   acha-se o grupo onde cada corte (80%, 95%) é atingido.
+2. Refinamento: os valores distintos desses grupos, com contagem e soma,
+   dão a quantidade exata do ponto de corte. Grupos maiores que o limite
+   de memória são divididos em grupos menores numa passada a mais.
+3. Classificação: cada bloco é lido de novo e classificado comparando a
+   quantidade com os pontos de corte; os empates na quantidade do corte
+   entram pela ordem original das linhas (contagem corrida entre blocos).
+
+As classes são as de ``classify`` (mesma regra de corte e de empates).
+Única diferença possível: o acumulado antes do grupo do corte é somado por
+grupo, não linha a linha; quando o ``cumsum`` do motor em memória cai a um
+arredondamento do corte (94,99999999999999 em vez de 95), o corte pode sair
+uma linha adiante lá. O limite de memória (``memory_mb``) define o tamanho
+dos blocos e quantos valores distintos o refinamento guarda.
+"""
+import math
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .classify import CLASSES, DEFAULT_CUTS
+from .pipeline import ANALYSIS_TYPES, COL_CLASSE, DatasetError, detect_analysis_type, detect_input_format
+from .readers import find_col, iter_chunks
+
+OUT_OF_CORE_MEMORY_MB = 256
+# Estimativas para dividir a memória: bytes por linha de um bloco (textos e
+# números no pandas) e por valor distinto guardado no refinamento.
+_ROW_BYTES = 512
+_VALUE_BYTES = 64
+# Bits da mantissa nos grupos do histograma: 2**7 grupos por potência de 2.
+_HISTOGRAM_MANTISSA_BITS = 7
+# Cada passada de divisão de um grupo grande ganha 2**16 vezes em resolução.
+_REFINE_BITS = 16
+_MANTISSA_BITS = 52
+# Empates somados por vez ao procurar a linha do corte
+_TIE_BLOCK = 1_000_000
+
+
+@dataclass
+class CutPoint:
+    """Ponto de corte de uma classe: linhas acima de ``value`` e as ``take`` primeiras iguais a ele.
+
+    ``value=None``: o corte não é atingido (acumulado abaixo do corte até o
+    fim) e todas as linhas com quantidade entram.
+    """
+
+    cut: float
+    value: float | None = None
+    count_above: int = 0
+    take: int = 0
+
+
+@dataclass
+class OutOfCoreResult:
+    col_quantidade: str
+    rows: int
+    total: float
+    cut_points: list
+    class_counts: dict
+    passes: int
+    chunk_rows: int
+    output: Path | None = None
+    # Linhas sem quantidade (ficam sem classe)
+    missing: int = 0
+
+
+def memory_budget(memory_mb: float) -> tuple[int, int]:
+    """(linhas por bloco, valores distintos no refinamento) para ``memory_mb`` de memória de trabalho."""
+    budget = int(memory_mb * 1024 ** 2) // 2
+    return max(1_000, budget // _ROW_BYTES), max(1_000, budget // _VALUE_BYTES)
+
+
+def _quantities(chunk: pd.DataFrame, col_quantidade: str) -> np.ndarray:
+    return chunk[col_quantidade].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _bin_keys(q: np.ndarray, shift: int) -> np.ndarray:
+    # Positivos: a ordem dos bits do float64 é a ordem dos números.
+    return q.view(np.int64) >> shift
+
+
+def _accumulate(acc: dict, keys: np.ndarray, q: np.ndarray) -> None:
+    # acc[chave] = [linhas, soma]; agrupamento vetorizado por bloco.
+    if not len(keys):
+        return
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse)
+    sums = np.bincount(inverse, weights=q)
+    for key, count, total in zip(unique.tolist(), counts.tolist(), sums.tolist()):
+        slot = acc.setdefault(key, [0, 0.0])
+        slot[0] += count
+        slot[1] += total
+
+
+def _scan(chunks, col_quantidade: str, shift: int) -> tuple[int, int, float, dict]:
+    # Primeira passada: linhas, linhas sem quantidade, total e histograma dos positivos.
+    rows = missing = 0
+    totals = []
+    histogram = {}
+    for chunk in chunks():
+        q = _quantities(chunk, col_quantidade)
+        rows += len(q)
+        valid = q[~np.isnan(q)]
+        missing += len(q) - len(valid)
+        totals.append(valid.sum())
+        positive = valid[valid > 0]
+        _accumulate(histogram, _bin_keys(positive, shift), positive)
+    return rows, missing, math.fsum(totals), histogram
+
+
+@dataclass
+class _Band:
+    # Grupo de valores (chaves com ``shift`` bits a menos) onde um corte é atingido.
+    cut: CutPoint
+    key: int
+    shift: int
+    sum_above: float
+    rows: int
+
+
+def _locate(cut: CutPoint, groups: dict, total: float, sum_above: float, shift: int,
+            in_band: bool = False) -> _Band | None:
+    """Percorre ``groups`` do maior para o menor até o corte; preenche ``cut`` quando os grupos são valores."""
+    keys = sorted(groups, reverse=True)
+    if shift == 0:
+        _resolve_values(cut, [(float(np.int64(k).view(np.float64)), groups[k][0]) for k in keys], total, sum_above)
+        return None
+    for i, key in enumerate(keys):
+        count, group_sum = groups[key]
+        # Dentro de um grupo já localizado (``in_band``) o corte está nele: o último
+        # subgrupo fecha mesmo que a soma em outra ordem fique um arredondamento abaixo.
+        if (in_band and i == len(keys) - 1) or (sum_above + group_sum) / total * 100 >= cut.cut:
+            return _Band(cut, key, shift, sum_above, count)
+        sum_above += group_sum
+        cut.count_above += count
+    # Não atingido: todas as linhas com quantidade entram (como o último índice no motor em memória).
+    cut.value = None
+    return None
+
+
+def _resolve_values(cut: CutPoint, values: list, total: float, sum_above: float) -> None:
+    """Acha o valor do corte e quantos empates nele (na ordem original) entram.
+
+    O acumulado soma ``quantidade / total * 100`` linha a linha, como o
+    ``cumsum`` do motor em memória: em blocos grandes de empates o
+    arredondamento da soma repetida decide a mesma linha de corte.
+    """
+    acum = sum_above / total * 100
+    for i, (value, count) in enumerate(values):
+        term = value / total * 100
+        for start in range(0, count, _TIE_BLOCK):
+            n = min(_TIE_BLOCK, count - start)
+            steps = np.cumsum(np.concatenate(([acum], np.full(n, term))))[1:]
+            hit = np.flatnonzero(steps >= cut.cut)
+            if len(hit):
+                cut.value, cut.take = value, start + int(hit[0]) + 1
+                return
+            acum = steps[-1]
+        if i == len(values) - 1:
+            # Último valor do grupo localizado: o corte fecha nele.
+            cut.value, cut.take = value, count
+            return
+        cut.count_above += count
+
+
+def _refine(chunks, col_quantidade: str, bands: list, total: float, max_values: int) -> list:
+    """Uma passada sobre os grupos de ``bands``; devolve os que ainda precisam de outra."""
+    # Grupos pequenos: valores exatos (shift 0); grandes: grupos 2**_REFINE_BITS vezes mais finos.
+    targets = [max(0, b.shift - _REFINE_BITS) if b.rows > max_values else 0 for b in bands]
+    found = [{} for _ in bands]
+    for chunk in chunks():
+        q = _quantities(chunk, col_quantidade)
+        q = q[q > 0]
+        keys = q.view(np.int64)
+        for band, target, acc in zip(bands, targets, found):
+            inside = (keys >> band.shift) == band.key
+            _accumulate(acc, keys[inside] >> target, q[inside])
+    pending = []
+    for band, target, acc in zip(bands, targets, found):
+        narrower = _locate(band.cut, acc, total, band.sum_above, target, in_band=True)
+        if narrower is not None:
+            pending.append(narrower)
+    return pending
+
+
+def find_cut_points(chunks, col_quantidade: str, cuts=DEFAULT_CUTS, max_values: int = 1_000_000) -> tuple[list, dict]:
+    """Pontos de corte exatos em passadas sobre ``chunks``; devolve também o resumo da leitura."""
+    shift = _MANTISSA_BITS - _HISTOGRAM_MANTISSA_BITS
+    rows, missing, total, histogram = _scan(chunks, col_quantidade, shift)
+    passes = 1
+    cut_points = [CutPoint(float(c)) for c in cuts]
+    if rows - missing and total > 0:
+        bands = [b for b in (_locate(c, histogram, total, 0.0, shift) for c in cut_points) if b is not None]
+        while bands:
+            bands = _refine(chunks, col_quantidade, bands, total, max_values)
+            passes += 1
+    return cut_points, {"rows": rows, "missing": missing, "total": total, "passes": passes}
+
+
+def classify_chunk(q: np.ndarray, cut_points: list, tie_seen: list) -> np.ndarray:
+    """Códigos de classe (0=A, ... -1=sem quantidade) de um bloco; ``tie_seen`` conta os empates já vistos."""
+    valid = ~np.isnan(q)
+    within = np.zeros(len(q), dtype=np.int8)
+    for i, cut in enumerate(cut_points):
+        if cut.value is None:
+            within += valid
+            continue
+        tied = q == cut.value
+        # Posição de cada empate entre todos os empates do arquivo, na ordem original.
+        rank = tie_seen[i] + np.cumsum(tied) - 1
+        within += (q > cut.value) | (tied & (rank < cut.take))
+        tie_seen[i] += int(np.count_nonzero(tied))
+    codes = (len(cut_points) - within).astype(np.int8)
+    codes[~valid] = -1
+    return codes
+
+
+class _Writer:
+    # Saída em blocos: Parquet (um row group por bloco) ou CSV pt-BR.
+    def __init__(self, path: Path):
+        self.path = path
+        self.format = detect_input_format(path.name)
+        if self.format not in ("csv", "parquet"):
+            raise ValueError(f"saída em blocos só em .csv ou .parquet, não {path.suffix!r}")
+        self._out = open(path, "wb")
+        self._parquet = None
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self.format == "parquet":
+            table = pa.Table.from_pandas(chunk, preserve_index=False, schema=self._parquet.schema if self._parquet else None)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self._out, table.schema)
+            self._parquet.write_table(table)
+        else:
+            first = self._out.tell() == 0
+            if first:
+                self._out.write("\ufeff".encode("utf-8"))
+            self._out.write(chunk.to_csv(index=False, header=first, sep=";", decimal=",").encode("utf-8"))
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        self._out.close()
+
+
+def classify_out_of_core(chunks, col_quantidade: str, output: Path | str | None = None, cuts=DEFAULT_CUTS,
+                         memory_mb: float = OUT_OF_CORE_MEMORY_MB) -> OutOfCoreResult:
+    """Classifica a base de ``chunks`` (função → iterador de DataFrames) sem carregá-la inteira.
+
+    Com ``output`` (.parquet ou .csv), cada bloco é gravado com a coluna de
+    classe acrescentada, na ordem da entrada.
+    """
+    _, max_values = memory_budget(memory_mb)
+    cut_points, summary = find_cut_points(chunks, col_quantidade, cuts, max_values)
+    counts = np.zeros(len(cuts) + 2, dtype=np.int64)  # classes e sem classe
+    tie_seen = [0] * len(cut_points)
+    classify = summary["rows"] - summary["missing"] > 0 and summary["total"] > 0
+    writer = _Writer(Path(output)) if output is not None else None
+    chunk_rows = 0
+    try:
+        for chunk in chunks():
+            chunk_rows = max(chunk_rows, len(chunk))
+            q = _quantities(chunk, col_quantidade)
+            if classify:
+                codes = classify_chunk(q, cut_points, tie_seen)
+            else:
+                codes = np.full(len(q), -1, dtype=np.int8)
+            counts += np.bincount(np.where(codes < 0, len(cuts) + 1, codes), minlength=len(cuts) + 2)
+            if writer is not None:
+                writer.write(chunk.assign(**{COL_CLASSE: pd.Categorical.from_codes(codes, categories=CLASSES)}))
+    finally:
+        if writer is not None:
+            writer.close()
+    return OutOfCoreResult(
+        col_quantidade=col_quantidade,
+        rows=summary["rows"],
+        total=summary["total"],
+        cut_points=cut_points,
+        class_counts={c: int(n) for c, n in zip(CLASSES, counts)},
+        passes=summary["passes"] + 1,
+        chunk_rows=chunk_rows,
+        output=Path(output) if output is not None else None,
+        missing=summary["missing"],
+    )
+
+
+def _file_quantity_column(path: Path, input_format: str, analysis_type: str | None, col_quantidade: str | None,
+                          locale: str) -> str:
+    if col_quantidade is None:
+        analysis_type = analysis_type or detect_analysis_type(path.name)
+        if analysis_type not in ANALYSIS_TYPES:
+            raise DatasetError(f"Selecione o tipo de análise: {list(ANALYSIS_TYPES)}")
+        col_quantidade = ANALYSIS_TYPES[analysis_type]
+    header = next(iter_chunks(path, input_format, [], locale=locale, batch_size=1), pd.DataFrame())
+    found = find_col(header, col_quantidade)
+    if found is None:
+        raise DatasetError(f"Coluna '{col_quantidade}' não encontrada no arquivo", found_columns=list(header.columns))
+    return found
+
+
+def classify_file_out_of_core(path: Path | str, output: Path | str | None = None, analysis_type: str | None = None,
+                              col_quantidade: str | None = None, cuts=DEFAULT_CUTS, locale: str = "pt-BR",
+                              memory_mb: float = OUT_OF_CORE_MEMORY_MB) -> OutOfCoreResult:
+    """``classify_out_of_core`` de um CSV ou Parquet, lido em blocos do tamanho permitido por ``memory_mb``.
+
+    A coluna de quantidade vem de ``col_quantidade`` ou do tipo de análise
+    (informado ou deduzido do nome do arquivo).
+    """
+    path = Path(path)
+    input_format = detect_input_format(path.name)
+    if input_format not in ("csv", "parquet"):
+        # Uma aba do Excel tem no máximo ~1 milhão de linhas: cabe no motor em memória.
+        raise DatasetError(f"Classificação em blocos só para .csv ou .parquet: '{path.name}'")
+    col_quantidade = _file_quantity_column(path, input_format, analysis_type, col_quantidade, locale)
+    chunk_rows, _ = memory_budget(memory_mb)
+
+    def chunks():
+        return iter_chunks(path, input_format, [col_quantidade], locale=locale, batch_size=chunk_rows)
+
+    return classify_out_of_core(chunks, col_quantidade, output, cuts=cuts, memory_mb=memory_mb)
+
@@ -0,0 +1,169 @@
+"""Parser colunar de números escritos como texto (pt-BR, en-US ou automático).
+
+Em vez de encadear vários ``str.replace`` sobre a coluna inteira, o parser
+percorre os bytes UTF-8 da coluna (buffer Arrow, alinhado em largura fixa) uma
+única vez, um caractere de todas as linhas por vez: dígitos viram mantissa
+inteira, o separador decimal define a escala e o sinal vem do ``-`` inicial.
+Com ``locale="pt-BR"`` o resultado é o mesmo do antigo ``to_number_ptbr``:
+
+- caracteres fora de ``0-9 , . -`` são descartados (``%``, espaços, NBSP, letras);
+- se a linha tem vírgula, ela é o separador decimal e os pontos são milhar;
+- sem vírgula, o ponto é o separador decimal;
+- qualquer coisa que não forme um número (``1.2.3``, ``1-2``, vazio) vira NaN.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+LOCALES = ("pt-BR", "en-US", "auto")
+
+_SAMPLE_SIZE = 512
+# Textos mais longos que isso (raros em colunas numéricas) são convertidos um a um.
+_MAX_WIDTH = 32
+# Mantissas com até 15 dígitos cabem exatas em float64; dividir por uma
+# potência de 10 exata dá o mesmo arredondamento de ``float(texto)``.
+_MAX_EXACT_DIGITS = 15
+_POW10 = 10.0 ** np.arange(_MAX_EXACT_DIGITS + 1)
+
+_DIGIT_0, _COMMA, _DOT, _MINUS = ord("0"), ord(","), ord("."), ord("-")
+
+_clean_bytes = np.zeros(256, dtype=bool)
+_clean_bytes[[*range(_DIGIT_0, _DIGIT_0 + 10), _DOT, _MINUS]] = True
+
+
+def _to_arrow_strings(series: pd.Series) -> pa.Array:
+    if pd.api.types.infer_dtype(series, skipna=True) not in ("string", "empty"):
+        # Colunas mistas (números e textos no mesmo campo): vale o str() de cada célula.
+        series = series.astype(str)
+    arr = pa.array(series, from_pandas=True)
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    if arr.type != pa.large_string():
+        arr = arr.cast(pa.large_string())
+    return arr
+
+
+def _arrow_buffers(arr: pa.Array) -> tuple[np.ndarray, np.ndarray]:
+    n = len(arr)
+    offsets = np.frombuffer(arr.buffers()[1], dtype=np.int64)[arr.offset: arr.offset + n + 1]
+    data_buf = arr.buffers()[2]
+    data = np.frombuffer(data_buf, dtype=np.uint8) if data_buf is not None else np.zeros(0, dtype=np.uint8)
+    data = data[offsets[0]: offsets[-1]]
+    return data, offsets - offsets[0]
+
+
+def _detect_locale(arr: pa.Array) -> str:
+    # Amostra: quando vírgula e ponto aparecem juntos, o último é o decimal.
+    sample = [s for s in arr[:_SAMPLE_SIZE].to_pylist() if s]
+    votes_en = sum(1 for s in sample if "," in s and "." in s and s.rfind(".") > s.rfind(","))
+    votes_pt = sum(1 for s in sample if "," in s and "." in s and s.rfind(",") > s.rfind("."))
+    return "en-US" if votes_en > votes_pt else "pt-BR"
+
+
+def _parse_padded(arr: pa.Array, locale: str) -> np.ndarray:
+    n = len(arr)
+    lengths = pc.binary_length(arr)
+    too_long = pc.fill_null(pc.greater(lengths, _MAX_WIDTH), False)
+    long_rows = np.flatnonzero(too_long.to_numpy(zero_copy_only=False))
+    if len(long_rows):
+        arr_fixed = pc.if_else(too_long, pa.scalar("", pa.large_string()), arr)
+    else:
+        arr_fixed = arr
+    width = min(pc.max(lengths).as_py() or 0, _MAX_WIDTH)
+    padded = pc.ascii_rpad(pc.fill_null(arr_fixed, ""), width)
+    data, _ = _arrow_buffers(padded)
+    # Matriz (largura, linhas): cada iteração do laço abaixo processa um
+    # caractere de todas as linhas de uma vez.
+    chars = np.ascontiguousarray(data.reshape(n, width).T)
+
+    if locale == "pt-BR":
+        # Com vírgula na linha: vírgula decimal, pontos de milhar. Sem vírgula: ponto decimal.
+        dot_is_decimal = ~(chars == _COMMA).any(axis=0)
+        comma_is_decimal = True
+    else:
+        dot_is_decimal = True
+        comma_is_decimal = False
+
+    mantissa = np.zeros(n)
+    n_digits = np.zeros(n, dtype=np.int16)
+    frac_digits = np.zeros(n, dtype=np.int16)
+    n_sep = np.zeros(n, dtype=np.int16)
+    n_minus = np.zeros(n, dtype=np.int16)
+    seen_sep = np.zeros(n, dtype=bool)
+    bad_minus = np.zeros(n, dtype=bool)
+
+    for col in chars:
+        digit = col - _DIGIT_0
+        is_digit = digit < 10
+        # Horner: mantissa = mantissa * 10 + dígito (só onde há dígito)
+        mult = is_digit * 9.0
+        mult += 1.0
+        mantissa *= mult
+        mantissa += digit * is_digit
+        n_digits += is_digit
+        frac_digits += is_digit & seen_sep
+
+        is_sep = (col == _DOT) & dot_is_decimal
+        if comma_is_decimal:
+            is_sep |= col == _COMMA
+        n_sep += is_sep
+
+        # O "-" só é válido como primeiro caractere mantido (dígitos e separador decimal).
+        is_minus = col == _MINUS
+        bad_minus |= is_minus & ((n_digits > 0) | seen_sep | (n_minus > 0))
+        n_minus += is_minus
+        seen_sep |= is_sep
+
+    values = mantissa / _POW10[np.minimum(frac_digits, _MAX_EXACT_DIGITS)]
+    np.negative(values, out=values, where=n_minus > 0)
+    valid = (n_digits > 0) & (n_sep <= 1) & ~bad_minus
+    values[~valid] = np.nan
+
+    slow_rows = np.union1d(long_rows, np.flatnonzero(valid & (n_digits > _MAX_EXACT_DIGITS)))
+    if len(slow_rows):
+        # Mesmo conversor do antigo ``to_number_ptbr`` (``pd.to_numeric``), que
+        # não arredonda como ``float()`` além de 15 dígitos.
+        texts = pd.Series([_clean_one(arr[int(r)].as_py(), locale) for r in slow_rows], dtype=object)
+        values[slow_rows] = pd.to_numeric(texts, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return values
+
+
+def _clean_one(text: str, locale: str) -> str:
+    s = "".join(ch for ch in text if ch in "0123456789,.-")
+    if locale == "pt-BR" and "," in s:
+        return s.replace(".", "").replace(",", ".")
+    return s.replace(",", "")
+
+
+def _sample_is_clean(data: np.ndarray, offsets: np.ndarray) -> bool:
+    sample = data[: offsets[min(_SAMPLE_SIZE, len(offsets) - 1)]]
+    return bool(_clean_bytes[sample].all())
+
+
+def parse_numbers(series: pd.Series, locale: str = "pt-BR") -> pd.Series:
+    """Converte uma coluna de texto em float64; células inválidas viram NaN."""
+    if locale not in LOCALES:
+        raise ValueError(f"locale inválido: {locale!r} (use um de {LOCALES})")
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(series, errors='coerce')
+
+    arr = _to_arrow_strings(series)
+    data, offsets = _arrow_buffers(arr)
+
+    # Caminho rápido: amostra e coluna inteira só com dígitos, ponto e sinal
+    # (sem vírgula, nada a remover); o cast do Arrow resolve se tudo for válido.
+    if _sample_is_clean(data, offsets) and _clean_bytes[data].all():
+        try:
+            values = pc.cast(arr, pa.float64()).to_numpy(zero_copy_only=False)
+            return pd.Series(values, index=series.index, name=series.name)
+        except pa.ArrowInvalid:
+            pass
+
+    if locale == "auto":
+        locale = _detect_locale(arr)
+
+    values = _parse_padded(arr, locale)
+    if arr.null_count:
+        values[arr.is_null().to_numpy(zero_copy_only=False)] = np.nan
+    return pd.Series(values, index=series.index, name=series.name)
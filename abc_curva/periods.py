@@ -0,0 +1,157 @@
+"""Curva ABC por período e em janelas móveis, com migração entre classes.
+
+A base vem em formato longo (uma linha por produto e período). ``split_periods``
+soma a quantidade por (período, produto) numa passada e guarda, para cada
+período, uma impressão digital do conteúdo. ``classify_periods`` classifica
+cada janela (o período sozinho ou os últimos N) e memoriza o resultado pela
+impressão digital dos períodos que a compõem: ao chegar um mês novo só as
+janelas que terminam nele são classificadas; o histórico vem da memória.
+Corrigir um mês antigo refaz apenas as janelas que o contêm.
+"""
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .classify import CLASSES, DEFAULT_CUTS, NO_CLASS, classify_abc_matrix, cross_frame
+
+# Nomes aceitos para a coluna de período (o primeiro encontrado vale)
+PERIOD_COLUMNS = ("periodo", "período", "mes", "mês", "competencia", "competência")
+PERIOD_MEMO_MAX_ENTRIES = 128
+
+
+def period_labels(values: pd.Series) -> pd.Series:
+    """Rótulos de período ordenáveis: datas viram ``AAAA-MM``; o resto, texto sem espaços nas pontas."""
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values.dt.strftime("%Y-%m")
+    non_null = values.dropna()
+    # Datas do Excel chegam como datetime numa coluna de objetos.
+    if len(non_null) and isinstance(non_null.iloc[0], date):
+        return pd.to_datetime(values, errors="coerce").dt.strftime("%Y-%m")
+    return values.astype(pd.StringDtype("pyarrow")).str.strip()
+
+
+@dataclass
+class PeriodSlice:
+    """Quantidade por produto num período (produtos em ordem alfabética)."""
+
+    products: pd.Index
+    values: np.ndarray
+    fingerprint: str
+
+
+def split_periods(df: pd.DataFrame, col_produto: str, col_periodo: str, col_quantidade: str) -> dict:
+    """``{período: PeriodSlice}`` em ordem crescente de período; linhas sem período ficam de fora."""
+    data = df[[col_periodo, col_produto, col_quantidade]].dropna(subset=[col_periodo, col_produto])
+    totals = data.groupby([col_periodo, col_produto], observed=True, sort=True)[col_quantidade].sum(min_count=1)
+    slices = {}
+    for label, part in totals.groupby(level=0, observed=True, sort=True):
+        part = part.droplevel(0)
+        products = pd.Index(part.index.astype(str), name=col_produto)
+        values = part.to_numpy(dtype=float, na_value=np.nan)
+        digest = hashlib.sha256(pd.util.hash_pandas_object(pd.Series(values, index=products)).to_numpy().tobytes())
+        slices[str(label)] = PeriodSlice(products, values, digest.hexdigest())
+    return slices
+
+
+def _classify_window(members: list, cuts) -> pd.Series:
+    # Classes de uma janela: soma dos períodos por produto e a curva sobre essa soma.
+    if len(members) == 1:
+        products, values = members[0].products, members[0].values
+    else:
+        summed = pd.Series(
+            np.concatenate([m.values for m in members]),
+            index=members[0].products.append([m.products for m in members[1:]]),
+        ).groupby(level=0, sort=True).sum(min_count=1)
+        products, values = summed.index, summed.to_numpy()
+    return pd.Series(classify_abc_matrix(values, cuts).codes[:, 0], index=products)
+
+
+@dataclass
+class PeriodClasses:
+    """Classe de cada produto em cada janela (0=A, 1=B, 2=C, -1=fora da janela ou sem classe)."""
+
+    periods: list  # período final de cada janela, em ordem
+    window: int
+    products: pd.Index
+    codes: np.ndarray  # (produtos, janelas) int8
+    # Janelas classificadas na chamada que montou o resultado (as outras vieram da memória)
+    recomputed: list = field(default_factory=list)
+
+    def _column(self, period: str) -> np.ndarray:
+        return self.codes[:, self.periods.index(period)]
+
+    def class_counts(self) -> pd.DataFrame:
+        """Produtos por classe em cada janela."""
+        slots = len(CLASSES) + 1
+        counts = [np.bincount(np.where(c < 0, slots - 1, c), minlength=slots) for c in self.codes.T]
+        frame = pd.DataFrame(counts, index=pd.Index(self.periods, name="Período"), columns=[*CLASSES, NO_CLASS])
+        return frame[list(CLASSES)]
+
+    def migration(self, from_period: str, to_period: str) -> pd.DataFrame:
+        """Produtos por (classe em ``from_period``) × (classe em ``to_period``); "Sem classe" = fora da janela."""
+        a, b = self._column(from_period), self._column(to_period)
+        # Produtos ausentes nas duas janelas não migraram de nada para nada.
+        present = (a >= 0) | (b >= 0)
+        return cross_frame(a[present], b[present], from_period, to_period)
+
+    def migration_summary(self) -> pd.DataFrame:
+        """Movimento entre janelas consecutivas: mantiveram, subiram, desceram, entraram, saíram."""
+        rows = []
+        for prev, cur in zip(self.periods, self.periods[1:]):
+            a, b = self._column(prev), self._column(cur)
+            both = (a >= 0) & (b >= 0)
+            rows.append({
+                "De": prev,
+                "Para": cur,
+                "Mantiveram": int(np.count_nonzero(both & (a == b))),
+                "Subiram": int(np.count_nonzero(both & (b < a))),
+                "Desceram": int(np.count_nonzero(both & (b > a))),
+                "Entraram": int(np.count_nonzero((a < 0) & (b >= 0))),
+                "Saíram": int(np.count_nonzero((a >= 0) & (b < 0))),
+            })
+        return pd.DataFrame(rows, columns=["De", "Para", "Mantiveram", "Subiram", "Desceram", "Entraram", "Saíram"])
+
+    def classes_frame(self) -> pd.DataFrame:
+        """Produtos × janelas com a letra da classe (vazio fora da janela)."""
+        return pd.DataFrame(
+            {p: pd.Categorical.from_codes(self.codes[:, j], categories=CLASSES) for j, p in enumerate(self.periods)},
+            index=self.products,
+        )
+
+
+def classify_periods(slices: dict, window: int = 1, cuts=DEFAULT_CUTS, memo: OrderedDict | None = None,
+                     max_entries: int = PERIOD_MEMO_MAX_ENTRIES) -> PeriodClasses:
+    """Classes de cada janela de ``window`` períodos terminando em cada período de ``slices``.
+
+    As primeiras janelas têm menos períodos (o histórico disponível). Com
+    ``memo``, janelas cujos períodos não mudaram não são reclassificadas.
+    """
+    if window < 1:
+        raise ValueError(f"janela inválida: {window} (mínimo 1 período)")
+    memo = memo if memo is not None else OrderedDict()
+    labels = list(slices)
+    results, recomputed = [], []
+    for i, label in enumerate(labels):
+        members = [slices[m] for m in labels[max(0, i - window + 1): i + 1]]
+        key = (tuple(m.fingerprint for m in members), tuple(float(c) for c in cuts))
+        if key in memo:
+            memo.move_to_end(key)
+        else:
+            memo[key] = _classify_window(members, cuts)
+            recomputed.append(label)
+        results.append(memo[key])
+    while len(memo) > max_entries:
+        memo.popitem(last=False)
+
+    if results:
+        products = pd.Index(np.concatenate([r.index.to_numpy(dtype=object) for r in results])).unique().sort_values()
+    else:
+        products = pd.Index([], dtype=object)
+    codes = np.full((len(products), len(results)), -1, dtype=np.int8, order="F")
+    for j, result in enumerate(results):
+        codes[products.get_indexer(result.index), j] = result.to_numpy()
+    return PeriodClasses(periods=labels, window=window, products=products, codes=codes, recomputed=recomputed)
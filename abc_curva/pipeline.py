@@ -0,0 +1,412 @@
+"""Pipeline de carga da Curva ABC: leitura → parsing → recálculo → classificação.
+
+Cada etapa é uma função (``ingest_dataset``, ``normalize_dataset``,
+``classify_dataset``) para que possa ser memorizada separadamente;
+``prepare_dataset`` encadeia as três.
+
+Sem dependência do Streamlit, para poder ser cacheado pelo dashboard e
+reaproveitado fora dele.
+"""
+import hashlib
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .classify import DEFAULT_CUTS, ABCMatrix, classify_abc_grouped, classify_abc_matrix, cross_frame
+from .memory import compact_frame
+from .parsing import parse_numbers
+from .periods import PERIOD_COLUMNS, period_labels
+from .readers import find_col, read_csv_chunked, read_parquet_columns, read_xlsx_streaming
+
+# Nomes das colunas esperadas
+COL_DESCRICAO = "descricao"
+COL_INDIVIDUAL = "% individual"
+COL_TIPO = "Tipo Item"
+COL_ACUMULADO = "% acumulado"
+COL_CLASSE = "Classificação ABC"
+
+
+class DatasetError(ValueError):
+    """Erro de carga exibido ao usuário (arquivo ilegível, colunas ausentes...)."""
+
+    def __init__(self, message: str, found_columns: list | None = None):
+        super().__init__(message)
+        self.found_columns = found_columns
+
+
+@dataclass
+class PreparedDataset:
+    df: pd.DataFrame
+    analysis_type: str
+    col_descricao: str
+    col_quantidade: str
+    col_individual: str
+    col_tipo: str
+    col_acumulado: str
+    load_messages: list = field(default_factory=list)
+    # Visão consolidada: coluna com a planilha de origem de cada linha
+    col_origem: str | None = None
+    # Métricas opcionais encontradas ({rótulo: coluna}, ver ``OPTIONAL_METRICS``)
+    metric_columns: dict = field(default_factory=dict)
+    # Métrica da classificação atual (``None``: a quantidade da análise)
+    metric: str | None = None
+    # Base em formato longo: coluna com o período de cada linha (ver ``periods``)
+    col_periodo: str | None = None
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# Tipo de análise → coluna de quantidade usada na curva
+ANALYSIS_VOLUME = "Volume (KG)"
+ANALYSIS_QTD = "Quantidade (QTD)"
+ANALYSIS_TYPES = {
+    ANALYSIS_VOLUME: "KG",
+    ANALYSIS_QTD: "Total",
+}
+# Métrica principal de cada análise (a própria coluna de quantidade)
+PRIMARY_METRICS = {
+    ANALYSIS_VOLUME: "Volume",
+    ANALYSIS_QTD: "Quantidade",
+}
+# Métricas opcionais: rótulo → coluna esperada. Entram na classificação quando
+# a planilha as tem; a ordem é a do seletor "Análise selecionada".
+OPTIONAL_METRICS = {
+    "Faturamento": "faturamento",
+    "Margem": "margem",
+}
+DEFAULT_SHEET = "Planilha1"  # Aba padrão do Excel
+
+INPUT_FORMATS = {".xlsx": "xlsx", ".csv": "csv", ".parquet": "parquet"}
+_FORMAT_LABELS = {"xlsx": "Excel", "csv": "CSV", "parquet": "Parquet"}
+
+
+def detect_analysis_type(file_name: str) -> str | None:
+    """Sugere o tipo de análise pelo nome do arquivo (planilhas modelo)."""
+    file_name = file_name.lower()
+    if "abc plan" in file_name:
+        return ANALYSIS_VOLUME
+    if "curva abc" in file_name and "qtd" in file_name:
+        return ANALYSIS_QTD
+    return None
+
+
+def detect_input_format(file_name: str) -> str | None:
+    return INPUT_FORMATS.get(Path(file_name).suffix.lower())
+
+
+def _read_source(source, input_format, analysis_type, locale, streaming, progress) -> tuple[pd.DataFrame, dict]:
+    col_quantidade = ANALYSIS_TYPES[analysis_type]
+    wanted = {
+        "expected_columns": [COL_DESCRICAO, col_quantidade, COL_INDIVIDUAL, COL_TIPO, COL_ACUMULADO, *OPTIONAL_METRICS.values(), *PERIOD_COLUMNS],
+        "numeric_columns": [col_quantidade, COL_INDIVIDUAL, COL_ACUMULADO, *OPTIONAL_METRICS.values()],
+        "locale": locale,
+    }
+    if input_format == "csv":
+        return read_csv_chunked(source, progress=progress, **wanted)
+    if input_format == "parquet":
+        return read_parquet_columns(source, **wanted)
+    if streaming:
+        return read_xlsx_streaming(source, DEFAULT_SHEET, progress=progress, **wanted)
+    return pd.read_excel(source, sheet_name=DEFAULT_SHEET), {}
+
+
+@dataclass
+class RawDataset:
+    """Saída da leitura: colunas resolvidas, números já em float64."""
+
+    df: pd.DataFrame
+    analysis_type: str
+    col_descricao: str
+    col_quantidade: str
+    col_individual: str
+    col_tipo: str
+    col_acumulado: str
+    # Células vazias por coluna numérica antes da conversão (diagnóstico de NaN)
+    raw_missing: dict = field(default_factory=dict)
+    col_origem: str | None = None
+    # Mensagens da leitura, repassadas ao ``PreparedDataset``
+    load_messages: list = field(default_factory=list)
+    metric_columns: dict = field(default_factory=dict)
+    col_periodo: str | None = None
+
+
+def ingest_dataset(
+    source,
+    file_name: str,
+    analysis_type: str | None = None,
+    input_format: str | None = None,
+    locale: str = "pt-BR",
+    streaming: bool = False,
+    progress=None,
+) -> RawDataset:
+    """Lê o arquivo (XLSX, CSV ou Parquet), resolve as colunas e converte os números.
+
+    ``analysis_type`` e ``input_format`` são deduzidos do nome do arquivo quando
+    não informados. Com ``streaming=True`` o XLSX é lido em lotes (ver
+    ``read_xlsx_streaming``); o CSV é sempre lido em lotes. ``progress(linhas_lidas,
+    total_estimado)`` recebe o andamento.
+    """
+    file_name = file_name.lower()
+    analysis_type = analysis_type or detect_analysis_type(file_name)
+    if analysis_type not in ANALYSIS_TYPES:
+        raise DatasetError(f"Selecione o tipo de análise: {list(ANALYSIS_TYPES)}")
+    input_format = input_format or detect_input_format(file_name)
+    if input_format not in _FORMAT_LABELS:
+        raise DatasetError(f"Formato de arquivo não suportado: '{file_name}'. Use .xlsx, .csv ou .parquet")
+    col_quantidade = ANALYSIS_TYPES[analysis_type]
+
+    try:
+        df, raw_missing = _read_source(source, input_format, analysis_type, locale, streaming, progress)
+    except Exception as e:
+        raise DatasetError(f"Erro ao ler o arquivo {_FORMAT_LABELS[input_format]}: {str(e)}") from e
+
+    df.columns = df.columns.astype(str).str.strip()
+
+    col_descricao = COL_DESCRICAO
+    col_individual = COL_INDIVIDUAL
+    col_tipo = COL_TIPO
+    col_acumulado = COL_ACUMULADO
+
+    col_descricao_found = find_col(df, col_descricao)
+    col_quantidade_found = find_col(df, col_quantidade)
+    col_individual_found = find_col(df, col_individual)
+    col_tipo_found = find_col(df, col_tipo)
+    col_acumulado_found = find_col(df, col_acumulado)
+
+    # Validação de colunas baseada no tipo de análise
+    if analysis_type == ANALYSIS_QTD:
+        required_cols = [col_descricao, col_quantidade]
+        # Para QTD, se não tiver as colunas calculadas, vamos criá-las
+        if col_individual_found is None:
+            df[col_individual] = None
+            col_individual_found = col_individual
+        if col_tipo_found is None:
+            df[col_tipo] = "Produto"  # Valor padrão
+            col_tipo_found = col_tipo
+        if col_acumulado_found is None:
+            df[col_acumulado] = None
+            col_acumulado_found = col_acumulado
+    else:
+        required_cols = [col_descricao, col_quantidade, col_individual, col_tipo, col_acumulado]
+
+    found_cols = {
+        col_descricao: col_descricao_found,
+        col_quantidade: col_quantidade_found,
+        col_individual: col_individual_found,
+        col_tipo: col_tipo_found,
+        col_acumulado: col_acumulado_found,
+    }
+    missing_cols = [col for col in required_cols if found_cols[col] is None]
+
+    if missing_cols:
+        raise DatasetError(f"Colunas não encontradas: {missing_cols}", found_columns=list(df.columns))
+
+    col_descricao = col_descricao_found
+    col_quantidade = col_quantidade_found
+    col_individual = col_individual_found
+    col_tipo = col_tipo_found
+    col_acumulado = col_acumulado_found
+
+    nan_before = {
+        col_quantidade: int(df[col_quantidade].isna().sum()),
+        col_individual: int(df[col_individual].isna().sum()),
+        col_acumulado: int(df[col_acumulado].isna().sum()),
+    }
+    # Nos leitores em lotes os números já vêm convertidos; vale a contagem de vazios crus.
+    nan_before.update({k: int(v) for k, v in raw_missing.items() if k in nan_before})
+
+    df[col_individual] = parse_numbers(df[col_individual], locale=locale)
+    df[col_acumulado] = parse_numbers(df[col_acumulado], locale=locale)
+    df[col_quantidade] = parse_numbers(df[col_quantidade], locale=locale)
+    metric_columns = {}
+    for label, expected in OPTIONAL_METRICS.items():
+        found = find_col(df, expected)
+        if found is not None and found not in found_cols.values():
+            df[found] = parse_numbers(df[found], locale=locale)
+            metric_columns[label] = found
+    col_periodo = next((c for c in (find_col(df, name) for name in PERIOD_COLUMNS) if c is not None), None)
+    if col_periodo is not None:
+        df[col_periodo] = period_labels(df[col_periodo])
+    df = compact_frame(df, text_columns=[col_descricao, col_tipo, col_periodo])
+
+    return RawDataset(
+        df=df,
+        analysis_type=analysis_type,
+        col_descricao=col_descricao,
+        col_quantidade=col_quantidade,
+        col_individual=col_individual,
+        col_tipo=col_tipo,
+        col_acumulado=col_acumulado,
+        raw_missing=nan_before,
+        metric_columns=metric_columns,
+        col_periodo=col_periodo,
+    )
+
+
+def normalize_dataset(raw: RawDataset) -> PreparedDataset:
+    """Diagnóstico de conversão, recálculo dos percentuais e remoção de linhas incompletas."""
+    df = raw.df
+    col_quantidade = raw.col_quantidade
+    col_individual = raw.col_individual
+    col_acumulado = raw.col_acumulado
+
+    df_initial_count = len(df)
+    load_messages = list(raw.load_messages)
+    nan_before = raw.raw_missing
+
+    nan_after = {
+        col_quantidade: df[col_quantidade].isna().sum(),
+        col_individual: df[col_individual].isna().sum(),
+        col_acumulado: df[col_acumulado].isna().sum(),
+    }
+
+    coerced = {k: nan_after[k] - nan_before[k] for k in nan_after}
+    load_messages.append(
+        f"🔎 Diagnóstico de conversão (novos NaN após parsing): "
+        f"{col_quantidade}={coerced[col_quantidade]}, % individual={coerced[col_individual]}, % acumulado={coerced[col_acumulado]}"
+    )
+
+    missing_acum_ratio = float(df[col_acumulado].isna().mean())
+    missing_ind_ratio = float(df[col_individual].isna().mean())
+    if missing_acum_ratio > 0.1 or missing_ind_ratio > 0.1:
+        df_calc = df.dropna(subset=[col_quantidade])
+        total_quantidade_calc = float(df_calc[col_quantidade].sum())
+        if total_quantidade_calc > 0:
+            df_calc = df_calc.sort_values(by=col_quantidade, ascending=False)
+            df_calc[col_individual] = (df_calc[col_quantidade] / total_quantidade_calc) * 100
+            df_calc[col_acumulado] = df_calc[col_individual].cumsum()
+            df = df_calc
+            df_initial_count = len(df)
+            load_messages.append(
+                f"🧮 Recalculei '% individual' e '% acumulado' a partir de '{col_quantidade}' "
+                "(a planilha estava com muitos valores ausentes nessas colunas)."
+            )
+
+    # REMOVER LINHAS COM DADOS INCOMPLETOS
+    df = df.dropna(subset=[col_quantidade, col_individual, col_acumulado])
+    df_after_count = len(df)
+
+    load_messages.append(f"Dados carregados: {df_initial_count} linhas → {df_after_count} linhas (removidas {df_initial_count - df_after_count} incompletas)")
+
+    # Se %acumulado está em formato decimal (0-1), converter para porcentagem (0-100)
+    if df[col_acumulado].max() < 2:
+        df[col_acumulado] = df[col_acumulado] * 100
+    if df[col_individual].max() < 2:
+        df[col_individual] = df[col_individual] * 100
+
+    # Quantidades inteiras (caso comum de KG/unidades) cabem exatas em int32.
+    df = compact_frame(df, text_columns=[], integer_columns=[col_quantidade])
+
+    return PreparedDataset(
+        df=df,
+        analysis_type=raw.analysis_type,
+        col_descricao=raw.col_descricao,
+        col_quantidade=col_quantidade,
+        col_individual=col_individual,
+        col_tipo=raw.col_tipo,
+        col_acumulado=col_acumulado,
+        load_messages=load_messages,
+        col_origem=raw.col_origem,
+        metric_columns=dict(raw.metric_columns),
+        col_periodo=raw.col_periodo,
+    )
+
+
+def available_metrics(dataset: PreparedDataset) -> dict:
+    """Métricas classificáveis ({rótulo: coluna}): a quantidade da análise e as opcionais encontradas."""
+    return {PRIMARY_METRICS[dataset.analysis_type]: dataset.col_quantidade, **dataset.metric_columns}
+
+
+@dataclass
+class MetricClasses:
+    """Classes ABC de todas as métricas do dataset, calculadas numa chamada só.
+
+    Trocar a métrica exibida (``select_metric``) ou cruzar duas métricas
+    (``cross``) só lê estas matrizes, sem reordenar nada.
+    """
+
+    metrics: dict  # rótulo → coluna, na ordem das colunas de ``result``
+    result: ABCMatrix
+    # Coluna cujos valores têm cada um a sua curva (``None``: uma curva só)
+    group_by: str | None = None
+
+    def index(self, metric: str) -> int:
+        try:
+            return list(self.metrics).index(metric)
+        except ValueError:
+            raise DatasetError(f"Métrica indisponível nesta planilha: {metric!r} (use uma de {list(self.metrics)})") from None
+
+    def cross(self, metric_rows: str, metric_cols: str) -> pd.DataFrame:
+        """Produtos por (classe em ``metric_rows``) × (classe em ``metric_cols``)."""
+        codes = self.result.codes
+        # "Sem classe" (métrica vazia ou total <= 0) só aparece quando existe.
+        return cross_frame(codes[:, self.index(metric_rows)], codes[:, self.index(metric_cols)], metric_rows, metric_cols)
+
+
+def classify_metrics(dataset: PreparedDataset, cuts=DEFAULT_CUTS, group_by: str | None = None) -> MetricClasses:
+    """Classes de todas as métricas; com ``group_by`` (ex.: ``col_tipo``), uma curva por valor da coluna.
+
+    Agrupado, cada linha é classificada dentro do seu grupo (percentuais
+    sobre o total do grupo) numa passada só para todos os grupos; linhas sem
+    valor na coluna ficam sem classe.
+    """
+    metrics = available_metrics(dataset)
+    values = np.empty((len(dataset.df), len(metrics)), order="F")
+    for j, col in enumerate(metrics.values()):
+        values[:, j] = dataset.df[col].to_numpy(dtype=float, na_value=np.nan)
+    if group_by is None:
+        return MetricClasses(metrics=metrics, result=classify_abc_matrix(values, cuts))
+    if group_by not in dataset.df.columns:
+        raise DatasetError(f"Coluna de agrupamento inexistente: {group_by!r}")
+    groups, _ = pd.factorize(dataset.df[group_by])
+    return MetricClasses(metrics=metrics, result=classify_abc_grouped(values, groups, cuts), group_by=group_by)
+
+
+def select_metric(dataset: PreparedDataset, classes: MetricClasses, metric: str | None = None) -> PreparedDataset:
+    """Dataset classificado pela métrica pedida (sem alterar o DataFrame recebido).
+
+    Na métrica principal ficam os percentuais da planilha; nas outras, na
+    visão consolidada (``col_origem``), na base por período (``col_periodo``),
+    onde os percentuais de cada planilha ou mês não se somam entre si, e na
+    classificação por grupo (percentuais sobre o total do grupo),
+    ``% individual``/``% acumulado`` são os calculados.
+    """
+    primary = PRIMARY_METRICS[dataset.analysis_type]
+    metric = metric or primary
+    j = classes.index(metric)
+    columns = {COL_CLASSE: classes.result.classes(j)}
+    if (metric != primary or dataset.col_origem is not None or dataset.col_periodo is not None
+            or classes.group_by is not None):
+        columns.update({
+            dataset.col_individual: classes.result.pct_individual[:, j],
+            dataset.col_acumulado: classes.result.pct_acumulado[:, j],
+        })
+    return replace(dataset, df=dataset.df.assign(**columns), col_quantidade=classes.metrics[metric], metric=metric)
+
+
+def classify_dataset(
+    dataset: PreparedDataset, cuts=DEFAULT_CUTS, metric: str | None = None, group_by: str | None = None
+) -> PreparedDataset:
+    """Acrescenta a coluna de classe ABC da métrica pedida (padrão: a quantidade da análise)."""
+    return select_metric(dataset, classify_metrics(dataset, cuts, group_by), metric)
+
+
+def prepare_dataset(
+    source,
+    file_name: str,
+    analysis_type: str | None = None,
+    input_format: str | None = None,
+    locale: str = "pt-BR",
+    streaming: bool = False,
+    progress=None,
+) -> PreparedDataset:
+    """Carrega, converte, recalcula e classifica uma planilha (XLSX, CSV ou Parquet).
+
+    Atalho para ``ingest_dataset`` → ``normalize_dataset`` → ``classify_dataset``.
+    """
+    raw = ingest_dataset(source, file_name, analysis_type, input_format, locale, streaming, progress)
+    return classify_dataset(normalize_dataset(raw))
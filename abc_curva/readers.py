@@ -0,0 +1,266 @@
+"""Leitura dos arquivos de entrada (XLSX, CSV e Parquet).
+
+Todos os leitores recebem os nomes de coluna esperados, resolvem-nos no
+cabeçalho com ``find_col``, leem só essas colunas e devolvem números já
+convertidos (float64) e textos como categóricos, junto com a contagem de
+células vazias por coluna numérica antes da conversão.
+
+- ``read_xlsx_streaming``: lotes de linhas (python-calamine se estiver
+  instalado, senão openpyxl somente leitura); o pico de memória fica
+  proporcional ao DataFrame final, e não aos objetos de célula crus.
+- ``read_csv_chunked``: CSV pt-BR (``;`` e vírgula decimal) lido em blocos.
+- ``read_parquet_columns``: Parquet lendo apenas as colunas necessárias.
+- ``iter_chunks``: CSV ou Parquet em blocos, todas as colunas, sem juntar
+  os blocos (para bases maiores que a memória, ver ``outofcore``).
+"""
+import codecs
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+
+from .parsing import parse_numbers
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+DEFAULT_BATCH_SIZE = 50_000
+
+
+def find_col(df_: pd.DataFrame, expected: str) -> str | None:
+    if expected in df_.columns:
+        return expected
+    expected_lower = str(expected).strip().lower()
+    for c in df_.columns:
+        if str(c).strip().lower() == expected_lower:
+            return c
+    return None
+
+
+def _rows_calamine(source, sheet_name):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    sheet = CalamineWorkbook.from_object(source).get_sheet_by_name(sheet_name)
+    return sheet.iter_rows(), sheet.height, lambda: None
+
+
+def _rows_openpyxl(source, sheet_name):
+    import openpyxl
+
+    if hasattr(source, "seek"):
+        source.seek(0)
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    ws = wb[sheet_name]
+    return ws.iter_rows(values_only=True), ws.max_row, wb.close
+
+
+def _is_missing(v) -> bool:
+    return v is None or (isinstance(v, str) and v.strip() == "")
+
+
+def _numeric_batch(values: list, locale: str) -> np.ndarray:
+    # Células numéricas entram direto; só os textos passam pelo parser.
+    cells = np.empty(len(values), dtype=object)
+    cells[:] = values
+    is_text = np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=len(values))
+    out = np.full(len(values), np.nan)
+    if is_text.any():
+        out[is_text] = parse_numbers(pd.Series(cells[is_text], dtype=object), locale=locale).to_numpy()
+    if not is_text.all():
+        out[~is_text] = pd.to_numeric(pd.Series(cells[~is_text], dtype=object), errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return out
+
+
+def _text_batch(values: list) -> pd.Categorical:
+    return pd.Categorical([None if _is_missing(v) else str(v) for v in values])
+
+
+def _resolve_columns(header: list, expected_columns: list[str], numeric_columns: list[str]) -> tuple[list, set]:
+    header_df = pd.DataFrame(columns=header)
+    resolved = {expected: find_col(header_df, expected) for expected in expected_columns}
+    found = [c for c in dict.fromkeys(resolved.values()) if c is not None]
+    numeric = {resolved[c] for c in numeric_columns if resolved.get(c) is not None}
+    return found, numeric
+
+
+def _assemble(chunks: dict, numeric: set) -> pd.DataFrame:
+    columns = {}
+    for name, parts in chunks.items():
+        if name in numeric:
+            columns[name] = np.concatenate(parts) if parts else np.zeros(0)
+        else:
+            columns[name] = union_categoricals(parts) if parts else pd.Categorical([])
+    return pd.DataFrame(columns, columns=list(chunks))
+
+
+def read_xlsx_streaming(
+    source,
+    sheet_name: str,
+    expected_columns: list[str],
+    numeric_columns: list[str],
+    locale: str = "pt-BR",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress=None,
+) -> tuple[pd.DataFrame, dict]:
+    """Lê só as colunas de ``expected_columns`` encontradas no cabeçalho.
+
+    Retorna o DataFrame (números em float64, textos como categóricos) e a
+    contagem de células vazias por coluna numérica antes da conversão, para
+    o diagnóstico de NaN. ``progress(linhas_lidas, total_estimado)`` é chamado
+    a cada lote; o total pode ser ``None`` quando a planilha não informa.
+    """
+    open_rows = _rows_calamine if CalamineWorkbook is not None else _rows_openpyxl
+    rows, total_rows, close = open_rows(source, sheet_name)
+    try:
+        header = next(rows, None) or []
+        header = [f"Unnamed: {i}" if _is_missing(h) else str(h).strip() for i, h in enumerate(header)]
+        found, numeric = _resolve_columns(header, expected_columns, numeric_columns)
+        positions = {name: header.index(name) for name in found}
+
+        chunks = {name: [] for name in positions}
+        raw_missing = {name: 0 for name in numeric}
+        rows_read = 0
+        data_rows = total_rows - 1 if total_rows else None
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            for name, pos in positions.items():
+                values = [row[pos] if pos < len(row) else None for row in batch]
+                if name in numeric:
+                    raw_missing[name] += sum(1 for v in values if _is_missing(v))
+                    chunks[name].append(_numeric_batch(values, locale))
+                else:
+                    chunks[name].append(_text_batch(values))
+            rows_read += len(batch)
+            if progress is not None:
+                progress(rows_read, data_rows)
+    finally:
+        close()
+
+    df = _assemble(chunks, numeric)
+
+    # Linhas totalmente vazias no fim da aba (formatação residual) não são dados.
+    if len(df):
+        last = np.flatnonzero(df.notna().any(axis=1).to_numpy())
+        df = df.iloc[: (last[-1] + 1 if len(last) else 0)]
+    return df, raw_missing
+
+
+def _sniff_csv(source) -> tuple[str, str]:
+    """Descobre (separador, encoding) pelos primeiros KB do arquivo."""
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            sample = f.read(64 * 1024)
+    else:
+        source.seek(0)
+        sample = source.read(64 * 1024)
+        source.seek(0)
+    try:
+        text = codecs.getincrementaldecoder("utf-8-sig")().decode(sample, final=False)
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError:
+        # Exportações de ERP em Windows costumam vir em latin-1.
+        text = sample.decode("latin-1")
+        encoding = "latin-1"
+    first_line = text.splitlines()[0] if text else ""
+    counts = {c: first_line.count(c) for c in (";", ",", "\t")}
+    sep = max(counts, key=counts.get) if any(counts.values()) else ";"
+    return sep, encoding
+
+
+def read_csv_chunked(
+    source,
+    expected_columns: list[str],
+    numeric_columns: list[str],
+    locale: str = "pt-BR",
+    sep: str | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress=None,
+) -> tuple[pd.DataFrame, dict]:
+    """Lê um CSV em blocos de ``batch_size`` linhas, só com as colunas esperadas.
+
+    Por padrão o separador (``;``, ``,`` ou tab) e o encoding (UTF-8 ou latin-1)
+    são detectados; os números são lidos como texto e convertidos com o
+    ``locale`` informado, então ``1.234,56`` funciona mesmo com separador ``;``.
+    """
+    sniffed_sep, encoding = _sniff_csv(source)
+    sep = sep or sniffed_sep
+
+    header = list(pd.read_csv(source, sep=sep, encoding=encoding, nrows=0).columns)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    found, numeric = _resolve_columns(header, expected_columns, numeric_columns)
+
+    chunks = {name: [] for name in found}
+    raw_missing = {name: 0 for name in numeric}
+    rows_read = 0
+    reader = pd.read_csv(source, sep=sep, encoding=encoding, usecols=found, dtype=str, chunksize=batch_size)
+    for chunk in reader:
+        for name in found:
+            col = chunk[name]
+            if name in numeric:
+                raw_missing[name] += int(col.isna().sum())
+                chunks[name].append(parse_numbers(col, locale=locale).to_numpy())
+            else:
+                chunks[name].append(pd.Categorical(col))
+        rows_read += len(chunk)
+        if progress is not None:
+            progress(rows_read, None)
+    return _assemble(chunks, numeric), raw_missing
+
+
+def read_parquet_columns(
+    source,
+    expected_columns: list[str],
+    numeric_columns: list[str],
+    locale: str = "pt-BR",
+) -> tuple[pd.DataFrame, dict]:
+    """Lê do Parquet só as colunas esperadas; números gravados como texto são convertidos."""
+    if hasattr(source, "seek"):
+        source.seek(0)
+    parquet_file = pq.ParquetFile(source, memory_map=isinstance(source, (str, Path)))
+    found, numeric = _resolve_columns(parquet_file.schema_arrow.names, expected_columns, numeric_columns)
+
+    df = parquet_file.read(columns=found).to_pandas()
+    raw_missing = {name: int(df[name].isna().sum()) for name in numeric}
+    for name in found:
+        if name in numeric:
+            df[name] = parse_numbers(df[name], locale=locale)
+        else:
+            df[name] = df[name].astype("category")
+    return df, raw_missing
+
+
+def iter_chunks(source, input_format: str, numeric_columns: list[str], locale: str = "pt-BR",
+                batch_size: int = DEFAULT_BATCH_SIZE):
+    """Blocos de até ``batch_size`` linhas de um CSV ou Parquet, com todas as colunas.
+
+    As colunas de ``numeric_columns`` encontradas no cabeçalho (ver
+    ``find_col``) saem convertidas em float64; as demais ficam como lidas.
+    Nada é acumulado entre os blocos.
+    """
+    if input_format == "csv":
+        sep, encoding = _sniff_csv(source)
+        reader = pd.read_csv(source, sep=sep, encoding=encoding, dtype=str, chunksize=batch_size)
+        blocks = iter(reader)
+    elif input_format == "parquet":
+        if hasattr(source, "seek"):
+            source.seek(0)
+        parquet_file = pq.ParquetFile(source, memory_map=isinstance(source, (str, Path)))
+        blocks = (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=batch_size))
+    else:
+        raise ValueError(f"leitura em blocos só para CSV e Parquet, não {input_format!r}")
+
+    numeric = None
+    for chunk in blocks:
+        if numeric is None:
+            _, numeric = _resolve_columns(list(chunk.columns), numeric_columns, numeric_columns)
+        for name in numeric:
+            chunk[name] = parse_numbers(chunk[name], locale=locale).to_numpy(dtype=float, na_value=np.nan)
+        yield chunk
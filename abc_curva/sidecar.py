@@ -0,0 +1,226 @@
+"""Cache colunar (Parquet) gravado ao lado das planilhas fixas.
+
+Na primeira carga o resultado da leitura (colunas resolvidas e números já
+convertidos, ver ``ingest_dataset``) é salvo em ``<planilha>.abc.parquet``;
+as sessões seguintes leem esse arquivo via memory-map em vez de reprocessar
+o XLSX. Normalização e classificação são baratas e rodam a partir dele. O cache é descartado quando o
+mtime ou o hash da planilha mudam.
+
+Arquivos enviados não têm caminho fixo: ``ContentCache`` guarda a leitura
+numa pasta, pelo hash do conteúdo, com limite de tamanho (LRU). O mesmo
+arquivo enviado de novo, por qualquer sessão, não é relido.
+"""
+import json
+import os
+import threading
+from dataclasses import fields
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .pipeline import (
+    PreparedDataset,
+    RawDataset,
+    classify_dataset,
+    content_hash,
+    detect_analysis_type,
+    detect_input_format,
+    ingest_dataset,
+    normalize_dataset,
+)
+
+SIDECAR_SUFFIX = ".abc.parquet"
+_METADATA_KEY = b"abc_curva"
+_SIDECAR_VERSION = 6
+CONTENT_CACHE_MAX_BYTES = 1024 ** 3
+
+
+def sidecar_path(path: Path) -> Path:
+    return path.with_name(path.name + SIDECAR_SUFFIX)
+
+
+def _source_stamp(path: Path, data_hash: str | None) -> dict:
+    stat = path.stat()
+    if data_hash is None:
+        data_hash = content_hash(path.read_bytes())
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": data_hash}
+
+
+def _read_dataset(cache_file: Path) -> tuple[dict, pd.DataFrame] | None:
+    # None se o arquivo não existe, está incompleto ou foi removido durante a leitura.
+    try:
+        schema_meta = pq.read_schema(cache_file).metadata or {}
+        meta = json.loads(schema_meta[_METADATA_KEY])
+        if meta.get("version") != _SIDECAR_VERSION:
+            return None
+        return meta, pd.read_parquet(cache_file, engine="pyarrow", memory_map=True)
+    except (OSError, KeyError, ValueError, pa.ArrowException):
+        return None
+
+
+def _write_dataset(cache_file: Path, meta: dict, dataset: RawDataset) -> bool:
+    attrs = {f.name: getattr(dataset, f.name) for f in fields(dataset) if f.name != "df"}
+    meta = {"version": _SIDECAR_VERSION, **meta, "dataset": attrs}
+
+    table = pa.Table.from_pandas(dataset.df, preserve_index=True)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        _METADATA_KEY: json.dumps(meta, ensure_ascii=False).encode("utf-8"),
+    })
+
+    # Temporário por processo e thread, trocado de uma vez: quem lê nunca vê um arquivo pela metade.
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        pq.write_table(table, tmp_file)
+        os.replace(tmp_file, cache_file)
+        return True
+    except OSError:
+        # Diretório somente leitura ou disco cheio: segue sem cache.
+        tmp_file.unlink(missing_ok=True)
+        return False
+
+
+def _read_sidecar(path: Path, stamp: dict, file_name: str, analysis_type: str | None) -> RawDataset | None:
+    cache_file = sidecar_path(path)
+    if not cache_file.exists():
+        return None
+    found = _read_dataset(cache_file)
+    if found is None:
+        return None
+    meta, df = found
+    if meta.get("file_name") != file_name or meta.get("source") != stamp:
+        return None
+    if analysis_type is not None and meta["dataset"].get("analysis_type") != analysis_type:
+        return None
+    return RawDataset(df=df, **meta["dataset"])
+
+
+def _write_sidecar(path: Path, stamp: dict, file_name: str, dataset: RawDataset) -> None:
+    _write_dataset(sidecar_path(path), {"file_name": file_name, "source": stamp}, dataset)
+
+
+def ingest_with_sidecar(path: Path, file_name: str, data_hash: str | None = None, **ingest_kwargs) -> RawDataset:
+    file_name = file_name.lower()
+    stamp = _source_stamp(path, data_hash)
+    dataset = _read_sidecar(path, stamp, file_name, ingest_kwargs.get("analysis_type"))
+    if dataset is not None:
+        return dataset
+
+    dataset = ingest_dataset(path, file_name, **ingest_kwargs)
+    _write_sidecar(path, stamp, file_name, dataset)
+    return dataset
+
+
+def load_with_sidecar(path: Path, file_name: str, data_hash: str | None = None, **ingest_kwargs) -> PreparedDataset:
+    raw = ingest_with_sidecar(path, file_name, data_hash=data_hash, **ingest_kwargs)
+    return classify_dataset(normalize_dataset(raw))
+
+
+class ContentCache:
+    """Leituras guardadas em Parquet numa pasta, pela chave do conteúdo, até ``max_bytes`` (LRU).
+
+    Seguro para várias sessões e processos na mesma pasta: cada arquivo é
+    gravado num temporário e renomeado; um arquivo removido por outro
+    processo no meio da leitura conta como ausente. A ordem do LRU é o mtime,
+    renovado a cada acerto.
+    """
+
+    def __init__(self, directory: Path | str, max_bytes: int = CONTENT_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{SIDECAR_SUFFIX}"
+
+    def get(self, key: str) -> RawDataset | None:
+        cache_file = self.path(key)
+        found = _read_dataset(cache_file) if cache_file.exists() else None
+        if found is None:
+            return None
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+        meta, df = found
+        return RawDataset(df=df, **meta["dataset"])
+
+    def put(self, key: str, dataset: RawDataset) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            return
+        if _write_dataset(self.path(key), {"key": key}, dataset):
+            self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for cache_file in self.directory.glob(f"*{SIDECAR_SUFFIX}"):
+            try:
+                stat = cache_file.stat()
+            except OSError:
+                continue  # removido por outra sessão
+            entries.append((stat.st_mtime, stat.st_size, cache_file))
+        return sorted(entries)
+
+    def nbytes(self) -> int:
+        return sum(size for _, size, _ in self._entries()) if self.directory.is_dir() else 0
+
+    def evict(self) -> int:
+        """Remove os arquivos usados há mais tempo até caber em ``max_bytes``; devolve os bytes liberados."""
+        entries = self._entries()
+        excess = sum(size for _, size, _ in entries) - self.max_bytes
+        freed = 0
+        for _, size, cache_file in entries:
+            if freed >= excess:
+                break
+            try:
+                cache_file.unlink()
+            except OSError:
+                continue  # já removido ou em uso (Windows)
+            freed += size
+        return freed
+
+    def clear(self) -> None:
+        for _, _, cache_file in self._entries():
+            cache_file.unlink(missing_ok=True)
+
+
+def content_key(data_hash: str, file_name: str, analysis_type: str | None = None, input_format: str | None = None,
+                locale: str = "pt-BR") -> str:
+    """Chave de ``ContentCache``: o que muda o resultado da leitura (conteúdo, formato, análise, números).
+
+    O nome do arquivo só conta pelo formato e pelo tipo de análise deduzidos
+    dele: o mesmo conteúdo com outro nome reaproveita a leitura.
+    """
+    file_name = file_name.lower()
+    parts = (
+        _SIDECAR_VERSION,
+        data_hash,
+        input_format or detect_input_format(file_name),
+        analysis_type or detect_analysis_type(file_name),
+        locale,
+    )
+    return content_hash(json.dumps(parts).encode("utf-8"))
+
+
+def ingest_cached(source, file_name: str, cache: ContentCache, data_hash: str | None = None, **ingest_kwargs) -> RawDataset:
+    """``ingest_dataset`` com ``cache``: o mesmo conteúdo só é lido uma vez (``source`` em bytes ou arquivo aberto)."""
+    if data_hash is None:
+        data = source if isinstance(source, bytes) else source.getvalue()
+        data_hash = content_hash(data)
+    key = content_key(
+        data_hash,
+        file_name,
+        ingest_kwargs.get("analysis_type"),
+        ingest_kwargs.get("input_format"),
+        ingest_kwargs.get("locale", "pt-BR"),
+    )
+    dataset = cache.get(key)
+    if dataset is not None:
+        return dataset
+    dataset = ingest_dataset(BytesIO(source) if isinstance(source, bytes) else source, file_name, **ingest_kwargs)
+    cache.put(key, dataset)
+    return dataset
@@ -0,0 +1,199 @@
+"""Visão consolidada de várias planilhas (filiais, lojas...).
+
+``ingest_sources`` lê as fontes em paralelo num pool de processos, pulando
+as que já estão na memória (``memo``, chaveada pelo hash do conteúdo): ao
+acrescentar um arquivo só ele é lido. ``consolidate_sources`` põe todas no
+mesmo esquema, une as linhas com a coluna de origem e guarda a classe que
+cada linha tinha na própria planilha; a classe global sai do
+``classify_dataset`` sobre a base unida. Com ``cache`` (``ContentCache``), os
+arquivos enviados também são guardados em disco pelo conteúdo.
+"""
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+from .classify import CLASSES
+from .memory import compact_frame
+from .periods import PERIOD_COLUMNS
+from .pipeline import (
+    ANALYSIS_TYPES,
+    COL_ACUMULADO,
+    COL_CLASSE,
+    COL_DESCRICAO,
+    COL_INDIVIDUAL,
+    COL_TIPO,
+    INPUT_FORMATS,
+    OPTIONAL_METRICS,
+    DatasetError,
+    PreparedDataset,
+    RawDataset,
+    classify_dataset,
+    ingest_dataset,
+    normalize_dataset,
+)
+from .sidecar import SIDECAR_SUFFIX, ContentCache, ingest_cached, ingest_with_sidecar
+
+COL_ORIGEM = "Origem"
+COL_CLASSE_ORIGEM = "Classe na origem"
+COL_PERIODO = PERIOD_COLUMNS[0]
+SOURCE_MEMO_MAX_ENTRIES = 32
+# Abrir os processos do pool custa ~1 s; abaixo disso a leitura em série é mais rápida.
+PARALLEL_MIN_BYTES = 16 * 1024 ** 2
+
+
+def collect_inputs(paths) -> list[Path]:
+    """Arquivos suportados em ``paths`` (pastas são varridas sem recursão), sem repetição e em ordem."""
+    found = {}
+    for raw in paths:
+        path = Path(raw)
+        candidates = sorted(path.iterdir()) if path.is_dir() else [path]
+        for candidate in candidates:
+            if (
+                candidate.is_file()
+                and candidate.suffix.lower() in INPUT_FORMATS
+                # Temporários do Excel e os caches .abc.parquet gravados ao lado das planilhas
+                and not candidate.name.startswith("~$")
+                and not candidate.name.endswith(SIDECAR_SUFFIX)
+            ):
+                found.setdefault(candidate.resolve(), candidate)
+    return list(found.values())
+
+
+def _source_nbytes(source) -> int:
+    return source.stat().st_size if isinstance(source, Path) else len(source)
+
+
+def _ingest_source(name: str, data_hash: str, source, ingest_kwargs: dict, cache: ContentCache | None = None) -> RawDataset | DatasetError:
+    # Roda no processo do pool: o erro volta como valor para não derrubar as outras fontes.
+    try:
+        if isinstance(source, Path):
+            return ingest_with_sidecar(source, name, data_hash=data_hash, **ingest_kwargs)
+        if cache is not None:
+            return ingest_cached(source, name, cache, data_hash=data_hash, **ingest_kwargs)
+        return ingest_dataset(BytesIO(source), name, **ingest_kwargs)
+    except DatasetError as e:
+        return e
+
+
+def ingest_sources(sources: list, jobs: int = 1, memo: OrderedDict | None = None,
+                   max_entries: int = SOURCE_MEMO_MAX_ENTRIES, cache: ContentCache | None = None, **ingest_kwargs) -> dict:
+    """Lê ``sources`` (lista de ``(nome, hash, Path ou bytes)``) → ``{nome: RawDataset ou DatasetError}``.
+
+    Só as fontes ausentes de ``memo`` são lidas, com até ``jobs`` processos;
+    com ``cache``, as fontes em bytes já lidas antes (nesta ou em outra sessão) vêm do disco.
+    """
+    memo = memo if memo is not None else OrderedDict()
+    memo_key = tuple(sorted(ingest_kwargs.items()))
+    results, pending = {}, []
+    for name, data_hash, source in sources:
+        key = (name, data_hash, memo_key)
+        if key in memo:
+            memo.move_to_end(key)
+            results[name] = memo[key]
+        else:
+            pending.append((name, data_hash, source))
+
+    if len(pending) > 1 and jobs > 1 and sum(_source_nbytes(p[2]) for p in pending) >= PARALLEL_MIN_BYTES:
+        # "spawn": o processo do Streamlit tem threads, e fork com threads ativas é inseguro.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending)), mp_context=context) as pool:
+            futures = [(p[0], p[1], pool.submit(_ingest_source, *p, ingest_kwargs, cache)) for p in pending]
+            loaded = [(name, data_hash, future.result()) for name, data_hash, future in futures]
+    else:
+        loaded = [(name, data_hash, _ingest_source(name, data_hash, source, ingest_kwargs, cache)) for name, data_hash, source in pending]
+
+    for name, data_hash, value in loaded:
+        results[name] = value
+        if isinstance(value, RawDataset):
+            memo[(name, data_hash, memo_key)] = value
+    while len(memo) > max_entries:
+        memo.popitem(last=False)
+    # Na ordem recebida
+    return {name: results[name] for name, _, _ in sources}
+
+
+def _to_common_schema(name: str, dataset: PreparedDataset, metrics, with_period: bool) -> pd.DataFrame:
+    col_quantidade = ANALYSIS_TYPES[dataset.analysis_type]
+    renamed = {
+        dataset.col_descricao: COL_DESCRICAO,
+        dataset.col_quantidade: col_quantidade,
+        dataset.col_individual: COL_INDIVIDUAL,
+        dataset.col_tipo: COL_TIPO,
+        dataset.col_acumulado: COL_ACUMULADO,
+    }
+    renamed.update({dataset.metric_columns[label]: OPTIONAL_METRICS[label] for label in metrics})
+    if with_period:
+        renamed[dataset.col_periodo] = COL_PERIODO
+    df = dataset.df[list(renamed)].rename(columns=renamed)
+    return df.assign(**{
+        COL_CLASSE_ORIGEM: dataset.df[COL_CLASSE].array,
+        COL_ORIGEM: name,
+    })
+
+
+def consolidate_sources(datasets: dict) -> RawDataset:
+    """Une ``{nome: RawDataset}`` numa base só, com ``Origem`` e ``Classe na origem``.
+
+    Cada fonte é normalizada e classificada sozinha (classe na origem); a
+    base unida volta como ``RawDataset`` para seguir o pipeline normal.
+    Fontes com erro (``DatasetError``) ficam de fora e viram mensagem;
+    métricas opcionais e a coluna de período entram quando todas as fontes as têm.
+    """
+    loaded = {name: raw for name, raw in datasets.items() if isinstance(raw, RawDataset)}
+    failed = {name: err for name, err in datasets.items() if not isinstance(err, RawDataset)}
+    if not loaded:
+        detail = "; ".join(f"{name}: {err}" for name, err in failed.items())
+        raise DatasetError(f"Nenhuma planilha pôde ser carregada. {detail}".strip())
+    analysis_types = {raw.analysis_type for raw in loaded.values()}
+    if len(analysis_types) > 1:
+        raise DatasetError(f"As planilhas misturam tipos de análise: {sorted(analysis_types)}")
+    analysis_type = analysis_types.pop()
+
+    # Métricas opcionais só entram se todas as planilhas as têm.
+    metrics = [label for label in OPTIONAL_METRICS if all(label in raw.metric_columns for raw in loaded.values())]
+    with_period = all(raw.col_periodo is not None for raw in loaded.values())
+    frames = []
+    messages = [f"🏬 {len(loaded)} planilha(s) consolidada(s)" + (f", {len(failed)} com erro" if failed else "")]
+    for name, raw in loaded.items():
+        prepared = classify_dataset(normalize_dataset(raw))
+        frames.append(_to_common_schema(name, prepared, metrics, with_period))
+        messages.extend(f"[{name}] {msg}" for msg in prepared.load_messages)
+    messages.extend(f"⚠️ [{name}] não carregada: {err}" for name, err in failed.items())
+
+    # Percentuais de cada fonte: ``classify_dataset`` recalcula sobre a base unida.
+    df = pd.concat(frames, ignore_index=True)
+    col_quantidade = ANALYSIS_TYPES[analysis_type]
+    df = compact_frame(df, text_columns=[COL_DESCRICAO, COL_TIPO, COL_ORIGEM, COL_PERIODO])
+    return RawDataset(
+        df=df,
+        analysis_type=analysis_type,
+        col_descricao=COL_DESCRICAO,
+        col_quantidade=col_quantidade,
+        col_individual=COL_INDIVIDUAL,
+        col_tipo=COL_TIPO,
+        col_acumulado=COL_ACUMULADO,
+        raw_missing={col_quantidade: 0, COL_INDIVIDUAL: 0, COL_ACUMULADO: 0},
+        col_origem=COL_ORIGEM,
+        load_messages=messages,
+        metric_columns={label: OPTIONAL_METRICS[label] for label in metrics},
+        col_periodo=COL_PERIODO if with_period else None,
+    )
+
+
+def source_summary(df: pd.DataFrame, col_quantidade: str, col_origem: str = COL_ORIGEM) -> pd.DataFrame:
+    """Uma linha por origem: produtos, total, participação e contagem por classe (global e na origem)."""
+    grouped = df.groupby(col_origem, observed=True)
+    summary = pd.DataFrame({
+        "Produtos": grouped.size(),
+        col_quantidade: grouped[col_quantidade].sum(),
+    })
+    summary["% do total"] = summary[col_quantidade] / summary[col_quantidade].sum() * 100
+    for col, label in ((COL_CLASSE, "global"), (COL_CLASSE_ORIGEM, "na origem")):
+        counts = pd.crosstab(df[col_origem], df[col]).reindex(index=summary.index, columns=list(CLASSES), fill_value=0)
+        for cls in CLASSES:
+            summary[f"{cls} ({label})"] = counts[cls]
+    return summary.rename_axis(col_origem).reset_index()
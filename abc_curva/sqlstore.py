@@ -0,0 +1,290 @@
+"""Motor SQL embutido (SQLite ou DuckDB) para a classificação e os agregados.
+
+``SQLStore.load`` copia a base já normalizada (um quadro pandas em memória),
+em blocos, para um banco local num arquivo temporário. ``classify`` calcula
+% individual, % acumulado e os pontos de corte com funções de janela
+(``SUM(...) OVER``/``ROW_NUMBER() OVER`` na ordem decrescente de quantidade,
+empates pela ordem original das linhas — a mesma regra de ``classify``; com
+``group_by``, ``PARTITION BY`` o tipo ou a planilha de origem) e devolve as
+classes de todas as linhas, como ``classify_metrics``. Cada agrupamento tem a
+sua tabela de classes, e as consultas dos gráficos (totais por tipo, top N,
+contagens por classe, estatísticas) recebem o agrupamento e devolvem só o
+resultado agregado.
+
+Não é um motor para bases maiores que a memória: a leitura, a normalização,
+o ranking e o Pareto continuam no quadro pandas.
+
+SQLite vem com o Python; DuckDB é usado quando o pacote ``duckdb`` está
+instalado.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from .classify import CLASSES, DEFAULT_CUTS, ABCMatrix
+from .pipeline import MetricClasses, PreparedDataset, available_metrics
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - opcional
+    duckdb = None
+
+SQL_BACKENDS = ("sqlite", "duckdb")
+SQL_LOAD_CHUNK_ROWS = 50_000
+_TABLE = "itens"
+_CLASSES_TABLE = "classes"
+
+
+def available_sql_backends() -> list[str]:
+    """Motores SQL utilizáveis neste ambiente (SQLite sempre; DuckDB se instalado)."""
+    return [b for b in SQL_BACKENDS if b == "sqlite" or duckdb is not None]
+
+
+def _connect(backend: str, path: str):
+    if backend == "sqlite":
+        # Uma conexão por store, usada por várias sessões do Streamlit (sob ``_lock``).
+        conn = sqlite3.connect(path, check_same_thread=False)
+        # Banco descartável: sem diário nem fsync.
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        return conn
+    if backend == "duckdb":
+        if duckdb is None:
+            raise ValueError("motor 'duckdb' indisponível: instale o pacote duckdb")
+        return duckdb.connect(path)
+    raise ValueError(f"motor SQL desconhecido: {backend!r} (use um de {SQL_BACKENDS})")
+
+
+def _close(conn, path: str) -> None:
+    conn.close()
+    for file in (path, f"{path}.wal"):
+        try:
+            os.unlink(file)
+        except OSError:
+            pass
+
+
+def _text_values(series: pd.Series) -> np.ndarray:
+    # Texto ou categórico → objetos Python, vazio como None (NULL).
+    return series.astype(object).where(series.notna(), None).to_numpy(dtype=object)
+
+
+class SQLStore:
+    """Base normalizada num banco SQL local e as consultas ABC sobre ela.
+
+    Seguro para várias threads: as consultas passam por um lock (a conexão
+    é uma só). O arquivo do banco é apagado quando o store é descartado.
+    """
+
+    def __init__(self, backend: str = "sqlite", path: str | None = None):
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=f".abc.{backend}")
+            os.close(fd)
+            os.unlink(path)  # o DuckDB recusa um arquivo vazio que não é banco
+        self.backend = backend
+        self.path = path
+        self.conn = _connect(backend, path)
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _close, self.conn, path)
+        self.metrics: dict = {}
+        # Colunas do dataset que podem agrupar a classificação → coluna no banco
+        self.group_columns: dict = {}
+        # Tabelas de classes já calculadas: uma por agrupamento (None = base toda)
+        self._classes_tables: dict = {}
+        self.n_rows = 0
+
+    def close(self) -> None:
+        self._finalizer()
+
+    def _execute(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _metric_column(self, metric: str) -> str:
+        return f"m{list(self.metrics).index(metric)}"
+
+    def _classes_table(self, group_by: str | None) -> str:
+        # Cada agrupamento tem a sua tabela: classificar por tipo não troca as classes da base toda.
+        if group_by not in self._classes_tables:
+            raise ValueError(f"classificação {'da base toda' if group_by is None else f'por {group_by!r}'} "
+                             "ainda não calculada: chame classify antes")
+        return self._classes_tables[group_by]
+
+    def load(self, dataset: PreparedDataset, chunk_rows: int = SQL_LOAD_CHUNK_ROWS) -> "SQLStore":
+        """Copia descrição, tipo (e origem), e as métricas de ``dataset`` para o banco (``pos`` = posição da linha)."""
+        df = dataset.df
+        self.metrics = available_metrics(dataset)
+        self.group_columns = {dataset.col_tipo: "tipo"}
+        if dataset.col_origem is not None:
+            self.group_columns[dataset.col_origem] = "origem"
+        metric_cols = [f"m{j}" for j in range(len(self.metrics))]
+        columns = [
+            "pos BIGINT", "descricao TEXT", *(f"{c} TEXT" for c in self.group_columns.values()),
+            *(f"{c} DOUBLE" for c in metric_cols),
+        ]
+        with self._lock:
+            for table in self._classes_tables.values():
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._classes_tables = {}
+            self.conn.execute(f"DROP TABLE IF EXISTS {_TABLE}")
+            self.conn.execute(f"CREATE TABLE {_TABLE} ({', '.join(columns)})")
+            for start in range(0, len(df), chunk_rows):
+                part = df.iloc[start: start + chunk_rows]
+                data = {
+                    "pos": np.arange(start, start + len(part), dtype=np.int64),
+                    "descricao": _text_values(part[dataset.col_descricao]),
+                    **{name: _text_values(part[col]) for col, name in self.group_columns.items()},
+                }
+                for name, col in zip(metric_cols, self.metrics.values()):
+                    data[name] = part[col].to_numpy(dtype=float, na_value=np.nan)
+                self._insert(data)
+            self.conn.execute(f"CREATE INDEX {_TABLE}_tipo ON {_TABLE} (tipo)")
+        self.n_rows = len(df)
+        return self
+
+    def _insert(self, data: dict) -> None:
+        placeholders = ", ".join("?" * len(data))
+        if self.backend == "duckdb":
+            # NaN → NULL (no DuckDB, NaN é um número e entraria na soma)
+            frame = pd.DataFrame({k: pd.array(v, dtype="Float64") if v.dtype == float else v for k, v in data.items()})
+            self.conn.register("_bloco", frame)
+            self.conn.execute(f"INSERT INTO {_TABLE} SELECT * FROM _bloco")
+            self.conn.unregister("_bloco")
+        else:
+            # O SQLite grava NaN como NULL.
+            rows = zip(*(v.tolist() for v in data.values()))
+            self.conn.executemany(f"INSERT INTO {_TABLE} VALUES ({placeholders})", rows)
+
+    def classify(self, cuts=DEFAULT_CUTS, group_by: str | None = None) -> MetricClasses:
+        """Classes e percentuais de todas as métricas, calculados no banco (mesmo resultado de ``classify_metrics``)."""
+        if group_by is not None and group_by not in self.group_columns:
+            raise ValueError(f"coluna de agrupamento indisponível no banco: {group_by!r} (use uma de {list(self.group_columns)})")
+        group = self.group_columns.get(group_by)
+        table = _CLASSES_TABLE if group is None else f"{_CLASSES_TABLE}_{group}"
+        n, k = self.n_rows, len(self.metrics)
+        codes = np.full((n, k), -1, dtype=np.int8, order="F")
+        pct_ind = np.full((n, k), np.nan, order="F")
+        pct_acum = np.full((n, k), np.nan, order="F")
+        with self._lock:
+            self._classes_tables.pop(group_by, None)
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute(
+                f"CREATE TABLE {table} (m INTEGER, pos BIGINT, code INTEGER, pct_ind DOUBLE, pct_acum DOUBLE)"
+            )
+            for j in range(k):
+                self._classify_metric(j, cuts, group, table)
+            self.conn.execute(f"CREATE INDEX {table}_m ON {table} (m, pos)")
+            self._classes_tables[group_by] = table
+            for j in range(k):
+                rows = self.conn.execute(
+                    f"SELECT pos, code, pct_ind, pct_acum FROM {table} WHERE m = ?", (j,)
+                ).fetchall()
+                if not rows:
+                    continue
+                values = np.array(rows, dtype=float)
+                pos = values[:, 0].astype(np.int64)
+                codes[pos, j] = values[:, 1]
+                pct_ind[pos, j] = values[:, 2]
+                pct_acum[pos, j] = values[:, 3]
+        return MetricClasses(metrics=dict(self.metrics), result=ABCMatrix(codes, pct_ind, pct_acum), group_by=group_by)
+
+    def _classify_metric(self, j: int, cuts, group: str | None = None, table: str = _CLASSES_TABLE) -> None:
+        # Ordem da curva: quantidade decrescente, empates pela posição original;
+        # com ``group``, uma curva por valor da coluna (linhas sem valor ficam sem classe).
+        col = f"m{j}"
+        grp = group or "0"
+        partition = "PARTITION BY grp " if group else ""
+        self.conn.execute("DROP TABLE IF EXISTS ranked")
+        self.conn.execute(f"""
+            CREATE TEMP TABLE ranked AS
+            WITH valid AS (
+                     SELECT pos, {grp} AS grp, {col} AS q FROM {_TABLE}
+                     WHERE {col} IS NOT NULL AND {grp} IS NOT NULL
+                 ),
+                 totals AS (SELECT grp, SUM(q) AS total FROM valid GROUP BY grp)
+            SELECT pos, grp,
+                   q / total * 100 AS pct_ind,
+                   SUM(q / total * 100) OVER (
+                       {partition}ORDER BY q DESC, pos ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                   ) AS pct_acum,
+                   ROW_NUMBER() OVER ({partition}ORDER BY q DESC, pos) - 1 AS rnk
+            FROM valid JOIN totals USING (grp)
+            WHERE total > 0
+        """)
+        # Ponto de corte de cada grupo: a primeira posição cujo acumulado atinge o corte (ou a última).
+        cut_columns = ", ".join(
+            f"COALESCE(MIN(CASE WHEN pct_acum >= {float(cut)!r} THEN rnk END), MAX(rnk)) AS c{c}"
+            for c, cut in enumerate(cuts)
+        )
+        when = " ".join(f"WHEN r.rnk <= k.c{c} THEN {c}" for c in range(len(cuts)))
+        self.conn.execute(f"""
+            INSERT INTO {table}
+            SELECT {j}, r.pos, CASE {when} ELSE {len(cuts)} END, r.pct_ind, r.pct_acum
+            FROM ranked r JOIN (SELECT grp, {cut_columns} FROM ranked GROUP BY grp) k USING (grp)
+        """ if when else f"INSERT INTO {table} SELECT {j}, pos, {len(cuts)}, pct_ind, pct_acum FROM ranked")
+        self.conn.execute("DROP TABLE ranked")
+
+    def _classified(self, metric: str, tipo: str | None, classes=None, group_by: str | None = None) -> tuple[str, list]:
+        # Linhas com classe na métrica (junção com a tabela de classes do agrupamento), filtradas por tipo e classes.
+        clauses, params = ["c.m = ?"], [list(self.metrics).index(metric)]
+        if tipo is not None:
+            clauses.append("i.tipo = ?")
+            params.append(str(tipo))
+        if classes is not None:
+            codes = [CLASSES.index(c) for c in classes]
+            if not codes:
+                clauses.append("1 = 0")
+            else:
+                clauses.append(f"c.code IN ({', '.join('?' * len(codes))})")
+                params.extend(codes)
+        table = self._classes_table(group_by)
+        return f"{_TABLE} i JOIN {table} c ON c.pos = i.pos WHERE {' AND '.join(clauses)}", params
+
+    def class_counts(self, metric: str, tipo: str | None = None, group_by: str | None = None) -> dict:
+        """Linhas por classe (todas as classes, mesmo com zero) na classificação de ``group_by``."""
+        source, params = self._classified(metric, tipo, group_by=group_by)
+        found = dict(self._execute(f"SELECT c.code, COUNT(*) FROM {source} GROUP BY c.code", params))
+        return {cls: int(found.get(code, 0)) for code, cls in enumerate(CLASSES)}
+
+    def count(self, tipo: str | None = None) -> int:
+        if tipo is None:
+            return self.n_rows
+        return int(self._execute(f"SELECT COUNT(*) FROM {_TABLE} WHERE tipo = ?", (str(tipo),))[0][0])
+
+    def stats(self, metric: str, tipo: str | None = None) -> dict:
+        """Soma, média, máximo e mínimo da métrica (vazios ignorados; sem valores, NaN e soma 0)."""
+        col = self._metric_column(metric)
+        where, params = ("WHERE tipo = ?", (str(tipo),)) if tipo is not None else ("", ())
+        total, mean, high, low = self._execute(
+            f"SELECT COALESCE(SUM({col}), 0), AVG({col}), MAX({col}), MIN({col}) FROM {_TABLE} {where}", params
+        )[0]
+        return {key: np.nan if value is None else float(value)
+                for key, value in (("sum", total), ("mean", mean), ("max", high), ("min", low))}
+
+    def type_totals(self, metric: str, tipo: str | None = None) -> pd.Series:
+        """Soma da métrica por tipo de item, em ordem crescente."""
+        col = self._metric_column(metric)
+        where, params = ("AND tipo = ?", (str(tipo),)) if tipo is not None else ("", ())
+        rows = self._execute(
+            f"SELECT tipo, COALESCE(SUM({col}), 0) AS total FROM {_TABLE} WHERE tipo IS NOT NULL {where} "
+            "GROUP BY tipo ORDER BY total, tipo",
+            params,
+        )
+        return pd.Series([r[1] for r in rows], index=pd.Index([r[0] for r in rows]), dtype=float)
+
+    def top_products(self, metric: str, tipo: str | None = None, classes=None, n: int = 20,
+                     group_by: str | None = None) -> pd.Series:
+        """As ``n`` descrições de maior soma da métrica, em ordem decrescente (filtro por tipo e pelas classes de ``group_by``)."""
+        col = self._metric_column(metric)
+        source, params = self._classified(metric, tipo, classes, group_by)
+        rows = self._execute(
+            f"SELECT i.descricao, COALESCE(SUM(i.{col}), 0) AS total FROM {source} "
+            "AND i.descricao IS NOT NULL GROUP BY i.descricao ORDER BY total DESC, i.descricao LIMIT ?",
+            [*params, int(n)],
+        )
+        return pd.Series([r[1] for r in rows], index=pd.Index([r[0] for r in rows]), dtype=float)
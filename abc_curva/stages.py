@@ -0,0 +1,293 @@
+"""Recálculo em estágios com dependências explícitas.
+
+Cada estágio declara os estágios de que depende (``deps``) e os parâmetros
+que lê (``params``, normalmente valores de widgets). A chave de um estágio é
+formada pelos seus parâmetros e pelas chaves dos estágios anteriores, então
+mudar um parâmetro invalida só os estágios abaixo dele. Os resultados ficam
+memorizados por chave (poucas entradas por estágio, LRU).
+
+Parâmetros com ``_`` no início são passados ao estágio mas não entram na
+chave, como no ``st.cache_data`` (ex.: o arquivo enviado, já representado
+pelo hash do conteúdo).
+
+Estágios ``shared=True`` (só dependem de outros estágios compartilhados)
+podem guardar o resultado numa ``SharedMemo`` comum a várias sessões em vez
+da memória da sessão: a mesma base é calculada uma vez e lida por todas.
+
+Com ``profile=True`` cada estágio executado também registra o pico de
+memória (``tracemalloc``) e as medidas de ``measure(resultado)``; desligado,
+o custo extra é só um contador por estágio. Como o ``tracemalloc`` é global no
+processo, os estágios medidos de todas as sessões rodam um de cada vez.
+"""
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable
+
+PHASES = ("ingest", "normalize", "classify", "filter", "aggregate", "render")
+STATUS_RAN = "executado"
+STATUS_REUSED = "reaproveitado"
+STATUS_SHARED = "compartilhado"
+# Estágio não consultado: todos os dependentes vieram da memória.
+STATUS_SKIPPED = "não necessário"
+
+
+@dataclass
+class Stage:
+    name: str
+    phase: str
+    func: Callable
+    deps: tuple = ()
+    params: tuple = ()
+    max_entries: int = 4
+    shared: bool = False
+
+
+@dataclass
+class StageRun:
+    name: str
+    phase: str
+    status: str
+    seconds: float
+    # Só com ``profile``: pico de memória alocada durante o estágio (Python e NumPy)
+    peak_bytes: int | None = None
+    # Só com ``profile``: medidas do resultado (ex.: linhas, bytes enviados ao navegador)
+    details: dict = field(default_factory=dict)
+
+
+@dataclass
+class StageStats:
+    """Execuções acumuladas de um estágio entre reruns."""
+
+    ran: int = 0
+    reused: int = 0
+    seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float | None:
+        total = self.ran + self.reused
+        return self.reused / total if total else None
+
+
+# O tracemalloc é global no processo: sessões medindo ao mesmo tempo zerariam o
+# pico umas das outras (``reset_peak``) e uma poderia desligá-lo no meio do
+# estágio de outra. Os estágios medidos rodam um por vez; os não medidos não esperam.
+_TRACE_LOCK = threading.Lock()
+
+
+def _run_traced(func: Callable, inputs: dict):
+    # Pico relativo ao início do estágio; o tracemalloc só fica ligado enquanto ele roda.
+    # Alocações de outras threads no mesmo intervalo entram no pico (limite superior).
+    with _TRACE_LOCK:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            value = func(**inputs)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - base
+        finally:
+            if started:
+                tracemalloc.stop()
+    return value, seconds, max(peak, 0)
+
+
+class SharedMemo:
+    """Memória dos estágios ``shared=True`` comum a várias sessões (ex.: uma por processo do servidor).
+
+    Cada chave é calculada uma vez, mesmo com sessões pedindo-a ao mesmo
+    tempo. Os resultados são lidos por todas as sessões e não podem ser
+    alterados no lugar; DataFrames do pandas (copy-on-write) só geram cópias
+    em quem os deriva.
+    """
+
+    def __init__(self, max_entries: int = 4):
+        self.max_entries = max_entries
+        self._entries: dict[str, OrderedDict] = {}
+        self._lock = threading.Lock()
+        self._computing: dict[tuple, threading.Lock] = {}
+
+    def lookup(self, name: str, key: tuple) -> tuple[bool, object]:
+        with self._lock:
+            entries = self._entries.get(name)
+            if entries is None or key not in entries:
+                return False, None
+            entries.move_to_end(key)
+            return True, entries[key]
+
+    def store(self, name: str, key: tuple, value, max_entries: int) -> None:
+        with self._lock:
+            entries = self._entries.setdefault(name, OrderedDict())
+            entries[key] = value
+            while len(entries) > max(max_entries, self.max_entries):
+                entries.popitem(last=False)
+
+    @contextmanager
+    def computing(self, name: str, key: tuple):
+        # Uma sessão calcula; as outras esperam e depois encontram o resultado em ``lookup``.
+        with self._lock:
+            lock = self._computing.setdefault((name, key), threading.Lock())
+        with lock:
+            yield
+        with self._lock:
+            self._computing.pop((name, key), None)
+
+    def values(self) -> list:
+        with self._lock:
+            return [v for entries in self._entries.values() for v in entries.values()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class StageGraph:
+    """Definição dos estágios; o estado (memória e log) fica em ``StageSession``."""
+
+    def __init__(self, max_entries: int = 4):
+        self.max_entries = max_entries
+        self._stages: dict[str, Stage] = {}
+
+    def stage(self, name: str, phase: str, deps: tuple = (), params: tuple = (), max_entries: int | None = None,
+              shared: bool = False):
+        if phase not in PHASES:
+            raise ValueError(f"fase inválida: {phase!r} (use uma de {PHASES})")
+        unknown = [d for d in deps if d not in self._stages]
+        if unknown:
+            raise ValueError(f"estágio {name!r} depende de estágios não declarados: {unknown}")
+        # Um resultado compartilhado não pode embutir o de um estágio da sessão.
+        private = [d for d in deps if not self._stages[d].shared]
+        if shared and private:
+            raise ValueError(f"estágio compartilhado {name!r} depende de estágios não compartilhados: {private}")
+
+        def register(func):
+            self._stages[name] = Stage(name, phase, func, tuple(deps), tuple(params), max_entries or self.max_entries, shared)
+            return func
+
+        return register
+
+    def session(self, memo: dict | None = None, stats: dict | None = None, profile: bool = False,
+                measure: Callable | None = None, shared: SharedMemo | None = None) -> "StageSession":
+        return StageSession(self, memo, stats, profile, measure, shared)
+
+    def __getitem__(self, name: str) -> Stage:
+        return self._stages[name]
+
+    def __iter__(self):
+        return iter(self._stages.values())
+
+
+class StageSession:
+    """Memória dos estágios de uma sessão e o log da execução atual."""
+
+    def __init__(self, graph: StageGraph, memo: dict | None = None, stats: dict | None = None,
+                 profile: bool = False, measure: Callable | None = None, shared: SharedMemo | None = None):
+        # ``memo`` e ``stats`` podem vir de fora (ex.: ``st.session_state``) para durar entre reruns.
+        # Com ``shared``, os estágios ``shared=True`` usam essa memória em vez de ``memo``.
+        self.graph = graph
+        self.shared = shared
+        self.params: dict = {}
+        self.runs: list[StageRun] = []
+        self.profile = profile
+        self.measure = measure
+        self._memo: dict[str, OrderedDict] = memo if memo is not None else {}
+        self._stats: dict[str, StageStats] = stats if stats is not None else {}
+        self._keys: dict[str, tuple] = {}
+
+    def begin(self, **params) -> "StageSession":
+        """Início de um rerun: zera o log e os parâmetros informados."""
+        self.params = dict(params)
+        self.runs = []
+        self._keys = {}
+        return self
+
+    def set(self, **params) -> None:
+        self.params.update(params)
+        # Chaves já calculadas podem depender dos parâmetros alterados.
+        self._keys = {}
+
+    def key(self, name: str) -> tuple:
+        if name not in self._keys:
+            stage = self.graph[name]
+            own = tuple((p, self._param(stage, p)) for p in stage.params if not p.startswith("_"))
+            self._keys[name] = (own, tuple(self.key(d) for d in stage.deps))
+        return self._keys[name]
+
+    def get(self, name: str):
+        stage = self.graph[name]
+        key = self.key(name)
+        if stage.shared and self.shared is not None:
+            return self._get_shared(stage, key)
+        memo = self._memo.setdefault(name, OrderedDict())
+        if key in memo:
+            memo.move_to_end(key)
+            self._log(stage, STATUS_REUSED, 0.0)
+            return memo[key]
+
+        value = self._run(stage)
+        memo[key] = value
+        while len(memo) > stage.max_entries:
+            memo.popitem(last=False)
+        return value
+
+    def _get_shared(self, stage: Stage, key: tuple):
+        found, value = self.shared.lookup(stage.name, key)
+        if not found:
+            with self.shared.computing(stage.name, key):
+                found, value = self.shared.lookup(stage.name, key)
+                if not found:
+                    value = self._run(stage)
+                    self.shared.store(stage.name, key, value, stage.max_entries)
+                    return value
+        self._log(stage, STATUS_SHARED, 0.0)
+        return value
+
+    def _run(self, stage: Stage):
+        inputs = {d: self.get(d) for d in stage.deps}
+        inputs.update({p.lstrip("_"): self._param(stage, p) for p in stage.params})
+        if self.profile:
+            value, seconds, peak = _run_traced(stage.func, inputs)
+            details = self.measure(value) if self.measure else {}
+            self._log(stage, STATUS_RAN, seconds, peak, details)
+        else:
+            start = time.perf_counter()
+            value = stage.func(**inputs)
+            self._log(stage, STATUS_RAN, time.perf_counter() - start)
+        return value
+
+    def report(self) -> list[StageRun]:
+        """Todos os estágios do grafo, na ordem de declaração, com o status deste rerun."""
+        runs = {r.name: r for r in self.runs}
+        return [runs.get(s.name) or StageRun(s.name, s.phase, STATUS_SKIPPED, 0.0) for s in self.graph]
+
+    def stats(self) -> dict[str, StageStats]:
+        """Execuções e reaproveitamentos acumulados por estágio, na ordem de declaração."""
+        return {s.name: self._stats[s.name] for s in self.graph if s.name in self._stats}
+
+    def clear(self) -> None:
+        self._memo.clear()
+        self._keys = {}
+
+    def _param(self, stage: Stage, name: str):
+        try:
+            return self.params[name]
+        except KeyError:
+            raise KeyError(f"parâmetro {name!r} do estágio {stage.name!r} não informado") from None
+
+    def _log(self, stage: Stage, status: str, seconds: float, peak_bytes: int | None = None, details: dict | None = None) -> None:
+        # Cada estágio aparece uma vez por rerun, mesmo se pedido por vários dependentes.
+        if any(r.name == stage.name for r in self.runs):
+            return
+        self.runs.append(StageRun(stage.name, stage.phase, status, seconds, peak_bytes, details or {}))
+        stats = self._stats.setdefault(stage.name, StageStats())
+        if status == STATUS_RAN:
+            stats.ran += 1
+            stats.seconds += seconds
+        else:
+            stats.reused += 1
@@ -0,0 +1,75 @@
+"""Bases sintéticas no formato das planilhas ABC, para os benchmarks.
+
+As quantidades seguem uma Pareto (poucos produtos concentram o volume, como
+numa curva ABC real), as linhas vêm em ordem decrescente de quantidade com
+``% individual``/``% acumulado`` em fração (igual à planilha modelo) e os
+números são gravados como texto pt-BR (``1.234,56``), que é o caso caro do
+parser. Uma fração das células numéricas fica vazia.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .exports import write_csv, write_parquet, write_xlsx
+from .pipeline import COL_ACUMULADO, COL_DESCRICAO, COL_INDIVIDUAL, COL_TIPO, DEFAULT_SHEET, INPUT_FORMATS
+
+SYNTHETIC_TIPOS = ("Produto", "Revenda", "Matéria-prima", "Embalagem", "Insumo")
+_TIPO_WEIGHTS = (0.55, 0.2, 0.12, 0.08, 0.05)
+_NAME_WORDS = ("ALHO", "CEBOLA", "PIMENTA", "OREGANO", "GERGELIM", "CANELA", "COMINHO", "PAPRICA", "LOURO", "CRAVO")
+_NAME_SUFFIXES = ("GRANULADO", "MOIDO", "INTEIRO", "FLOCOS", "PO", "FATIADO")
+# Expoente ~1.16 dá a proporção 80/20 de Pareto.
+_PARETO_SHAPE = 1.16
+# Linhas por planilha no Excel, sem o cabeçalho
+XLSX_MAX_ROWS = 1_048_575
+
+
+def _format_ptbr(values: np.ndarray, decimals: int) -> pd.Series:
+    # "1234.5" → "1.234,50"; NaN vira célula vazia.
+    text = pd.Series(values).map(f"{{:,.{decimals}f}}".format).str.translate(str.maketrans(",.", ".,"))
+    return text.where(~np.isnan(values), None).astype(pd.StringDtype("pyarrow"))
+
+
+def synthetic_dataset(n_rows: int, seed: int = 0, missing_ratio: float = 0.01, col_quantidade: str = "KG") -> pd.DataFrame:
+    """Base com as colunas da planilha modelo e números em texto pt-BR."""
+    rng = np.random.default_rng(seed)
+    quantidade = -np.sort(-np.round((rng.pareto(_PARETO_SHAPE, n_rows) + 1) * 10, 2))
+    individual = quantidade / quantidade.sum()
+    acumulado = np.cumsum(individual)
+
+    words = np.array(_NAME_WORDS)[rng.integers(len(_NAME_WORDS), size=n_rows)]
+    suffixes = np.array(_NAME_SUFFIXES)[rng.integers(len(_NAME_SUFFIXES), size=n_rows)]
+    codes = pd.Series(rng.permutation(n_rows)).astype(str).str.zfill(len(str(n_rows)))
+    descricao = pd.Series(words) + " " + pd.Series(suffixes) + " " + codes
+    tipo = np.array(SYNTHETIC_TIPOS)[rng.choice(len(SYNTHETIC_TIPOS), size=n_rows, p=_TIPO_WEIGHTS)]
+
+    columns = {}
+    for name, values, decimals in ((col_quantidade, quantidade, 2), (COL_INDIVIDUAL, individual, 8), (COL_ACUMULADO, acumulado, 8)):
+        values = values.copy()
+        values[rng.random(n_rows) < missing_ratio] = np.nan
+        columns[name] = _format_ptbr(values, decimals)
+    return pd.DataFrame({
+        COL_DESCRICAO: descricao.astype(pd.StringDtype("pyarrow")),
+        col_quantidade: columns[col_quantidade],
+        COL_INDIVIDUAL: columns[COL_INDIVIDUAL],
+        COL_TIPO: pd.Categorical(tipo, categories=SYNTHETIC_TIPOS),
+        COL_ACUMULADO: columns[COL_ACUMULADO],
+    })
+
+
+def write_dataset(df: pd.DataFrame, path: Path) -> Path:
+    """Grava ``df`` no formato da extensão de ``path`` (.xlsx na aba padrão, .csv pt-BR ou .parquet)."""
+    fmt = INPUT_FORMATS.get(path.suffix.lower())
+    if fmt is None:
+        raise ValueError(f"extensão não suportada: {path.suffix!r} (use uma de {tuple(INPUT_FORMATS)})")
+    if fmt == "xlsx" and len(df) > XLSX_MAX_ROWS:
+        raise ValueError(f"o Excel aceita até {XLSX_MAX_ROWS:,} linhas por planilha ({len(df):,} pedidas)")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as out:
+        if fmt == "xlsx":
+            write_xlsx({DEFAULT_SHEET: df}, out)
+        elif fmt == "csv":
+            write_csv(df, out)
+        else:
+            write_parquet(df, out)
+    return path
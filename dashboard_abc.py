@@ -1,940 +1,1562 @@
-import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from pathlib import Path
-from io import BytesIO
-
-# Configuração da página
-st.set_page_config(page_title="Análise Curva ABC", layout="wide")
-
-# Sidebar com instruções
-with st.sidebar:
-    st.markdown("## 📋 Instruções de Uso")
-    st.markdown("""
-    **Bem-vindo ao Dashboard ABC!** 
-    
-    Este aplicativo ajuda você a analisar a curva ABC dos seus produtos.
-    
-    ### Como usar:
-    1. **Upload do Arquivo**: Faça upload de um arquivo Excel (.xlsx) com os dados dos produtos.
-    
-    2. **Colunas Necessárias**:
-       - `descricao`: Nome do produto
-       - `KG`: Quantidade em quilogramas
-       - `% individual`: Percentual individual
-       - `Tipo Item`: Categoria do produto
-       - `% acumulado`: Percentual acumulado
-    
-    3. **Filtros**:
-       - Selecione o percentual de faturamento (60%-100%)
-       - Escolha o tipo de item ou 'Todos'
-       - Selecione o tipo de análise
-    
-    4. **Visualizações**:
-       - Curva ABC (Pareto)
-       - Distribuição por tipo
-       - Tabela de ranking
-       - Distribuição das classes ABC
-    
-    ### Dicas:
-    - Use os filtros para focar em categorias específicas
-    - A curva ABC classifica produtos em A (80%), B (15%), C (5%)
-    - Produtos A são os mais importantes
-    """)
-
-# CSS customizado
-st.markdown("""
-    <style>
-    .main {
-        background: linear-gradient(135deg, #0f0f1e 0%, #1a1a2e 100%);
-    }
-
-    div.stDownloadButton > button {
-        width: 100%;
-        background: linear-gradient(135deg, #06d6a0 0%, #1f77b4 100%);
-        color: #0f0f1e;
-        border: 1px solid rgba(255, 255, 255, 0.15);
-        border-radius: 12px;
-        padding: 0.7rem 1rem;
-        font-weight: 700;
-        letter-spacing: 0.2px;
-        box-shadow: 0 8px 18px rgba(0, 0, 0, 0.35);
-        transition: transform 120ms ease, box-shadow 120ms ease, filter 120ms ease;
-    }
-
-    div.stDownloadButton > button:hover {
-        filter: brightness(1.05);
-        transform: translateY(-1px);
-        box-shadow: 0 12px 24px rgba(0, 0, 0, 0.45);
-        border-color: rgba(255, 255, 255, 0.22);
-    }
-
-    div.stDownloadButton > button:active {
-        transform: translateY(0px);
-        box-shadow: 0 8px 18px rgba(0, 0, 0, 0.35);
-    }
-
-    div.stDownloadButton > button:focus,
-    div.stDownloadButton > button:focus-visible {
-        outline: none !important;
-        box-shadow: 0 0 0 3px rgba(6, 214, 160, 0.25), 0 12px 24px rgba(0, 0, 0, 0.45);
-    }
-
-    div.stDownloadButton > button:disabled {
-        background: rgba(255, 255, 255, 0.08) !important;
-        color: rgba(255, 255, 255, 0.55) !important;
-        border-color: rgba(255, 255, 255, 0.10) !important;
-        box-shadow: none !important;
-        transform: none !important;
-        cursor: not-allowed;
-    }
-
-    div.stDownloadButton {
-        margin-top: 0.25rem;
-        margin-bottom: 0.25rem;
-    }
-    
-    [data-testid="stMetric"] {
-        background-color: rgba(31, 119, 180, 0.1);
-        padding: 20px;
-        border-radius: 12px;
-        border-left: 4px solid #1f77b4;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.2);
-    }
-    
-    h1, h2, h3 {
-        color: #ffffff;
-        font-weight: 700;
-        letter-spacing: 0.5px;
-    }
-    
-    .stDataFrame {
-        background-color: #1c1f26;
-    }
-    
-    .sidebar .sidebar-content {
-        background: linear-gradient(180deg, #1a1a2e 0%, #16213e 100%);
-    }
-    
-    .stSidebar {
-        background: linear-gradient(180deg, #1a1a2e 0%, #16213e 100%);
-        border-right: 2px solid #0f3460;
-    }
-    
-    .stMarkdown {
-        color: #e0e0e0;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-# Definir valor padrão para analysis_type
-analysis_type = "Análise ABC"
-
-# Header padrão
-col1, col2 = st.columns([1, 4])
-with col1:
-    st.markdown("## 📊 ABC")
-with col2:
-    st.markdown(f"## SEGMENTAÇÃO DE PRODUTOS - {analysis_type}")
-
-st.markdown("---")
-
-data_source = st.radio("Fonte dos dados", options=["Planilhas fixas", "Upload"], horizontal=True, index=0)
-
-_base_dir = Path(__file__).resolve().parent
-_fixed_files = {
-    "ABC PLAN.xlsx": _base_dir / "ABC PLAN.xlsx",
-    "Curva ABC (QTD).xlsx": _base_dir / "Curva ABC (QTD).xlsx",
-}
-
-excel_source = None
-file_name = None
-
-if data_source == "Planilhas fixas":
-    fixed_choice = st.selectbox("Selecione a planilha", options=list(_fixed_files.keys()))
-    fixed_path = _fixed_files[fixed_choice]
-    if not fixed_path.exists():
-        st.error(f"❌ Planilha fixa não encontrada: {fixed_path}")
-        st.stop()
-    excel_source = fixed_path
-    file_name = fixed_path.name.lower()
-else:
-    uploaded_file = st.file_uploader("📤 Faça upload do arquivo Excel", type=['xlsx'])
-    if uploaded_file is not None:
-        excel_source = uploaded_file
-        file_name = uploaded_file.name.lower()
-
-if excel_source is not None:
-    # Detectar o tipo de arquivo baseado no nome
-    
-    if "abc plan" in file_name:
-        selected_sheet = "Planilha1"  # Aba padrão do Excel
-        analysis_type = "Volume (KG)"
-        col_quantidade = "KG"
-    elif "curva abc" in file_name and "qtd" in file_name:
-        selected_sheet = "Planilha1"  # Aba padrão do Excel
-        analysis_type = "Quantidade (QTD)"
-        col_quantidade = "Total"
-    else:
-        st.error("❌ Nome do arquivo não reconhecido. Use 'ABC PLAN.xlsx' ou 'Curva ABC (QTD).xlsx'")
-        st.stop()
-
-    try:
-        df = pd.read_excel(excel_source, sheet_name=selected_sheet)
-    except Exception as e:
-        st.error(f"❌ Erro ao ler o arquivo Excel: {str(e)}")
-        st.stop()
-
-    df.columns = df.columns.astype(str).str.strip()
-    
-    # Atualizar header com o tipo de análise detectado
-    col1, col2 = st.columns([1, 4])
-    with col1:
-        st.markdown("## 📊 ABC")
-    with col2:
-        st.markdown(f"## SEGMENTAÇÃO DE PRODUTOS - {analysis_type}")
-
-    st.markdown("---")
-    
-    # Nomes das colunas esperadas
-    col_descricao = "descricao"
-    col_individual = "% individual"
-    col_tipo = "Tipo Item"
-    col_acumulado = "% acumulado"
-
-    def _find_col(df_: pd.DataFrame, expected: str) -> str | None:
-        if expected in df_.columns:
-            return expected
-        expected_lower = str(expected).strip().lower()
-        for c in df_.columns:
-            if str(c).strip().lower() == expected_lower:
-                return c
-        return None
-
-    col_descricao_found = _find_col(df, col_descricao)
-    col_quantidade_found = _find_col(df, col_quantidade)
-    col_individual_found = _find_col(df, col_individual)
-    col_tipo_found = _find_col(df, col_tipo)
-    col_acumulado_found = _find_col(df, col_acumulado)
-    
-    # Validação de colunas baseada no tipo de arquivo
-    if "abc plan" in file_name:
-        required_cols = [col_descricao, col_quantidade, col_individual, col_tipo, col_acumulado]
-    elif "curva abc" in file_name and "qtd" in file_name:
-        required_cols = [col_descricao, col_quantidade]
-        # Para QTD, se não tiver as colunas calculadas, vamos criá-las
-        if col_individual_found is None:
-            df[col_individual] = None
-            col_individual_found = col_individual
-        if col_tipo_found is None:
-            df[col_tipo] = "Produto"  # Valor padrão
-            col_tipo_found = col_tipo
-        if col_acumulado_found is None:
-            df[col_acumulado] = None
-            col_acumulado_found = col_acumulado
-    else:
-        required_cols = [col_descricao, col_quantidade, col_individual, col_tipo, col_acumulado]
-    
-    found_cols = {
-        col_descricao: col_descricao_found,
-        col_quantidade: col_quantidade_found,
-        col_individual: col_individual_found,
-        col_tipo: col_tipo_found,
-        col_acumulado: col_acumulado_found,
-    }
-    missing_cols = [col for col in required_cols if found_cols[col] is None]
-    
-    if missing_cols:
-        st.error(f"❌ Colunas não encontradas: {missing_cols}")
-        st.write("Colunas encontradas no arquivo:")
-        st.write(list(df.columns))
-        st.stop()
-
-    col_descricao = col_descricao_found
-    col_quantidade = col_quantidade_found
-    col_individual = col_individual_found
-    col_tipo = col_tipo_found
-    col_acumulado = col_acumulado_found
-
-    def _to_number_ptbr(series: pd.Series) -> pd.Series:
-        s0 = series.copy()
-        if pd.api.types.is_numeric_dtype(s0):
-            return pd.to_numeric(s0, errors='coerce')
-
-        s = s0.astype(str).str.strip()
-        s = s.replace({"": pd.NA, "nan": pd.NA, "None": pd.NA, "NaN": pd.NA})
-        s = s.str.replace("%", "", regex=False)
-        s = s.str.replace(" ", "", regex=False)
-        s = s.str.replace("\u00a0", "", regex=False)
-        s = s.str.replace(r"[^0-9,\.\-]", "", regex=True)
-
-        has_comma = s.str.contains(",", na=False)
-        has_dot = s.str.contains(r"\.", na=False)
-
-        # Caso pt-BR típico: 1.234,56 -> 1234.56
-        mask_pt = has_comma & has_dot
-        s.loc[mask_pt] = s.loc[mask_pt].str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
-
-        # Caso com vírgula apenas: 1234,56 -> 1234.56
-        mask_comma_only = has_comma & (~has_dot)
-        s.loc[mask_comma_only] = s.loc[mask_comma_only].str.replace(",", ".", regex=False)
-
-        # Caso com ponto apenas: 1234.56 (já OK). Se tiver separador de milhar com vírgula: 1,234.56 -> 1234.56
-        mask_dot_only = has_dot & (~has_comma)
-        s.loc[mask_dot_only] = s.loc[mask_dot_only].str.replace(",", "", regex=False)
-
-        # Caso sem separador: 1234
-        return pd.to_numeric(s, errors='coerce')
-
-    df_initial_count = len(df)
-    load_messages = []
-    nan_before = {
-        col_quantidade: df[col_quantidade].isna().sum(),
-        col_individual: df[col_individual].isna().sum(),
-        col_acumulado: df[col_acumulado].isna().sum(),
-    }
-
-    df[col_individual] = _to_number_ptbr(df[col_individual])
-    df[col_acumulado] = _to_number_ptbr(df[col_acumulado])
-    df[col_quantidade] = _to_number_ptbr(df[col_quantidade])
-
-    nan_after = {
-        col_quantidade: df[col_quantidade].isna().sum(),
-        col_individual: df[col_individual].isna().sum(),
-        col_acumulado: df[col_acumulado].isna().sum(),
-    }
-
-    coerced = {k: nan_after[k] - nan_before[k] for k in nan_after}
-    load_messages.append(
-        f"🔎 Diagnóstico de conversão (novos NaN após parsing): "
-        f"{col_quantidade}={coerced[col_quantidade]}, % individual={coerced[col_individual]}, % acumulado={coerced[col_acumulado]}"
-    )
-
-    missing_acum_ratio = float(df[col_acumulado].isna().mean())
-    missing_ind_ratio = float(df[col_individual].isna().mean())
-    if missing_acum_ratio > 0.1 or missing_ind_ratio > 0.1:
-        df_calc = df.dropna(subset=[col_quantidade]).copy()
-        total_quantidade_calc = float(df_calc[col_quantidade].sum())
-        if total_quantidade_calc > 0:
-            df_calc = df_calc.sort_values(by=col_quantidade, ascending=False)
-            df_calc[col_individual] = (df_calc[col_quantidade] / total_quantidade_calc) * 100
-            df_calc[col_acumulado] = df_calc[col_individual].cumsum()
-            df = df_calc
-            df_initial_count = len(df)
-            load_messages.append(
-                f"🧮 Recalculei '% individual' e '% acumulado' a partir de '{col_quantidade}' "
-                "(a planilha estava com muitos valores ausentes nessas colunas)."
-            )
-    
-    # REMOVER LINHAS COM DADOS INCOMPLETOS
-    df = df.dropna(subset=[col_quantidade, col_individual, col_acumulado])
-    df_after_count = len(df)
-
-    load_messages.append(f"Dados carregados: {df_initial_count} linhas → {df_after_count} linhas (removidas {df_initial_count - df_after_count} incompletas)")
-    
-    # Se %acumulado está em formato decimal (0-1), converter para porcentagem (0-100)
-    if df[col_acumulado].max() < 2:
-        df[col_acumulado] = df[col_acumulado] * 100
-    if df[col_individual].max() < 2:
-        df[col_individual] = df[col_individual] * 100
-
-    df_for_class = df.dropna(subset=[col_quantidade]).sort_values(by=col_quantidade, ascending=False).reset_index()
-    total_for_class = float(df_for_class[col_quantidade].sum())
-    if total_for_class > 0:
-        df_for_class['_pct_ind_calc'] = (df_for_class[col_quantidade] / total_for_class) * 100
-        df_for_class['_pct_acum_calc'] = df_for_class['_pct_ind_calc'].cumsum()
-
-        idx_a = df_for_class.loc[df_for_class['_pct_acum_calc'] >= 80].index.min()
-        idx_b = df_for_class.loc[df_for_class['_pct_acum_calc'] >= 95].index.min()
-
-        if pd.isna(idx_a):
-            idx_a = df_for_class.index.max()
-        if pd.isna(idx_b):
-            idx_b = df_for_class.index.max()
-
-        def _class_from_pos(pos: int) -> str:
-            if pos <= idx_a:
-                return 'A'
-            if pos <= idx_b:
-                return 'B'
-            return 'C'
-
-        df_for_class['Classificação ABC'] = df_for_class.index.to_series().apply(_class_from_pos)
-        class_map = df_for_class.set_index('index')['Classificação ABC']
-        df['Classificação ABC'] = df.index.map(class_map)
-    else:
-        df['Classificação ABC'] = pd.NA
-    
-    # ===== FILTROS SUPERIORES =====
-    col_filter1, col_filter2, col_filter3 = st.columns(3)
-    
-    with col_filter1:
-        st.markdown("### Selecione o percentual de faturamento")
-        threshold_options = {
-            '60%': 60,
-            '70%': 70,
-            '80%': 80,
-            '90%': 90,
-            '100%': 100
-        }
-        selected_threshold = st.radio("", options=list(threshold_options.keys()), horizontal=True)
-        threshold_value = threshold_options[selected_threshold]
-    
-    with col_filter2:
-        if "qtd" in file_name:
-            st.markdown("### Tipo de Item")
-            st.info("📝 Para análise por quantidade, todos os itens são categorizados como 'Produto'")
-            selected_tipo = 'Todos'  # Força 'Todos' para QTD
-        else:
-            st.markdown("### Selecione o tipo de item")
-            tipos = sorted([str(t) for t in df[col_tipo].dropna().unique() if str(t).strip() != ''])
-            selected_tipo = st.selectbox("", ['Todos'] + list(tipos), label_visibility="collapsed")
-    
-    with col_filter3:
-        if "qtd" in file_name:
-            st.markdown("### Análise selecionada")
-            analysis = st.selectbox("", ["Quantidade"], label_visibility="collapsed")
-        else:
-            st.markdown("### Análise selecionada")
-            analysis = st.selectbox("", ["Faturamento", "Volume", "Margem"], label_visibility="collapsed")
-    
-    # Filtrar dados
-    if selected_tipo != 'Todos':
-        df_filtered = df[df[col_tipo] == selected_tipo].copy()
-    else:
-        df_filtered = df.copy()
-    
-    # Calcular produtos na classe A até o threshold - USANDO DADOS NÃO FILTRADOS
-    df_sorted_all = df.sort_values(by=col_acumulado)
-    _eps = 1e-9
-    if threshold_value >= 100:
-        produtos_ate_threshold = int(df[col_quantidade].notna().sum())
-        total_quantidade_threshold = df[col_quantidade].sum()
-    else:
-        produtos_ate_threshold = len(df_sorted_all[df_sorted_all[col_acumulado] <= (threshold_value + _eps)])
-        total_quantidade_threshold = df_sorted_all[df_sorted_all[col_acumulado] <= (threshold_value + _eps)][col_quantidade].sum()
-    total_quantidade_all = df[col_quantidade].sum()
-    
-    st.markdown("---")
-    
-    # ===== KPIs PRINCIPAIS =====
-    metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
-    
-    with metric_col1:
-        st.metric(
-            label="PRODUTOS",
-            value=produtos_ate_threshold,
-            delta=f"{(produtos_ate_threshold/len(df)*100):.0f}% do total"
-        )
-    
-    with metric_col2:
-        if "qtd" in file_name:
-            st.metric(
-                label="REPRESENTAM",
-                value=f"{selected_threshold}",
-                delta="da quantidade total"
-            )
-        else:
-            st.metric(
-                label="REPRESENTAM",
-                value=f"{selected_threshold}",
-                delta="do faturamento"
-            )
-    
-    with metric_col3:
-        st.metric(
-            label=f"TOTAL {col_quantidade}",
-            value=f"{total_quantidade_threshold:,.0f}",
-            delta=f"de {total_quantidade_all:,.0f} {col_quantidade} totais"
-        )
-    
-    with metric_col4:
-        st.metric(
-            label="CLASSES ABC",
-            value=f"{len(df[df['Classificação ABC']=='A'])} / {len(df[df['Classificação ABC']=='B'])} / {len(df[df['Classificação ABC']=='C'])}",
-            delta="A / B / C (Total)"
-        )
-    
-    st.markdown("---")
-    
-    # ===== GRÁFICOS PRINCIPAIS =====
-    if "qtd" in file_name:
-        charts_ctrl1, charts_ctrl2 = st.columns([2, 3])
-        with charts_ctrl1:
-            qtd_classes = st.multiselect(
-                "Filtrar por Classes ABC:",
-                ["A", "B", "C"],
-                default=["A", "B", "C"],
-                key="qtd_classes_filter",
-            )
-        with charts_ctrl2:
-            st.markdown(" ")
-    else:
-        pareto_col1, pareto_col2 = st.columns([2, 3])
-        with pareto_col1:
-            pareto_view = st.selectbox(
-                "",
-                ["Completo", "Top N por Classe", "Top N (Geral)"],
-                label_visibility="collapsed",
-            )
-        with pareto_col2:
-            if pareto_view == "Top N por Classe":
-                pareto_classes = st.multiselect(
-                    "",
-                    ["A", "B", "C"],
-                    default=["A"],
-                    label_visibility="collapsed",
-                )
-                pareto_top_n = st.slider(
-                    "",
-                    min_value=5,
-                    max_value=50,
-                    value=10,
-                    step=5,
-                    label_visibility="collapsed",
-                )
-            elif pareto_view == "Top N (Geral)":
-                pareto_classes = []
-                pareto_top_n = st.slider(
-                    "",
-                    min_value=5,
-                    max_value=100,
-                    value=20,
-                    step=5,
-                    label_visibility="collapsed",
-                )
-            else:
-                pareto_classes = []
-                pareto_top_n = 0
-    col_graph1, col_graph2 = st.columns(2)
-    
-    with col_graph1:
-        if "qtd" in file_name:
-            st.markdown("### 📊 TOTAIS POR PRODUTO")
-            
-            # Filtrar dados baseado nas classes selecionadas
-            if qtd_classes:
-                df_qtd_filtered = df_filtered[df_filtered['Classificação ABC'].isin(qtd_classes)]
-            else:
-                df_qtd_filtered = df_filtered.iloc[0:0]  # DataFrame vazio se nenhuma classe selecionada
-            
-            # Gráfico de barras dos top produtos por quantidade
-            produto_totals = df_qtd_filtered.groupby(col_descricao)[col_quantidade].sum().sort_values(ascending=False).head(20)
-            
-            fig_produto = go.Figure(data=[
-                go.Bar(
-                    y=produto_totals.index,
-                    x=produto_totals.values,
-                    orientation='h',
-                    marker=dict(
-                        color=produto_totals.values,
-                        colorscale=[[0, '#073b4c'], [0.5, '#118ab2'], [1, '#06d6a0']],
-                        line=dict(color='rgba(255,255,255,0.3)', width=1)
-                    ),
-                    text=[f'{v:,.0f}' for v in produto_totals.values],
-                    textposition='outside',
-                    textfont=dict(size=10, color='#ffffff'),
-                    hovertemplate='<b>%{y}</b><br>Total: %{x:,.0f}<extra></extra>'
-                )
-            ])
-            
-            fig_produto.update_layout(
-                title=dict(text='Top 20 Produtos por Quantidade Total', font=dict(size=16, color='#ffffff', family='Arial Black')),
-                xaxis_title=dict(text='Quantidade Total', font=dict(size=12, color='#cccccc')),
-                yaxis_title='',
-                plot_bgcolor='rgba(20, 20, 40, 0.5)',
-                paper_bgcolor='rgba(15, 15, 30, 0.9)',
-                font=dict(color='#ffffff', size=11, family='Arial'),
-                height=550,
-                showlegend=False,
-                xaxis=dict(
-                    showgrid=True, 
-                    gridwidth=1, 
-                    gridcolor='rgba(100,100,100,0.2)',
-                    tickfont=dict(color='#cccccc', size=11)
-                ),
-                yaxis=dict(
-                    tickfont=dict(color='#cccccc', size=11),
-                    autorange='reversed'  # Para mostrar o maior no topo
-                ),
-                margin=dict(l=200, r=80, t=80, b=80)
-            )
-            
-            st.plotly_chart(fig_produto, use_container_width=True)
-        else:
-            st.markdown("### 📊 CURVA ABC")
-            
-            df_plot_base = df_filtered.copy()
-            if pareto_view == "Top N por Classe":
-                if pareto_classes:
-                    parts = []
-                    for cls in pareto_classes:
-                        part = df_plot_base[df_plot_base['Classificação ABC'] == cls]
-                        part = part.dropna(subset=[col_quantidade]).nlargest(pareto_top_n, col_quantidade)
-                        parts.append(part)
-                    if parts:
-                        df_plot_base = pd.concat(parts, axis=0).drop_duplicates()
-                    else:
-                        df_plot_base = df_plot_base.iloc[0:0]
-                else:
-                    df_plot_base = df_plot_base.iloc[0:0]
-            elif pareto_view == "Top N (Geral)":
-                df_plot_base = df_plot_base.dropna(subset=[col_quantidade]).nlargest(pareto_top_n, col_quantidade)
-
-            # Gráfico de Pareto
-            df_plot = df_plot_base.sort_values(by=col_acumulado).reset_index(drop=True)
-            
-            fig_pareto = go.Figure()
-            
-            # Barras
-            fig_pareto.add_trace(go.Bar(
-                x=df_plot[col_descricao],
-                y=df_plot[col_individual],
-                name='% Individual',
-                marker=dict(
-                    color=df_plot['Classificação ABC'].map({'A': '#06d6a0', 'B': '#118ab2', 'C': '#ef476f'}),
-                    line=dict(color='rgba(255,255,255,0.3)', width=1)
-                ),
-                text=[f"{v:.1f}%" for v in df_plot[col_individual]],
-                textposition='outside',
-                textfont=dict(size=10, color='#ffffff'),
-                hovertemplate='<b>%{x}</b><br>% Individual: %{y:.1f}%<extra></extra>'
-            ))
-            
-            # Linha de % acumulado
-            fig_pareto.add_trace(go.Scatter(
-                x=df_plot[col_descricao],
-                y=df_plot[col_acumulado],
-                name='% Acumulado',
-                yaxis='y2',
-                line=dict(color='#ef476f', width=4),
-                mode='lines+markers',
-                marker=dict(size=8, color='#ef476f', symbol='circle', line=dict(color='white', width=2)),
-                hovertemplate='<b>%{x}</b><br>% Acumulado: %{y:.1f}%<extra></extra>',
-                fill='tozeroy',
-                fillcolor='rgba(239, 71, 111, 0.1)'
-            ))
-            
-            # Layout
-            title_text = '📊 Análise de Pareto - Curva ABC'
-            
-            fig_pareto.update_layout(
-                title=dict(text=title_text, font=dict(size=18, color='#ffffff', family='Arial Black')),
-                xaxis_title=dict(text='Produtos', font=dict(size=12, color='#cccccc')),
-                yaxis=dict(
-                    title=dict(text='% Individual', font=dict(color='#118ab2', size=12)),
-                    tickfont=dict(color='#cccccc', size=11),
-                    showgrid=True,
-                    gridwidth=1,
-                    gridcolor='rgba(100,100,100,0.2)',
-                    zeroline=False
-                ),
-                yaxis2=dict(
-                    title=dict(text='% Acumulado', font=dict(color='#ef476f', size=12)),
-                    tickfont=dict(color='#cccccc', size=11),
-                    overlaying='y',
-                    side='right',
-                    range=[0, 110],
-                    zeroline=False
-                ),
-                plot_bgcolor='rgba(20, 20, 40, 0.5)',
-                paper_bgcolor='rgba(15, 15, 30, 0.9)',
-                font=dict(color='#ffffff', size=11, family='Arial'),
-                height=550,
-                hovermode='x unified',
-                showlegend=True,
-                legend=dict(
-                    x=0.01, 
-                    y=0.99, 
-                    bgcolor='rgba(0,0,0,0.5)',
-                    bordercolor='rgba(255,255,255,0.2)',
-                    borderwidth=1,
-                    font=dict(color='#ffffff', size=11)
-                ),
-                margin=dict(l=80, r=80, t=80, b=80)
-            )
-            
-            st.plotly_chart(fig_pareto, use_container_width=True)
-    
-    with col_graph2:
-        if "qtd" in file_name:
-            st.markdown("### 📈 DISTRIBUIÇÃO POR QUANTIDADE")
-        else:
-            st.markdown("### 📈 DISTRIBUIÇÃO POR TIPO DE ITEM")
-        
-        # Gráfico de barras por tipo
-        tipo_summary = df_filtered.groupby(col_tipo)[col_quantidade].sum().sort_values(ascending=True)
-        
-        fig_bar = go.Figure(data=[
-            go.Bar(
-                y=tipo_summary.index,
-                x=tipo_summary.values,
-                orientation='h',
-                marker=dict(
-                    color=tipo_summary.values,
-                    colorscale=[[0, '#073b4c'], [0.5, '#118ab2'], [1, '#06d6a0']],
-                    line=dict(color='rgba(255,255,255,0.3)', width=1)
-                ),
-                text=[f'{v:,.0f}' for v in tipo_summary.values],
-                textposition='outside',
-                textfont=dict(size=11, color='#ffffff'),
-                hovertemplate=f'<b>%{{y}}</b><br>{col_quantidade}: %{{x:,.0f}}<extra></extra>'
-            )
-        ])
-        
-        fig_bar.update_layout(
-            title=dict(text=f'{analysis_type} por Tipo', font=dict(size=14, color='#ffffff', family='Arial Black')),
-            xaxis_title=dict(text=col_quantidade, font=dict(size=11, color='#cccccc')),
-            yaxis_title='',
-            plot_bgcolor='rgba(20, 20, 40, 0.5)',
-            paper_bgcolor='rgba(15, 15, 30, 0.9)',
-            font=dict(color='#ffffff', size=11, family='Arial'),
-            height=550,
-            showlegend=False,
-            xaxis=dict(
-                showgrid=True, 
-                gridwidth=1, 
-                gridcolor='rgba(100,100,100,0.2)',
-                tickfont=dict(color='#cccccc', size=11)
-            ),
-            yaxis=dict(
-                tickfont=dict(color='#cccccc', size=11)
-            ),
-            margin=dict(l=150, r=80, t=80, b=80)
-        )
-        
-        st.plotly_chart(fig_bar, use_container_width=True)
-    
-    st.markdown("---")
-    
-    # ===== TABELA DE DETALHAMENTO =====
-    if "qtd" in file_name:
-        st.markdown("### 📋 DETALHAMENTO - RANKING POR QUANTIDADE")
-    else:
-        st.markdown("### 📋 DETALHAMENTO PARETO - RANKING")
-    
-    # Preparar tabela
-    df_table_base = df_filtered.copy()
-    if 'pareto_view' in locals() and pareto_view != "Completo":
-        df_table_base = df_plot_base.copy()
-    df_table = df_table_base.sort_values(by=col_acumulado).reset_index(drop=True)
-    df_table['Rank'] = range(1, len(df_table) + 1)
-    df_table['Rank LV'] = df_table.groupby('Classificação ABC').cumcount() + 1
-    
-    # Selecionar colunas para exibir
-    cols_display = ['Rank', col_descricao, 'Classificação ABC', col_quantidade, col_individual, col_acumulado]
-    df_display = df_table[cols_display].copy()
-    df_display.columns = ['Rank', 'Produto', 'Classe', col_quantidade, '% Individual', '% Acumulado']
-    
-    # Formatar valores
-    df_display[col_quantidade] = df_display[col_quantidade].apply(lambda x: f'{x:,.0f}')
-    df_display['% Individual'] = df_display['% Individual'].apply(lambda x: f'{x:.2f}%')
-    df_display['% Acumulado'] = df_display['% Acumulado'].apply(lambda x: f'{x:.2f}%')
-    
-    st.dataframe(
-        df_display,
-        use_container_width=True,
-        hide_index=True,
-        column_config={
-            'Rank': st.column_config.NumberColumn(width='small'),
-            'Produto': st.column_config.TextColumn(width='large'),
-            'Classe': st.column_config.TextColumn(width='small'),
-            col_quantidade: st.column_config.TextColumn(width='medium'),
-            '% Individual': st.column_config.TextColumn(width='medium'),
-            '% Acumulado': st.column_config.TextColumn(width='medium'),
-        }
-    )
-    
-    st.markdown("---")
-    
-    # ===== DISTRIBUIÇÃO ABC =====
-    col_dist1, col_dist2 = st.columns(2)
-    
-    with col_dist1:
-        if "qtd" in file_name.lower():
-            st.markdown("### 🎯 DISTRIBUIÇÃO CLASSES ABC POR QUANTIDADE")
-        else:
-            st.markdown("### 🎯 DISTRIBUIÇÃO CLASSES ABC")
-        abc_counts = df_filtered['Classificação ABC'].value_counts().sort_index()
-        
-        # Garantir que todas as classes apareçam
-        for classe in ['A', 'B', 'C']:
-            if classe not in abc_counts.index:
-                abc_counts[classe] = 0
-        abc_counts = abc_counts.sort_index()
-        
-        colors_map = {'A': '#06d6a0', 'B': '#118ab2', 'C': '#ef476f'}
-        colors = [colors_map.get(idx, '#666666') for idx in abc_counts.index]
-        
-        fig_pie = go.Figure(data=[go.Pie(
-            labels=['Classe ' + label for label in abc_counts.index],
-            values=abc_counts.values,
-            hole=0.55,
-            marker=dict(colors=colors, line=dict(color='rgba(255,255,255,0.25)', width=2)),
-            textinfo='percent',
-            textposition='inside',
-            insidetextorientation='horizontal',
-            textfont=dict(size=16, color='#ffffff', family='Arial Black'),
-            hovertemplate='<b>%{label}</b><br>Quantidade: %{value}<br>Percentual: %{percent}<extra></extra>'
-        )])
-
-        fig_pie.update_traces(
-            sort=False,
-            pull=[0.02] * len(abc_counts.index),
-        )
-        
-        fig_pie.update_layout(
-            title=dict(text='', font=dict(size=14, color='#ffffff')),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#ffffff', size=12, family='Arial'),
-            height=520,
-            showlegend=True,
-            margin=dict(l=20, r=20, t=20, b=70),
-            legend=dict(
-                orientation='h',
-                yanchor='bottom',
-                y=-0.12,
-                xanchor='center',
-                x=0.5,
-                bgcolor='rgba(0,0,0,0)',
-                bordercolor='rgba(255,255,255,0.2)',
-                font=dict(color='#ffffff', size=11)
-            )
-        )
-        
-        st.plotly_chart(fig_pie, use_container_width=True)
-    
-    with col_dist2:
-        st.markdown("### 📊 RESUMO ANALÍTICO")
-        
-        # Garantir que todas as classes apareçam no resumo
-        classe_a_count = len(df_filtered[df_filtered['Classificação ABC'] == 'A'])
-        classe_b_count = len(df_filtered[df_filtered['Classificação ABC'] == 'B'])
-        classe_c_count = len(df_filtered[df_filtered['Classificação ABC'] == 'C'])
-        
-        # Card de estatísticas com melhor formatação
-        stats_data = {
-            '📦 Total de Produtos': str(len(df_filtered)),
-            f'⚖️ Total {col_quantidade}': f"{df_filtered[col_quantidade].sum():,.0f}",
-            '🟢 Classe A': str(classe_a_count),
-            '🔵 Classe B': str(classe_b_count),
-            '🔴 Classe C': str(classe_c_count),
-            f'📈 {col_quantidade} Médio': f"{df_filtered[col_quantidade].mean():,.0f}",
-            f'⬆️ {col_quantidade} Máximo': f"{df_filtered[col_quantidade].max():,.0f}",
-            f'⬇️ {col_quantidade} Mínimo': f"{df_filtered[col_quantidade].min():,.0f}",
-        }
-        
-        for label, value in stats_data.items():
-            st.markdown(f"""
-            <div style="
-                background-color: rgba(31, 119, 180, 0.1);
-                padding: 12px 16px;
-                border-radius: 8px;
-                border-left: 3px solid #06d6a0;
-                margin-bottom: 8px;
-                font-size: 14px;
-            ">
-                <span style="color: #cccccc;">{label}:</span> 
-                <span style="color: #06d6a0; font-weight: bold; font-size: 16px;">{value}</span>
-            </div>
-            """, unsafe_allow_html=True)
-
-    st.markdown("---")
-    tab_downloads, tab_descricao = st.tabs(["⬇️ Downloads", "📝 Descrição do carregamento"])
-    with tab_downloads:
-        def _df_to_csv_bytes(df_: pd.DataFrame) -> bytes:
-            return df_.to_csv(index=False, sep=";", decimal=",").encode("utf-8-sig")
-
-        base_filename = Path(file_name).stem.replace(" ", "_")
-
-        col_csv_1, col_csv_2 = st.columns(2)
-        with col_csv_1:
-            st.download_button(
-                label="Baixar base tratada (CSV)",
-                data=_df_to_csv_bytes(df),
-                file_name=f"{base_filename}_base_tratada.csv",
-                mime="text/csv",
-            )
-
-        with col_csv_2:
-            st.download_button(
-                label="Baixar base filtrada (CSV)",
-                data=_df_to_csv_bytes(df_filtered),
-                file_name=f"{base_filename}_base_filtrada.csv",
-                mime="text/csv",
-            )
-
-        st.markdown("### Planilhas modelo (Excel)")
-        col_dl_1, col_dl_2 = st.columns(2)
-
-        def _read_binary(path: Path) -> bytes:
-            return path.read_bytes()
-
-        with col_dl_1:
-            model_abc_path = _fixed_files.get("ABC PLAN.xlsx")
-            if isinstance(model_abc_path, Path) and model_abc_path.exists():
-                st.download_button(
-                    label="Baixar ABC PLAN.xlsx",
-                    data=_read_binary(model_abc_path),
-                    file_name="ABC PLAN.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                )
-            else:
-                st.error("❌ Planilha modelo não encontrada: ABC PLAN.xlsx")
-
-        with col_dl_2:
-            model_qtd_path = _fixed_files.get("Curva ABC (QTD).xlsx")
-            if isinstance(model_qtd_path, Path) and model_qtd_path.exists():
-                st.download_button(
-                    label="Baixar Curva ABC (QTD).xlsx",
-                    data=_read_binary(model_qtd_path),
-                    file_name="Curva ABC (QTD).xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                )
-            else:
-                st.error("❌ Planilha modelo não encontrada: Curva ABC (QTD).xlsx")
-
-    with tab_descricao:
-        for msg in load_messages:
-            st.info(msg)
-else:
-    st.markdown("""
-    <div style="
-        text-align: center;
-        padding: 50px;
-        background: linear-gradient(135deg, rgba(6, 214, 160, 0.1) 0%, rgba(17, 138, 178, 0.1) 100%);
-        border-radius: 20px;
-        border: 2px solid rgba(6, 214, 160, 0.3);
-        margin: 20px 0;
-    ">
-        <h1 style="color: #06d6a0; font-size: 3em; margin-bottom: 20px;">👋 Bem-vindo ao Dashboard ABC!</h1>
-        <p style="color: #e0e0e0; font-size: 1.2em; margin-bottom: 30px;">
-            Análise inteligente da curva ABC para otimização de estoques e vendas.
-        </p>
-        <div style="
-            background: rgba(31, 119, 180, 0.1);
-            padding: 20px;
-            border-radius: 10px;
-            margin: 20px 0;
-            text-align: left;
-            max-width: 600px;
-            margin-left: auto;
-            margin-right: auto;
-        ">
-            <h3 style="color: #ffffff; margin-top: 0;">📤 Faça upload do seu arquivo Excel</h3>
-            <p style="color: #cccccc; margin-bottom: 10px;">O arquivo deve conter as seguintes colunas:</p>
-            <ul style="color: #cccccc;">
-                <li><code>descricao</code> - Descrição do produto</li>
-                <li><code>KG</code> - Quantidade em quilogramas</li>
-                <li><code>% individual</code> - Percentual individual</li>
-                <li><code>Tipo Item</code> - Tipo/categoria do item</li>
-                <li><code>% acumulado</code> - Percentual acumulado</li>
-            </ul>
-        </div>
-        <p style="color: #b0b0b0; font-style: italic;">
-            Após o upload, explore gráficos interativos e insights sobre seus produtos mais importantes!
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from functools import partial
+from pathlib import Path
+from io import BytesIO
+from collections import OrderedDict
+import json
+import os
+import threading
+import time
+
+from abc_curva import (
+    ANALYSIS_QTD,
+    ANALYSIS_TYPES,
+    COL_CLASSE_ORIGEM,
+    ContentCache,
+    CumulativeIndex,
+    DatasetError,
+    DIAGNOSTICS_HISTORY,
+    EXPORT_FORMATS,
+    NameSearchIndex,
+    PartitionIndex,
+    PRIMARY_METRICS,
+    RawDataset,
+    SQLStore,
+    SharedMemo,
+    StageGraph,
+    available_metrics,
+    available_sql_backends,
+    bin_ranks,
+    classify_metrics,
+    classify_periods,
+    collect_inputs,
+    consolidate_sources,
+    content_hash,
+    detect_analysis_type,
+    emit_record,
+    ingest_cached,
+    ingest_sources,
+    ingest_with_sidecar,
+    lttb,
+    measure_result,
+    memory_table,
+    normalize_dataset,
+    rerun_record,
+    retained_nbytes,
+    select_metric,
+    sidecar_path,
+    source_summary,
+    split_periods,
+    stage_frame,
+    stats_frame,
+    summary_frame,
+    write_frame,
+    write_xlsx,
+)
+
+# Os quadros das planilhas fixas ficam na memória compartilhada entre sessões; com
+# copy-on-write, o que uma sessão deriva deles nunca altera o original. É o padrão a
+# partir do pandas 3 (onde a opção está obsoleta); antes disso precisa ser ligado.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Configuração da página
+st.set_page_config(page_title="Análise Curva ABC", layout="wide")
+_script_start = time.perf_counter()
+st.session_state["_abc_reruns"] = st.session_state.get("_abc_reruns", 0) + 1
+# Diagnóstico de desempenho (aba "🩺 Diagnóstico"); com ABC_DIAGNOSTICS_FILE os registros também vão para esse arquivo.
+_diagnostics_on = st.session_state.get("_abc_diagnostics", False)
+_DIAGNOSTICS_FILE = os.environ.get("ABC_DIAGNOSTICS_FILE")
+_ASSETS_DIR = Path(__file__).resolve().parent / "assets"
+
+
+@st.cache_resource(show_spinner=False)
+def _asset(name: str) -> str:
+    # Texto estático (CSS, instruções): lido do disco uma vez por processo e compartilhado entre sessões.
+    return (_ASSETS_DIR / name).read_text(encoding="utf-8")
+
+
+# Sidebar com instruções
+with st.sidebar:
+    st.markdown(_asset("instrucoes.md"))
+
+# CSS customizado
+st.markdown(f"<style>\n{_asset('dashboard.css')}</style>", unsafe_allow_html=True)
+
+# Definir valor padrão para analysis_type
+analysis_type = "Análise ABC"
+
+# Header padrão
+col1, col2 = st.columns([1, 4])
+with col1:
+    st.markdown("## 📊 ABC")
+with col2:
+    st.markdown(f"## SEGMENTAÇÃO DE PRODUTOS - {analysis_type}")
+
+st.markdown("---")
+
+data_source = st.radio("Fonte dos dados", options=["Planilhas fixas", "Upload", "Várias planilhas"], horizontal=True, index=0)
+streaming_mode = st.checkbox(
+    "Leitura em lotes (planilhas muito grandes)",
+    value=False,
+    help="Lê a planilha em blocos de linhas, só com as colunas usadas, para reduzir o pico de memória.",
+)
+# Motor da classificação e dos agregados dos gráficos: pandas (em memória) ou um banco SQL embutido
+_ENGINES = {"pandas": None, **{_b.replace("sqlite", "SQLite").replace("duckdb", "DuckDB"): _b for _b in available_sql_backends()}}
+compute_engine = _ENGINES[st.radio(
+    "Motor de cálculo",
+    options=list(_ENGINES),
+    horizontal=True,
+    help="Com SQLite/DuckDB, uma cópia da base vai para um banco local e a classificação (funções de janela), "
+         "os totais por tipo, o top de produtos e as estatísticas saem de consultas SQL. O resultado é o mesmo do pandas. "
+         "A planilha continua sendo lida inteira na memória: não serve para bases que não cabem nela.",
+)]
+
+_base_dir = Path(__file__).resolve().parent
+_fixed_files = {
+    "ABC PLAN.xlsx": _base_dir / "ABC PLAN.xlsx",
+    "Curva ABC (QTD).xlsx": _base_dir / "Curva ABC (QTD).xlsx",
+}
+
+input_source = None
+file_name = None
+
+# Cache da leitura (XLSX/CSV/Parquet → colunas tipadas), compartilhado entre
+# sessões e chaveado pelo hash do conteúdo: cliques em filtros não refazem o parsing.
+_CACHE_MAX_ENTRIES = 8
+_CACHE_TTL_SECONDS = 60 * 60
+
+
+@st.cache_data(max_entries=_CACHE_MAX_ENTRIES, ttl=_CACHE_TTL_SECONDS, show_spinner=False)
+def _file_hash(path: str, mtime_ns: int, size: int) -> str:
+    return content_hash(Path(path).read_bytes())
+
+
+def _read_input(data_hash: str, file_name: str, analysis_type: str, streaming: bool, source) -> RawDataset:
+    # A barra é criada aqui dentro para o cache conseguir reproduzi-la num acerto.
+    progress_bar = st.progress(0.0, text="Lendo planilha em lotes...") if streaming else None
+
+    def _on_progress(rows_read: int, total_rows: int | None) -> None:
+        if total_rows:
+            progress_bar.progress(min(rows_read / total_rows, 1.0), text=f"Lendo planilha: {rows_read:,} de ~{total_rows:,} linhas")
+        else:
+            progress_bar.progress(0.0, text=f"Lendo planilha: {rows_read:,} linhas")
+
+    ingest_kwargs = {
+        "analysis_type": analysis_type,
+        "streaming": streaming,
+        "progress": _on_progress if streaming else None,
+    }
+    try:
+        if isinstance(source, Path):
+            return ingest_with_sidecar(source, file_name, data_hash=data_hash, **ingest_kwargs)
+        return ingest_cached(source.getvalue(), file_name, _upload_cache(), data_hash=data_hash, **ingest_kwargs)
+    finally:
+        if progress_bar is not None:
+            progress_bar.empty()
+
+
+@st.cache_data(max_entries=_CACHE_MAX_ENTRIES, ttl=_CACHE_TTL_SECONDS, show_spinner="Processando planilha...")
+def _ingest_dataset(data_hash: str, file_name: str, analysis_type: str, streaming: bool, _source) -> RawDataset:
+    return _read_input(data_hash, file_name, analysis_type, streaming, _source)
+
+
+# Arquivos enviados já lidos, em disco pelo hash do conteúdo: o mesmo arquivo
+# enviado de novo (por qualquer sessão, mesmo depois de reiniciar o servidor)
+# não é relido. ABC_CACHE_DIR muda a pasta; ABC_CACHE_MAX_MB, o limite (LRU).
+_UPLOAD_CACHE_DIR = Path(os.environ.get("ABC_CACHE_DIR") or _base_dir / ".abc_cache")
+_UPLOAD_CACHE_MAX_MB = int(os.environ.get("ABC_CACHE_MAX_MB", 1024))
+
+
+@st.cache_resource(show_spinner=False)
+def _upload_cache() -> ContentCache:
+    return ContentCache(_UPLOAD_CACHE_DIR, max_bytes=_UPLOAD_CACHE_MAX_MB * 1024 ** 2)
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_stage_memo() -> SharedMemo:
+    # Planilhas fixas: leitura, classificação, índices e as tabelas grandes ficam
+    # uma vez por processo do servidor, lidos por todas as sessões (sessões com os
+    # mesmos filtros, como os padrão, leem o mesmo resultado). Cada sessão guarda
+    # só os resultados pequenos (KPIs, gráficos). Poucas entradas por estágio:
+    # a memória não cresce com o número de sessões.
+    return SharedMemo(max_entries=2 * len(_fixed_files))
+
+
+@st.cache_data(max_entries=_CACHE_MAX_ENTRIES, ttl=_CACHE_TTL_SECONDS, show_spinner=False)
+def _export_bytes(export_key: str, fmt: str, _sheets: dict) -> bytes:
+    # Chamado pelo botão de download só no clique; `export_key` identifica dados + filtros.
+    # A conversão é em fatias, mas o arquivo pronto fica inteiro no buffer (o Streamlit recebe bytes).
+    buffer = BytesIO()
+    if fmt == "xlsx":
+        write_xlsx(_sheets, buffer)
+    else:
+        (frame,) = _sheets.values()
+        write_frame(frame, buffer, fmt)
+    return buffer.getvalue()
+
+
+# Fontes já lidas na visão consolidada, por (nome, hash): acrescentar um
+# arquivo não relê os outros.
+_SOURCE_JOBS = min(4, os.cpu_count() or 1)
+
+
+def _ingest_consolidated(analysis_type: str, streaming: bool, sources: tuple) -> RawDataset:
+    memo = st.session_state.setdefault("_abc_source_memo", OrderedDict())
+    with st.spinner(f"Lendo {len(sources)} planilhas..."):
+        loaded = ingest_sources(
+            list(sources), jobs=_SOURCE_JOBS, memo=memo, cache=_upload_cache(), analysis_type=analysis_type, streaming=streaming,
+        )
+    return consolidate_sources(loaded)
+
+
+# ===== ESTÁGIOS =====
+# ingest → normalize → classify → filter → aggregate → render. Cada estágio
+# declara dependências e parâmetros (widgets); um widget alterado só refaz os
+# estágios abaixo dele. A memória fica na sessão (st.session_state); nas
+# planilhas fixas, os estágios shared=True ficam em _shared_stage_memo().
+stage_graph = StageGraph(max_entries=4)
+
+
+@stage_graph.stage("ingest", "ingest", params=("data_hash", "file_name", "analysis_type", "streaming", "_source"), max_entries=2, shared=True)
+def _stage_ingest(data_hash, file_name, analysis_type, streaming, source):
+    if isinstance(source, tuple):
+        return _ingest_consolidated(analysis_type, streaming, source)
+    if isinstance(source, Path):
+        # Planilha fixa: o resultado já fica uma vez por processo na memória compartilhada;
+        # o cache de leitura devolveria mais uma cópia para cada sessão.
+        with st.spinner("Processando planilha..."):
+            return _read_input(data_hash, file_name, analysis_type, streaming, source)
+    return _ingest_dataset(data_hash, file_name, analysis_type, streaming, source)
+
+
+@stage_graph.stage("normalize", "normalize", deps=("ingest",), max_entries=2, shared=True)
+def _stage_normalize(ingest):
+    return normalize_dataset(ingest)
+
+
+@stage_graph.stage("sql_store", "normalize", deps=("normalize",), params=("compute_engine",), max_entries=2, shared=True)
+def _stage_sql_store(normalize, compute_engine):
+    # Motor pandas: sem banco
+    if compute_engine is None:
+        return None
+    with st.spinner("Carregando a base no banco SQL..."):
+        return SQLStore(compute_engine).load(normalize)
+
+
+@stage_graph.stage(
+    "metric_classes", "classify", deps=("normalize", "sql_store"), params=("class_group",), max_entries=3, shared=True
+)
+def _stage_metric_classes(normalize, sql_store, class_group):
+    # Classes de todas as métricas (volume/quantidade, faturamento, margem) de uma vez;
+    # com class_group, uma curva por tipo (ou planilha), todos os grupos numa passada só.
+    if sql_store is not None:
+        return sql_store.classify(group_by=class_group)
+    return classify_metrics(normalize, group_by=class_group)
+
+
+@stage_graph.stage("classify", "classify", deps=("normalize", "metric_classes"), params=("selected_metric",), shared=True)
+def _stage_classify(normalize, metric_classes, selected_metric):
+    # Trocar a métrica só escolhe colunas já calculadas
+    return select_metric(normalize, metric_classes, selected_metric)
+
+
+@stage_graph.stage("cross_matrix", "aggregate", deps=("metric_classes",), params=("cross_metrics",))
+def _stage_cross_matrix(metric_classes, cross_metrics):
+    return metric_classes.cross(*cross_metrics)
+
+
+# Janelas já classificadas na evolução por período, pela impressão digital
+# dos meses que as compõem: um mês novo não reclassifica o histórico.
+def _period_memo() -> OrderedDict:
+    return st.session_state.setdefault("_abc_period_memo", OrderedDict())
+
+
+@stage_graph.stage("period_slices", "aggregate", deps=("classify",), params=("period_column",), max_entries=2, shared=True)
+def _stage_period_slices(classify, period_column):
+    # Quantidade por (período, produto), somada uma vez por base
+    return split_periods(classify.df, classify.col_descricao, period_column, classify.col_quantidade)
+
+
+@stage_graph.stage("period_classes", "classify", deps=("period_slices",), params=("period_window",))
+def _stage_period_classes(period_slices, period_window):
+    return classify_periods(period_slices, window=period_window, memo=_period_memo())
+
+
+@stage_graph.stage("period_summary", "aggregate", deps=("period_classes",))
+def _stage_period_summary(period_classes):
+    return period_classes.migration_summary()
+
+
+@stage_graph.stage("period_migration", "aggregate", deps=("period_classes",), params=("migration_periods",))
+def _stage_period_migration(period_classes, migration_periods):
+    return period_classes.migration(*migration_periods)
+
+
+def _n_distinct(series: pd.Series) -> int:
+    # Categóricos já têm só os valores presentes: sem varrer a coluna.
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return len(series.cat.categories)
+    return series.nunique()
+
+
+def _tipo_or_all(selected_tipo: str) -> str | None:
+    return None if selected_tipo == 'Todos' else selected_tipo
+
+
+@stage_graph.stage("partition_index", "aggregate", deps=("classify",), max_entries=2, shared=True)
+def _stage_partition_index(classify):
+    # Posições por Tipo Item e por (tipo, classe), com contagens prontas
+    return PartitionIndex.from_frame(classify.df, classify.col_tipo, 'Classificação ABC')
+
+
+@stage_graph.stage("tipos", "aggregate", deps=("partition_index",))
+def _stage_tipos(partition_index):
+    return sorted([t for t in partition_index.tipos if t.strip() != '' and partition_index.count(t) > 0])
+
+
+@stage_graph.stage("filtered", "filter", deps=("classify", "partition_index"), params=("selected_tipo",), shared=True)
+def _stage_filtered(classify, partition_index, selected_tipo):
+    return partition_index.select(classify.df, _tipo_or_all(selected_tipo))
+
+
+@stage_graph.stage(
+    "selection", "filter",
+    deps=("filtered", "classify", "partition_index"),
+    params=("selected_tipo", "pareto_view", "pareto_classes", "pareto_top_n"),
+    shared=True,
+)
+def _stage_selection(filtered, classify, partition_index, selected_tipo, pareto_view, pareto_classes, pareto_top_n):
+    col_quantidade = classify.col_quantidade
+    df_plot_base = filtered
+    if pareto_view == "Top N por Classe":
+        if pareto_classes:
+            parts = []
+            for cls in pareto_classes:
+                part = partition_index.select(classify.df, _tipo_or_all(selected_tipo), [cls])
+                part = part.dropna(subset=[col_quantidade]).nlargest(pareto_top_n, col_quantidade)
+                parts.append(part)
+            if parts:
+                df_plot_base = pd.concat(parts, axis=0).drop_duplicates()
+            else:
+                df_plot_base = df_plot_base.iloc[0:0]
+        else:
+            df_plot_base = df_plot_base.iloc[0:0]
+    elif pareto_view == "Top N (Geral)":
+        df_plot_base = df_plot_base.dropna(subset=[col_quantidade]).nlargest(pareto_top_n, col_quantidade)
+    return df_plot_base
+
+
+@stage_graph.stage(
+    "cumulative_index", "aggregate", deps=("classify", "partition_index"), params=("curve_tipo",), max_entries=3, shared=True
+)
+def _stage_cumulative_index(classify, partition_index, curve_tipo):
+    # Os KPIs de threshold olham a curva inteira: a base toda (curve_tipo=None, sem filtro
+    # de tipo) ou, na classificação dentro de cada tipo, a curva do tipo selecionado
+    curve = partition_index.select(classify.df, curve_tipo)
+    return CumulativeIndex.from_frame(curve, classify.col_quantidade, classify.col_acumulado)
+
+
+@stage_graph.stage("kpis", "aggregate", deps=("cumulative_index",), params=("threshold_value",))
+def _stage_kpis(cumulative_index, threshold_value):
+    # Produtos até o threshold: uma busca binária no índice acumulado
+    produtos_ate_threshold, total_quantidade_threshold = cumulative_index.up_to(threshold_value)
+    return {
+        "produtos_ate_threshold": produtos_ate_threshold,
+        "total_quantidade_threshold": total_quantidade_threshold,
+        "total_quantidade_all": cumulative_index.total_quantidade,
+    }
+
+
+@stage_graph.stage("class_totals", "aggregate", deps=("partition_index",), params=("curve_tipo",))
+def _stage_class_totals(partition_index, curve_tipo):
+    return {
+        "total_produtos": partition_index.count(curve_tipo),
+        "classes": partition_index.class_counts(curve_tipo),
+    }
+
+
+@stage_graph.stage(
+    "summary", "aggregate", deps=("filtered", "classify", "partition_index", "sql_store"), params=("selected_tipo", "class_group")
+)
+def _stage_summary(filtered, classify, partition_index, sql_store, selected_tipo, class_group):
+    col_quantidade = classify.col_quantidade
+    tipo = _tipo_or_all(selected_tipo)
+    if sql_store is not None:
+        # Só os agregados saem do banco (classes do mesmo agrupamento da tela)
+        abc_counts = pd.Series(sql_store.class_counts(classify.metric, tipo, group_by=class_group), name='count')
+        total_produtos = sql_store.count(tipo)
+        stats = sql_store.stats(classify.metric, tipo)
+        tipo_summary = sql_store.type_totals(classify.metric, tipo).rename(col_quantidade).rename_axis(classify.col_tipo)
+    else:
+        # Contagens por classe direto do índice (todas as classes aparecem, mesmo com zero)
+        abc_counts = pd.Series(partition_index.class_counts(tipo), name='count')
+        total_produtos = partition_index.count(tipo)
+        values = filtered[col_quantidade]
+        stats = {"sum": values.sum(), "mean": values.mean(), "max": values.max(), "min": values.min()}
+        tipo_summary = filtered.groupby(classify.col_tipo, observed=True)[col_quantidade].sum().sort_values(ascending=True)
+
+    # Card de estatísticas com melhor formatação
+    stats_data = {
+        '📦 Total de Produtos': str(total_produtos),
+        f'⚖️ Total {col_quantidade}': f"{stats['sum']:,.0f}",
+        '🟢 Classe A': str(int(abc_counts['A'])),
+        '🔵 Classe B': str(int(abc_counts['B'])),
+        '🔴 Classe C': str(int(abc_counts['C'])),
+        f'📈 {col_quantidade} Médio': f"{stats['mean']:,.0f}",
+        f'⬆️ {col_quantidade} Máximo': f"{stats['max']:,.0f}",
+        f'⬇️ {col_quantidade} Mínimo': f"{stats['min']:,.0f}",
+    }
+    return {
+        "tipo_summary": tipo_summary,
+        "abc_counts": abc_counts,
+        "stats_data": stats_data,
+    }
+
+
+@stage_graph.stage(
+    "top_products", "aggregate",
+    deps=("classify", "partition_index", "sql_store"),
+    params=("selected_tipo", "qtd_classes", "class_group"),
+)
+def _stage_top_products(classify, partition_index, sql_store, selected_tipo, qtd_classes, class_group):
+    if sql_store is not None:
+        return sql_store.top_products(
+            classify.metric, _tipo_or_all(selected_tipo), list(qtd_classes), n=20, group_by=class_group
+        )
+    # Filtrar dados baseado nas classes selecionadas (lista vazia = nenhuma linha)
+    df_qtd_filtered = partition_index.select(classify.df, _tipo_or_all(selected_tipo), list(qtd_classes))
+    return df_qtd_filtered.groupby(classify.col_descricao, observed=True)[classify.col_quantidade].sum().sort_values(ascending=False).head(20)
+
+
+_RANKING_PAGE_SIZES = (25, 50, 100, 250)
+_PERIOD_WINDOWS = (1, 3, 6, 12)
+
+
+def _take_sorted(df_: pd.DataFrame, by: str, columns: dict) -> pd.DataFrame:
+    # Só as colunas pedidas ({origem: nome}), já na ordem de `by`: evita copiar o frame inteiro.
+    order = df_[by].to_numpy().argsort(kind="quicksort")
+    return pd.DataFrame({name: df_[col].array.take(order) for col, name in columns.items()})
+
+
+@stage_graph.stage("ranking", "aggregate", deps=("selection", "classify"), shared=True)
+def _stage_ranking(selection, classify):
+    # Ordenação e rank uma vez por seleção; valores numéricos, formatados só na exibição (column_config)
+    columns = {
+        classify.col_descricao: 'Produto',
+        'Classificação ABC': 'Classe',
+        classify.col_quantidade: classify.col_quantidade,
+        classify.col_individual: '% Individual',
+        classify.col_acumulado: '% Acumulado',
+    }
+    if classify.col_origem is not None:
+        columns.update({classify.col_origem: 'Origem', COL_CLASSE_ORIGEM: 'Classe na origem'})
+    df_display = _take_sorted(selection, classify.col_acumulado, columns)
+    df_display.insert(0, 'Rank', np.arange(1, len(df_display) + 1, dtype=np.int32))
+    return df_display
+
+
+@stage_graph.stage("source_summary", "aggregate", deps=("classify",), max_entries=2, shared=True)
+def _stage_source_summary(classify):
+    if classify.col_origem is None:
+        return None
+    return source_summary(classify.df, classify.col_quantidade, classify.col_origem)
+
+
+@stage_graph.stage("name_index", "aggregate", deps=("ranking",), max_entries=2, shared=True)
+def _stage_name_index(ranking):
+    return NameSearchIndex.from_series(ranking['Produto'])
+
+
+@stage_graph.stage("ranking_view", "filter", deps=("ranking", "name_index"), params=("search_text",))
+def _stage_ranking_view(ranking, name_index, search_text):
+    # Posições do ranking que batem com a busca; None = ranking inteiro
+    if not search_text.strip():
+        return None
+    return name_index.search(search_text)
+
+
+@stage_graph.stage("fig_top_products", "render", deps=("top_products",))
+def _stage_fig_top_products(top_products):
+    produto_totals = top_products
+    fig_produto = go.Figure(data=[
+        go.Bar(
+            y=produto_totals.index,
+            x=produto_totals.values,
+            orientation='h',
+            marker=dict(
+                color=produto_totals.values,
+                colorscale=[[0, '#073b4c'], [0.5, '#118ab2'], [1, '#06d6a0']],
+                line=dict(color='rgba(255,255,255,0.3)', width=1)
+            ),
+            text=[f'{v:,.0f}' for v in produto_totals.values],
+            textposition='outside',
+            textfont=dict(size=10, color='#ffffff'),
+            hovertemplate='<b>%{y}</b><br>Total: %{x:,.0f}<extra></extra>'
+        )
+    ])
+
+    fig_produto.update_layout(
+        title=dict(text='Top 20 Produtos por Quantidade Total', font=dict(size=16, color='#ffffff', family='Arial Black')),
+        xaxis_title=dict(text='Quantidade Total', font=dict(size=12, color='#cccccc')),
+        yaxis_title='',
+        plot_bgcolor='rgba(20, 20, 40, 0.5)',
+        paper_bgcolor='rgba(15, 15, 30, 0.9)',
+        font=dict(color='#ffffff', size=11, family='Arial'),
+        height=550,
+        showlegend=False,
+        xaxis=dict(
+            showgrid=True, 
+            gridwidth=1, 
+            gridcolor='rgba(100,100,100,0.2)',
+            tickfont=dict(color='#cccccc', size=11)
+        ),
+        yaxis=dict(
+            tickfont=dict(color='#cccccc', size=11),
+            autorange='reversed'  # Para mostrar o maior no topo
+        ),
+        margin=dict(l=200, r=80, t=80, b=80)
+    )
+    return fig_produto
+
+
+# Acima disso o Pareto "Completo" deixa de ter uma barra rotulada por produto:
+# curva em WebGL reduzida por LTTB, classe A em detalhe e a cauda em faixas.
+# O total de pontos enviados ao navegador fica limitado independente da base.
+_PARETO_DETAIL_MAX = 1500
+_PARETO_CURVE_POINTS = 2000
+_PARETO_A_DETAIL_MAX = 2000
+_PARETO_TAIL_BINS = 200
+_CLASS_COLORS = {'A': '#06d6a0', 'B': '#118ab2', 'C': '#ef476f'}
+
+
+def _pareto_layout(fig_pareto: go.Figure, xaxis_title: str = 'Produtos', hovermode: str = 'x unified') -> None:
+    # Layout
+    title_text = '📊 Análise de Pareto - Curva ABC'
+
+    fig_pareto.update_layout(
+        title=dict(text=title_text, font=dict(size=18, color='#ffffff', family='Arial Black')),
+        xaxis_title=dict(text=xaxis_title, font=dict(size=12, color='#cccccc')),
+        yaxis=dict(
+            title=dict(text='% Individual', font=dict(color='#118ab2', size=12)),
+            tickfont=dict(color='#cccccc', size=11),
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='rgba(100,100,100,0.2)',
+            zeroline=False
+        ),
+        yaxis2=dict(
+            title=dict(text='% Acumulado', font=dict(color='#ef476f', size=12)),
+            tickfont=dict(color='#cccccc', size=11),
+            overlaying='y',
+            side='right',
+            range=[0, 110],
+            zeroline=False
+        ),
+        plot_bgcolor='rgba(20, 20, 40, 0.5)',
+        paper_bgcolor='rgba(15, 15, 30, 0.9)',
+        font=dict(color='#ffffff', size=11, family='Arial'),
+        height=550,
+        hovermode=hovermode,
+        showlegend=True,
+        legend=dict(
+            x=0.01, 
+            y=0.99, 
+            bgcolor='rgba(0,0,0,0.5)',
+            bordercolor='rgba(255,255,255,0.2)',
+            borderwidth=1,
+            font=dict(color='#ffffff', size=11)
+        ),
+        margin=dict(l=80, r=80, t=80, b=80)
+    )
+
+
+def _pareto_scalable(selection: pd.DataFrame, order: np.ndarray, classify) -> go.Figure:
+    n = len(order)
+    rank = np.arange(1, n + 1)
+    ind = selection[classify.col_individual].to_numpy(dtype=float)[order]
+    acum = selection[classify.col_acumulado].to_numpy(dtype=float)[order]
+    classes = pd.Categorical(selection['Classificação ABC'].array.take(order), categories=['A', 'B', 'C'])
+    class_counts = np.bincount(classes.codes[classes.codes >= 0], minlength=3)
+    names = selection[classify.col_descricao].array
+
+    fig_pareto = go.Figure()
+
+    # Barras: classe A produto a produto (até o limite), o resto em faixas por classe
+    n_a_detail = min(int(class_counts[0]), _PARETO_A_DETAIL_MAX)
+    fig_pareto.add_trace(go.Bar(
+        x=rank[:n_a_detail],
+        y=ind[:n_a_detail],
+        name='% Individual (A)',
+        marker=dict(color=_CLASS_COLORS['A']),
+        customdata=np.asarray(names.take(order[:n_a_detail]), dtype=object),
+        hovertemplate='<b>%{customdata}</b><br>Posição: %{x:,}<br>% Individual: %{y:.2f}%<extra></extra>'
+    ))
+    seg_start = n_a_detail
+    seg_stops = np.cumsum(class_counts)
+    tail_rows = max(n - n_a_detail, 1)
+    for code, cls in enumerate(['A', 'B', 'C']):
+        seg_stop = int(seg_stops[code])
+        if seg_stop <= seg_start:
+            continue
+        n_bins = max(1, round(_PARETO_TAIL_BINS * (seg_stop - seg_start) / tail_rows))
+        bins = bin_ranks(ind, seg_start, seg_stop, n_bins)
+        fig_pareto.add_trace(go.Bar(
+            x=(bins.start + bins.stop + 1) / 2,
+            y=bins.mean,
+            width=bins.stop - bins.start,
+            name=f'Classe {cls} (faixas)',
+            marker=dict(color=_CLASS_COLORS[cls], line=dict(width=0)),
+            customdata=np.column_stack([bins.start + 1, bins.stop, bins.total]),
+            hovertemplate=(
+                'Posições %{customdata[0]:,}–%{customdata[1]:,}<br>'
+                '% Individual médio: %{y:.4f}%<br>Soma: %{customdata[2]:.2f}%<extra></extra>'
+            ),
+        ))
+        seg_start = seg_stop
+
+    # Curva acumulada: LTTB + os pontos exatos de cada corte de classe
+    cut_positions = [int(c) - 1 for c in seg_stops[:2] if 0 < c < n]
+    keep = sorted({p for c in cut_positions for p in (c, c + 1) if p < n})
+    idx = lttb(rank.astype(float), acum, _PARETO_CURVE_POINTS, keep=keep)
+    fig_pareto.add_trace(go.Scattergl(
+        x=rank[idx],
+        y=acum[idx],
+        name='% Acumulado',
+        yaxis='y2',
+        mode='lines',
+        line=dict(color='#ef476f', width=3),
+        customdata=np.asarray(names.take(order[idx]), dtype=object),
+        hovertemplate='<b>%{customdata}</b><br>Posição: %{x:,}<br>% Acumulado: %{y:.2f}%<extra></extra>',
+        fill='tozeroy',
+        fillcolor='rgba(239, 71, 111, 0.1)'
+    ))
+
+    # Marcadores dos cortes A|B e B|C na posição e no acumulado exatos
+    for cut, label in zip(cut_positions, ['A | B', 'B | C']):
+        fig_pareto.add_vline(
+            x=cut + 1.5,
+            line=dict(color='rgba(255,255,255,0.6)', width=1, dash='dash'),
+            annotation=dict(text=f"{label}: {cut + 1:,} itens, {acum[cut]:.2f}%", font=dict(color='#ffffff', size=10)),
+            annotation_position='top',
+        )
+
+    _pareto_layout(fig_pareto, xaxis_title='Produtos (posição no ranking)', hovermode='closest')
+    fig_pareto.update_layout(bargap=0)
+    return fig_pareto
+
+
+@stage_graph.stage("fig_pareto", "render", deps=("selection", "classify"))
+def _stage_fig_pareto(selection, classify):
+    col_descricao = classify.col_descricao
+    col_individual = classify.col_individual
+    col_acumulado = classify.col_acumulado
+
+    if len(selection) > _PARETO_DETAIL_MAX:
+        order = selection[col_acumulado].to_numpy().argsort(kind="quicksort")
+        return _pareto_scalable(selection, order, classify)
+
+    # Gráfico de Pareto
+    df_plot = _take_sorted(selection, col_acumulado, {
+        col_descricao: col_descricao,
+        col_individual: col_individual,
+        col_acumulado: col_acumulado,
+        'Classificação ABC': 'Classificação ABC',
+    })
+
+    fig_pareto = go.Figure()
+
+    # Barras
+    fig_pareto.add_trace(go.Bar(
+        x=df_plot[col_descricao],
+        y=df_plot[col_individual],
+        name='% Individual',
+        marker=dict(
+            color=df_plot['Classificação ABC'].map(_CLASS_COLORS),
+            line=dict(color='rgba(255,255,255,0.3)', width=1)
+        ),
+        text=[f"{v:.1f}%" for v in df_plot[col_individual]],
+        textposition='outside',
+        textfont=dict(size=10, color='#ffffff'),
+        hovertemplate='<b>%{x}</b><br>% Individual: %{y:.1f}%<extra></extra>'
+    ))
+
+    # Linha de % acumulado
+    fig_pareto.add_trace(go.Scatter(
+        x=df_plot[col_descricao],
+        y=df_plot[col_acumulado],
+        name='% Acumulado',
+        yaxis='y2',
+        line=dict(color='#ef476f', width=4),
+        mode='lines+markers',
+        marker=dict(size=8, color='#ef476f', symbol='circle', line=dict(color='white', width=2)),
+        hovertemplate='<b>%{x}</b><br>% Acumulado: %{y:.1f}%<extra></extra>',
+        fill='tozeroy',
+        fillcolor='rgba(239, 71, 111, 0.1)'
+    ))
+
+    _pareto_layout(fig_pareto)
+    return fig_pareto
+
+
+@stage_graph.stage("fig_tipo", "render", deps=("summary", "classify"))
+def _stage_fig_tipo(summary, classify):
+    col_quantidade = classify.col_quantidade
+    analysis_type = classify.analysis_type
+    tipo_summary = summary["tipo_summary"]
+
+    fig_bar = go.Figure(data=[
+        go.Bar(
+            y=tipo_summary.index,
+            x=tipo_summary.values,
+            orientation='h',
+            marker=dict(
+                color=tipo_summary.values,
+                colorscale=[[0, '#073b4c'], [0.5, '#118ab2'], [1, '#06d6a0']],
+                line=dict(color='rgba(255,255,255,0.3)', width=1)
+            ),
+            text=[f'{v:,.0f}' for v in tipo_summary.values],
+            textposition='outside',
+            textfont=dict(size=11, color='#ffffff'),
+            hovertemplate=f'<b>%{{y}}</b><br>{col_quantidade}: %{{x:,.0f}}<extra></extra>'
+        )
+    ])
+
+    fig_bar.update_layout(
+        title=dict(text=f'{analysis_type} por Tipo', font=dict(size=14, color='#ffffff', family='Arial Black')),
+        xaxis_title=dict(text=col_quantidade, font=dict(size=11, color='#cccccc')),
+        yaxis_title='',
+        plot_bgcolor='rgba(20, 20, 40, 0.5)',
+        paper_bgcolor='rgba(15, 15, 30, 0.9)',
+        font=dict(color='#ffffff', size=11, family='Arial'),
+        height=550,
+        showlegend=False,
+        xaxis=dict(
+            showgrid=True, 
+            gridwidth=1, 
+            gridcolor='rgba(100,100,100,0.2)',
+            tickfont=dict(color='#cccccc', size=11)
+        ),
+        yaxis=dict(
+            tickfont=dict(color='#cccccc', size=11)
+        ),
+        margin=dict(l=150, r=80, t=80, b=80)
+    )
+    return fig_bar
+
+
+@stage_graph.stage("fig_pie", "render", deps=("summary",))
+def _stage_fig_pie(summary):
+    abc_counts = summary["abc_counts"]
+
+    colors_map = {'A': '#06d6a0', 'B': '#118ab2', 'C': '#ef476f'}
+    colors = [colors_map.get(idx, '#666666') for idx in abc_counts.index]
+
+    fig_pie = go.Figure(data=[go.Pie(
+        labels=['Classe ' + label for label in abc_counts.index],
+        values=abc_counts.values,
+        hole=0.55,
+        marker=dict(colors=colors, line=dict(color='rgba(255,255,255,0.25)', width=2)),
+        textinfo='percent',
+        textposition='inside',
+        insidetextorientation='horizontal',
+        textfont=dict(size=16, color='#ffffff', family='Arial Black'),
+        hovertemplate='<b>%{label}</b><br>Quantidade: %{value}<br>Percentual: %{percent}<extra></extra>'
+    )])
+
+    fig_pie.update_traces(
+        sort=False,
+        pull=[0.02] * len(abc_counts.index),
+    )
+
+    fig_pie.update_layout(
+        title=dict(text='', font=dict(size=14, color='#ffffff')),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#ffffff', size=12, family='Arial'),
+        height=520,
+        showlegend=True,
+        margin=dict(l=20, r=20, t=20, b=70),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=-0.12,
+            xanchor='center',
+            x=0.5,
+            bgcolor='rgba(0,0,0,0)',
+            bordercolor='rgba(255,255,255,0.2)',
+            font=dict(color='#ffffff', size=11)
+        )
+    )
+    return fig_pie
+
+
+def _class_heatmap(cross_matrix: pd.DataFrame) -> go.Figure:
+    # Matriz classe × classe (duas métricas ou dois períodos)
+    fig = go.Figure(data=[go.Heatmap(
+        z=cross_matrix.to_numpy(),
+        x=[f'{cross_matrix.columns.name} {c}' for c in cross_matrix.columns],
+        y=[f'{cross_matrix.index.name} {c}' for c in cross_matrix.index],
+        text=cross_matrix.to_numpy(),
+        texttemplate='%{text:,}',
+        textfont=dict(size=16, color='#ffffff'),
+        colorscale=[[0, '#073b4c'], [0.5, '#118ab2'], [1, '#06d6a0']],
+        showscale=False,
+        hovertemplate='<b>%{y} × %{x}</b><br>Produtos: %{z:,}<extra></extra>',
+    )])
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#ffffff', size=12, family='Arial'),
+        height=420,
+        margin=dict(l=20, r=20, t=20, b=40),
+        yaxis=dict(autorange='reversed'),
+    )
+    return fig
+
+
+@stage_graph.stage("fig_cross", "render", deps=("cross_matrix",))
+def _stage_fig_cross(cross_matrix):
+    return _class_heatmap(cross_matrix)
+
+
+@stage_graph.stage("fig_migration", "render", deps=("period_migration",))
+def _stage_fig_migration(period_migration):
+    return _class_heatmap(period_migration)
+
+
+@stage_graph.stage("fig_period_classes", "render", deps=("period_classes",))
+def _stage_fig_period_classes(period_classes):
+    counts = period_classes.class_counts()
+    fig_periods = go.Figure(data=[
+        go.Bar(
+            x=counts.index,
+            y=counts[cls],
+            name=f'Classe {cls}',
+            marker=dict(color=_CLASS_COLORS[cls], line=dict(color='rgba(255,255,255,0.25)', width=1)),
+            hovertemplate=f'<b>%{{x}}</b><br>Classe {cls}: %{{y:,}} produtos<extra></extra>',
+        )
+        for cls in counts.columns
+    ])
+    fig_periods.update_layout(
+        barmode='stack',
+        plot_bgcolor='rgba(20, 20, 40, 0.5)',
+        paper_bgcolor='rgba(15, 15, 30, 0.9)',
+        font=dict(color='#ffffff', size=11, family='Arial'),
+        height=420,
+        margin=dict(l=20, r=20, t=20, b=40),
+        xaxis=dict(type='category', title=''),
+        yaxis=dict(title=dict(text='Produtos', font=dict(size=12, color='#cccccc')), gridcolor='rgba(255,255,255,0.08)'),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+    )
+    return fig_periods
+
+
+# Parâmetros dos estágios que a tela usa por padrão (leitura completa, motor pandas,
+# curva da base toda). O preparo em segundo plano precisa de todos os parâmetros dos
+# estágios que calcula, com os mesmos valores, para as chaves coincidirem com as da sessão.
+_DEFAULT_SELECTION = {"streaming": False, "compute_engine": _ENGINES["pandas"], "class_group": None, "curve_tipo": None}
+
+
+@st.cache_resource(show_spinner=False)
+def _prewarm_fixed_files() -> threading.Thread:
+    # Uma vez por processo: prepara as planilhas fixas em segundo plano, na memória
+    # compartilhada e com os mesmos parâmetros da seleção padrão. Uma sessão que
+    # pedir a mesma planilha durante o preparo espera por ele em vez de refazê-lo.
+    def _warm() -> None:
+        for path in _fixed_files.values():
+            if not path.exists():
+                continue
+            _stat = path.stat()
+            warm_name = path.name.lower()
+            # Mesmo padrão do seletor "Tipo de análise": a primeira opção.
+            warm_analysis = detect_analysis_type(warm_name) or next(iter(ANALYSIS_TYPES))
+            warm = stage_graph.session(shared=_shared_stage_memo()).begin(
+                data_hash=_file_hash(str(path), _stat.st_mtime_ns, _stat.st_size),
+                file_name=warm_name,
+                analysis_type=warm_analysis,
+                _source=path,
+                selected_metric=PRIMARY_METRICS[warm_analysis],
+                **_DEFAULT_SELECTION,
+            )
+            try:
+                for name in ("partition_index", "cumulative_index"):
+                    warm.get(name)
+            except DatasetError:
+                pass  # a sessão mostra o erro ao abrir a planilha
+
+    thread = threading.Thread(target=_warm, name="abc-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+# ABC_PREWARM=1: a primeira sessão do servidor já dispara o preparo das duas planilhas fixas.
+if os.environ.get("ABC_PREWARM"):
+    _prewarm_fixed_files()
+
+
+if data_source == "Planilhas fixas":
+    fixed_choice = st.selectbox("Selecione a planilha", options=list(_fixed_files.keys()))
+    fixed_path = _fixed_files[fixed_choice]
+    if not fixed_path.exists():
+        st.error(f"❌ Planilha fixa não encontrada: {fixed_path}")
+        st.stop()
+    if st.button("🔄 Recarregar planilhas fixas", help="Relê as planilhas do disco (ex.: depois de alterá-las) para todas as sessões."):
+        for _path in _fixed_files.values():
+            sidecar_path(_path).unlink(missing_ok=True)
+        _file_hash.clear()
+        _shared_stage_memo().clear()
+    input_source = fixed_path
+    file_name = fixed_path.name.lower()
+elif data_source == "Upload":
+    uploaded_file = st.file_uploader("📤 Faça upload do arquivo (Excel, CSV ou Parquet)", type=['xlsx', 'csv', 'parquet'])
+    if uploaded_file is not None:
+        input_source = uploaded_file
+        file_name = uploaded_file.name.lower()
+else:
+    # Visão consolidada: (nome, hash, Path ou bytes) de cada planilha
+    uploaded_files = st.file_uploader(
+        "📤 Planilhas das filiais (Excel, CSV ou Parquet)",
+        type=['xlsx', 'csv', 'parquet'],
+        accept_multiple_files=True,
+    )
+    source_dir = st.text_input("...ou uma pasta no servidor", value="", placeholder="/dados/filiais")
+    multi_sources = []
+    for up in uploaded_files or []:
+        data = up.getvalue()
+        multi_sources.append((up.name.lower(), content_hash(data), data))
+    if source_dir.strip():
+        if not Path(source_dir).is_dir():
+            st.error(f"❌ Pasta não encontrada: {source_dir}")
+            st.stop()
+        for path in collect_inputs([source_dir]):
+            _stat = path.stat()
+            multi_sources.append((path.name.lower(), _file_hash(str(path), _stat.st_mtime_ns, _stat.st_size), path))
+    if multi_sources:
+        input_source = tuple(multi_sources)
+        file_name = f"consolidado ({len(multi_sources)} planilhas)"
+
+if input_source is not None:
+    analysis_options = list(ANALYSIS_TYPES)
+    suggested_analysis = detect_analysis_type(input_source[0][0] if isinstance(input_source, tuple) else file_name)
+    selected_analysis = st.selectbox(
+        "Tipo de análise",
+        options=analysis_options,
+        index=analysis_options.index(suggested_analysis) if suggested_analysis else 0,
+    )
+
+    if isinstance(input_source, tuple):
+        data_hash = content_hash("\n".join(f"{name}:{h}" for name, h, _ in input_source).encode("utf-8"))
+    elif isinstance(input_source, Path):
+        _stat = input_source.stat()
+        data_hash = _file_hash(str(input_source), _stat.st_mtime_ns, _stat.st_size)
+    else:
+        data_hash = content_hash(input_source.getvalue())
+
+    stages = stage_graph.session(
+        memo=st.session_state.setdefault("_abc_stage_memo", {}),
+        stats=st.session_state.setdefault("_abc_stage_stats", {}),
+        profile=_diagnostics_on,
+        measure=measure_result,
+        shared=_shared_stage_memo() if isinstance(input_source, Path) else None,
+    )
+    stages.begin(
+        data_hash=data_hash,
+        file_name=file_name,
+        analysis_type=selected_analysis,
+        streaming=streaming_mode,
+        _source=input_source,
+        compute_engine=compute_engine,
+    )
+    try:
+        normalized = stages.get("normalize")
+    except DatasetError as e:
+        st.error(f"❌ {e}")
+        if e.found_columns is not None:
+            st.write("Colunas encontradas no arquivo:")
+            st.write(e.found_columns)
+        st.stop()
+
+    analysis_type = normalized.analysis_type
+    is_qtd = analysis_type == ANALYSIS_QTD
+    load_messages = list(normalized.load_messages)
+
+    # Atualizar header com o tipo de análise detectado
+    col1, col2 = st.columns([1, 4])
+    with col1:
+        st.markdown("## 📊 ABC")
+    with col2:
+        st.markdown(f"## SEGMENTAÇÃO DE PRODUTOS - {analysis_type}")
+
+    st.markdown("---")
+
+    # ===== FILTROS SUPERIORES =====
+    col_filter1, col_filter2, col_filter3 = st.columns(3)
+
+    # A métrica vem antes dos demais filtros: tudo abaixo é classificado por ela.
+    metric_options = list(available_metrics(normalized))
+    primary_metric = PRIMARY_METRICS[analysis_type]
+    with col_filter3:
+        st.markdown("### Análise selecionada")
+        analysis = st.selectbox(
+            "",
+            metric_options,
+            index=metric_options.index(primary_metric),
+            label_visibility="collapsed",
+        )
+        if len(metric_options) == 1:
+            st.caption("Faturamento e Margem ficam disponíveis quando a planilha tem as colunas `faturamento` e `margem`.")
+        # Curva da base toda ou uma curva dentro de cada tipo. Não há curva por planilha aqui:
+        # sem um filtro de planilha, o Pareto e o ranking misturariam as curvas de todas.
+        class_group = None
+        if not is_qtd:
+            class_group = {"Base toda": None, "Dentro de cada tipo": normalized.col_tipo}[st.radio(
+                "Classificação ABC",
+                options=["Base toda", "Dentro de cada tipo"],
+                horizontal=True,
+                help="Dentro de cada tipo, cada item é classificado pela participação no total do seu tipo "
+                     "(% individual e % acumulado também), e os gráficos, o ranking e os KPIs mostram a curva "
+                     "do tipo selecionado. As curvas de todos os tipos saem de um cálculo só, então trocar o "
+                     "tipo não reclassifica nada.",
+            )]
+    stages.set(selected_metric=analysis, class_group=class_group)
+    dataset = stages.get("classify")
+    df = dataset.df
+
+    col_descricao = dataset.col_descricao
+    col_quantidade = dataset.col_quantidade
+    col_individual = dataset.col_individual
+    col_tipo = dataset.col_tipo
+    col_acumulado = dataset.col_acumulado
+    
+    with col_filter1:
+        st.markdown("### Selecione o percentual de faturamento")
+        threshold_value = st.slider(
+            "",
+            min_value=0.0,
+            max_value=100.0,
+            value=60.0,
+            step=0.5,
+            format="%.1f%%",
+            label_visibility="collapsed",
+        )
+        selected_threshold = f"{threshold_value:g}%"
+    
+    with col_filter2:
+        if is_qtd:
+            st.markdown("### Tipo de Item")
+            st.info("📝 Para análise por quantidade, todos os itens são categorizados como 'Produto'")
+            selected_tipo = 'Todos'  # Força 'Todos' para QTD
+        else:
+            st.markdown("### Selecione o tipo de item")
+            tipos = stages.get("tipos")
+            # Curvas por tipo: um tipo por vez ('Todos' misturaria as curvas no Pareto, no rank e nos KPIs)
+            tipo_options = list(tipos) if class_group is not None else ['Todos'] + list(tipos)
+            selected_tipo = st.selectbox("", tipo_options, label_visibility="collapsed")
+    
+    # Filtrar dados; os KPIs usam a curva da base toda ou, por tipo, a do tipo selecionado
+    curve_tipo = _tipo_or_all(selected_tipo) if class_group is not None else None
+    stages.set(selected_tipo=selected_tipo, threshold_value=threshold_value, curve_tipo=curve_tipo)
+    df_filtered = stages.get("filtered")
+    kpis = stages.get("kpis")
+    class_totals = stages.get("class_totals")
+    produtos_ate_threshold = kpis["produtos_ate_threshold"]
+    total_quantidade_threshold = kpis["total_quantidade_threshold"]
+    total_quantidade_all = kpis["total_quantidade_all"]
+    
+    st.markdown("---")
+    
+    # ===== KPIs PRINCIPAIS =====
+    metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+    
+    with metric_col1:
+        st.metric(
+            label="PRODUTOS",
+            value=produtos_ate_threshold,
+            delta=f"{(produtos_ate_threshold/class_totals['total_produtos']*100):.0f}% do total"
+        )
+    
+    with metric_col2:
+        if is_qtd:
+            st.metric(
+                label="REPRESENTAM",
+                value=f"{selected_threshold}",
+                delta="da quantidade total"
+            )
+        else:
+            st.metric(
+                label="REPRESENTAM",
+                value=f"{selected_threshold}",
+                delta="do faturamento"
+            )
+    
+    with metric_col3:
+        st.metric(
+            label=f"TOTAL {col_quantidade}",
+            value=f"{total_quantidade_threshold:,.0f}",
+            delta=f"de {total_quantidade_all:,.0f} {col_quantidade} totais"
+        )
+    
+    with metric_col4:
+        st.metric(
+            label="CLASSES ABC",
+            value=f"{class_totals['classes']['A']} / {class_totals['classes']['B']} / {class_totals['classes']['C']}",
+            delta="A / B / C (Total)" if curve_tipo is None else f"A / B / C ({curve_tipo})"
+        )
+    
+    st.markdown("---")
+    
+    # ===== GRÁFICOS PRINCIPAIS =====
+    if is_qtd:
+        charts_ctrl1, charts_ctrl2 = st.columns([2, 3])
+        with charts_ctrl1:
+            qtd_classes = st.multiselect(
+                "Filtrar por Classes ABC:",
+                ["A", "B", "C"],
+                default=["A", "B", "C"],
+                key="qtd_classes_filter",
+            )
+        with charts_ctrl2:
+            st.markdown(" ")
+    else:
+        pareto_col1, pareto_col2 = st.columns([2, 3])
+        with pareto_col1:
+            pareto_view = st.selectbox(
+                "",
+                ["Completo", "Top N por Classe", "Top N (Geral)"],
+                label_visibility="collapsed",
+            )
+        with pareto_col2:
+            if pareto_view == "Top N por Classe":
+                pareto_classes = st.multiselect(
+                    "",
+                    ["A", "B", "C"],
+                    default=["A"],
+                    label_visibility="collapsed",
+                )
+                pareto_top_n = st.slider(
+                    "",
+                    min_value=5,
+                    max_value=50,
+                    value=10,
+                    step=5,
+                    label_visibility="collapsed",
+                )
+            elif pareto_view == "Top N (Geral)":
+                pareto_classes = []
+                pareto_top_n = st.slider(
+                    "",
+                    min_value=5,
+                    max_value=100,
+                    value=20,
+                    step=5,
+                    label_visibility="collapsed",
+                )
+            else:
+                pareto_classes = []
+                pareto_top_n = 0
+    if is_qtd:
+        stages.set(pareto_view="Completo", pareto_classes=(), pareto_top_n=0, qtd_classes=tuple(qtd_classes))
+    else:
+        stages.set(pareto_view=pareto_view, pareto_classes=tuple(pareto_classes), pareto_top_n=pareto_top_n, qtd_classes=())
+    col_graph1, col_graph2 = st.columns(2)
+    
+    with col_graph1:
+        if is_qtd:
+            st.markdown("### 📊 TOTAIS POR PRODUTO")
+            
+            fig_produto = stages.get("fig_top_products")
+            st.plotly_chart(fig_produto, use_container_width=True)
+        else:
+            st.markdown("### 📊 CURVA ABC")
+            
+            fig_pareto = stages.get("fig_pareto")
+            st.plotly_chart(fig_pareto, use_container_width=True)
+    
+    with col_graph2:
+        if is_qtd:
+            st.markdown("### 📈 DISTRIBUIÇÃO POR QUANTIDADE")
+        else:
+            st.markdown("### 📈 DISTRIBUIÇÃO POR TIPO DE ITEM")
+        
+        # Gráfico de barras por tipo
+        fig_bar = stages.get("fig_tipo")
+        st.plotly_chart(fig_bar, use_container_width=True)
+    
+    st.markdown("---")
+    
+    # ===== TABELA DE DETALHAMENTO =====
+    if is_qtd:
+        st.markdown("### 📋 DETALHAMENTO - RANKING POR QUANTIDADE")
+    else:
+        st.markdown("### 📋 DETALHAMENTO PARETO - RANKING")
+    
+    # Preparar tabela: ranking memorizado, só a página visível vai para o navegador
+    col_busca, col_pagina, col_tamanho = st.columns([3, 1, 1])
+    with col_busca:
+        search_text = st.text_input("🔎 Buscar produto", value="", placeholder="Parte do nome, sem precisar de acento")
+    stages.set(search_text=search_text)
+    df_ranking = stages.get("ranking")
+    view_positions = stages.get("ranking_view")
+    n_rows = len(df_ranking) if view_positions is None else len(view_positions)
+
+    with col_tamanho:
+        page_size = st.selectbox("Linhas por página", _RANKING_PAGE_SIZES, index=1)
+    n_pages = max(1, -(-n_rows // page_size))
+    with col_pagina:
+        page = st.number_input("Página", min_value=1, max_value=n_pages, value=1, step=1)
+    page = min(int(page), n_pages)
+    start = (page - 1) * page_size
+    stop = min(start + page_size, n_rows)
+    if view_positions is None:
+        df_display = df_ranking.iloc[start:stop]
+    else:
+        df_display = df_ranking.take(view_positions[start:stop])
+
+    st.dataframe(
+        df_display,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Rank': st.column_config.NumberColumn(width='small'),
+            'Produto': st.column_config.TextColumn(width='large'),
+            'Classe': st.column_config.TextColumn(width='small'),
+            col_quantidade: st.column_config.NumberColumn(width='medium', format='localized'),
+            '% Individual': st.column_config.NumberColumn(width='medium', format='%.2f%%'),
+            '% Acumulado': st.column_config.NumberColumn(width='medium', format='%.2f%%'),
+            'Origem': st.column_config.TextColumn(width='medium'),
+            'Classe na origem': st.column_config.TextColumn(width='small'),
+        }
+    )
+    if n_rows:
+        st.caption(f"Mostrando {start + 1}–{stop} de {n_rows} produtos (página {page} de {n_pages})")
+    else:
+        st.caption("Nenhum produto encontrado para a busca.")
+    
+    st.markdown("---")
+    
+    # ===== DISTRIBUIÇÃO ABC =====
+    col_dist1, col_dist2 = st.columns(2)
+    
+    with col_dist1:
+        if is_qtd:
+            st.markdown("### 🎯 DISTRIBUIÇÃO CLASSES ABC POR QUANTIDADE")
+        else:
+            st.markdown("### 🎯 DISTRIBUIÇÃO CLASSES ABC")
+        fig_pie = stages.get("fig_pie")
+        st.plotly_chart(fig_pie, use_container_width=True)
+    
+    with col_dist2:
+        st.markdown("### 📊 RESUMO ANALÍTICO")
+        
+        stats_data = stages.get("summary")["stats_data"]
+        
+        for label, value in stats_data.items():
+            st.markdown(f"""
+            <div style="
+                background-color: rgba(31, 119, 180, 0.1);
+                padding: 12px 16px;
+                border-radius: 8px;
+                border-left: 3px solid #06d6a0;
+                margin-bottom: 8px;
+                font-size: 14px;
+            ">
+                <span style="color: #cccccc;">{label}:</span> 
+                <span style="color: #06d6a0; font-weight: bold; font-size: 16px;">{value}</span>
+            </div>
+            """, unsafe_allow_html=True)
+
+    # ===== POR ORIGEM (visão consolidada) =====
+    df_origens = stages.get("source_summary")
+    if df_origens is not None:
+        st.markdown("---")
+        st.markdown("### 🏬 POR ORIGEM")
+        st.caption("Classe global: curva calculada sobre todas as planilhas juntas. Classe na origem: curva de cada planilha sozinha.")
+        st.dataframe(
+            df_origens,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                col_quantidade: st.column_config.NumberColumn(format='localized'),
+                '% do total': st.column_config.NumberColumn(format='%.2f%%'),
+            },
+        )
+
+    # ===== MATRIZ ABC × ABC (duas métricas) =====
+    if len(metric_options) > 1:
+        st.markdown("---")
+        st.markdown("### 🔀 MATRIZ ABC × ABC")
+        col_cross1, col_cross2 = st.columns(2)
+        with col_cross1:
+            cross_rows = st.selectbox("Linhas", metric_options, index=metric_options.index(primary_metric))
+        with col_cross2:
+            other_metrics = [m for m in metric_options if m != cross_rows]
+            cross_cols = st.selectbox("Colunas", metric_options, index=metric_options.index(other_metrics[0]))
+        stages.set(cross_metrics=(cross_rows, cross_cols))
+        st.plotly_chart(stages.get("fig_cross"), use_container_width=True)
+        st.caption("Produtos da base toda por classe em cada métrica (ex.: A em volume e C em margem), das mesmas classes já calculadas.")
+
+    # ===== EVOLUÇÃO POR PERÍODO (base em formato longo ou uma planilha por mês) =====
+    # Só dimensões com dois valores ou mais (ex.: consolidado de uma planilha só não tem evolução).
+    period_dims = {
+        label: col
+        for label, col in (("Coluna de período", dataset.col_periodo), ("Planilha de origem", dataset.col_origem))
+        if col is not None and _n_distinct(df[col]) > 1
+    }
+    if period_dims:
+        st.markdown("---")
+        st.markdown("### 📅 EVOLUÇÃO POR PERÍODO")
+        col_period1, col_period2 = st.columns(2)
+        with col_period1:
+            period_dim = st.radio("Períodos de", list(period_dims), horizontal=True)
+        with col_period2:
+            period_window = st.selectbox(
+                "Janela",
+                _PERIOD_WINDOWS,
+                format_func=lambda w: "Cada período" if w == 1 else f"Últimos {w} períodos",
+            )
+        stages.set(period_column=period_dims[period_dim], period_window=period_window)
+        period_classes = stages.get("period_classes")
+        periods = period_classes.periods
+        if len(periods) < 2:
+            st.info(f"📝 A base tem {len(periods)} período; a evolução aparece a partir de dois.")
+        else:
+            st.plotly_chart(stages.get("fig_period_classes"), use_container_width=True)
+            st.caption(
+                f"Classes de {len(periods)} janelas: {len(period_classes.recomputed)} classificadas nesta carga, "
+                f"{len(periods) - len(period_classes.recomputed)} reaproveitadas da memória (meses sem alteração)."
+            )
+            col_mig1, col_mig2 = st.columns(2)
+            with col_mig1:
+                migration_from = st.selectbox("De", periods, index=len(periods) - 2)
+            with col_mig2:
+                migration_to = st.selectbox("Para", periods, index=len(periods) - 1)
+            stages.set(migration_periods=(migration_from, migration_to))
+            st.plotly_chart(stages.get("fig_migration"), use_container_width=True)
+            st.caption("Produtos por classe no primeiro período (linhas) e no segundo (colunas); \"Sem classe\": fora da janela.")
+            st.dataframe(stages.get("period_summary"), use_container_width=True, hide_index=True)
+
+    st.markdown("---")
+    tab_downloads, tab_descricao, tab_estagios, tab_memoria, tab_diagnostico = st.tabs(
+        ["⬇️ Downloads", "📝 Descrição do carregamento", "⚙️ Estágios", "🧠 Memória", "🩺 Diagnóstico"]
+    )
+    with tab_downloads:
+        # Os arquivos só são gerados no clique (data=callable) e ficam em cache
+        # por (dados + filtros + formato): um rerun não serializa nada.
+        base_filename = Path(file_name).stem.replace(" ", "_")
+        export_format = st.radio(
+            "Formato",
+            list(EXPORT_FORMATS),
+            format_func=lambda f: EXPORT_FORMATS[f][0],
+            horizontal=True,
+        )
+        export_label, export_ext, export_mime = EXPORT_FORMATS[export_format]
+        summary = stages.get("summary")
+        report_sheets = {
+            "Resumo": summary_frame(summary["stats_data"]),
+            "Classes": summary["abc_counts"].rename_axis("Classe").reset_index(name="Produtos"),
+            "Por tipo": summary["tipo_summary"].rename_axis(col_tipo).reset_index(),
+            "Ranking": stages.get("ranking"),
+        }
+        if df_origens is not None:
+            report_sheets["Por origem"] = df_origens
+
+        col_csv_1, col_csv_2, col_csv_3 = st.columns(3)
+        with col_csv_1:
+            st.download_button(
+                label=f"Baixar base tratada ({export_label})",
+                data=partial(_export_bytes, repr(stages.key("classify")), export_format, {"Base tratada": df}),
+                file_name=f"{base_filename}_base_tratada{export_ext}",
+                mime=export_mime,
+            )
+
+        with col_csv_2:
+            st.download_button(
+                label=f"Baixar base filtrada ({export_label})",
+                data=partial(_export_bytes, repr(stages.key("filtered")), export_format, {"Base filtrada": df_filtered}),
+                file_name=f"{base_filename}_base_filtrada{export_ext}",
+                mime=export_mime,
+            )
+
+        with col_csv_3:
+            report_key = repr((stages.key("summary"), stages.key("ranking")))
+            st.download_button(
+                label="Baixar relatório (Excel, várias abas)",
+                data=partial(_export_bytes, report_key, "xlsx", report_sheets),
+                file_name=f"{base_filename}_relatorio.xlsx",
+                mime=EXPORT_FORMATS["xlsx"][2],
+            )
+
+        st.markdown("### Planilhas modelo (Excel)")
+        col_dl_1, col_dl_2 = st.columns(2)
+
+        with col_dl_1:
+            model_abc_path = _fixed_files.get("ABC PLAN.xlsx")
+            if isinstance(model_abc_path, Path) and model_abc_path.exists():
+                st.download_button(
+                    label="Baixar ABC PLAN.xlsx",
+                    data=model_abc_path.read_bytes,
+                    file_name="ABC PLAN.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                )
+            else:
+                st.error("❌ Planilha modelo não encontrada: ABC PLAN.xlsx")
+
+        with col_dl_2:
+            model_qtd_path = _fixed_files.get("Curva ABC (QTD).xlsx")
+            if isinstance(model_qtd_path, Path) and model_qtd_path.exists():
+                st.download_button(
+                    label="Baixar Curva ABC (QTD).xlsx",
+                    data=model_qtd_path.read_bytes,
+                    file_name="Curva ABC (QTD).xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                )
+            else:
+                st.error("❌ Planilha modelo não encontrada: Curva ABC (QTD).xlsx")
+
+    with tab_descricao:
+        for msg in load_messages:
+            st.info(msg)
+
+    with tab_estagios:
+        st.caption("Estágios desta atualização: só os que dependem do que mudou são executados; os demais vêm da memória da sessão ou, nas planilhas fixas, da memória compartilhada entre sessões (\"compartilhado\").")
+        st.dataframe(
+            pd.DataFrame(
+                [(r.name, r.phase, r.status, r.seconds * 1000) for r in stages.report()],
+                columns=["Estágio", "Fase", "Status", "Tempo (ms)"],
+            ),
+            use_container_width=True,
+            hide_index=True,
+            column_config={"Tempo (ms)": st.column_config.NumberColumn(format="%.1f")},
+        )
+
+    with tab_memoria:
+        # Sob demanda: medir strings e arrays de todos os estágios tem custo.
+        if st.checkbox("Calcular uso de memória desta sessão", value=False):
+            def _fmt_bytes(n: float) -> str:
+                return f"{n / 1024 ** 2:,.1f} MB" if n >= 1024 ** 2 else f"{n / 1024:,.1f} KB"
+
+            mem_df = memory_table(df)
+            mem_total = mem_df[["bytes_antes", "bytes_agora"]].sum()
+            shared_values = stages.shared.values() if stages.shared is not None else []
+            session_bytes = retained_nbytes(
+                (v for entries in st.session_state["_abc_stage_memo"].values() for v in entries.values()),
+                exclude=shared_values,
+            )
+            mem_col1, mem_col2, mem_col3, mem_col4 = st.columns(4)
+            mem_col1.metric("Base classificada (antes)", _fmt_bytes(mem_total["bytes_antes"]), help="Estimativa com textos como objetos Python e números em float64.")
+            mem_col2.metric("Base classificada (agora)", _fmt_bytes(mem_total["bytes_agora"]))
+            mem_col3.metric("Retido pela sessão", _fmt_bytes(session_bytes), help="Resultados memorizados nos estágios desta sessão, sem contar duas vezes a mesma memória nem o que é compartilhado.")
+            mem_col4.metric("Compartilhado entre sessões", _fmt_bytes(retained_nbytes(shared_values)), help="Planilhas fixas: base e índices guardados uma vez por processo do servidor e lidos por todas as sessões.")
+            st.dataframe(
+                mem_df.rename(columns={"coluna": "Coluna", "dtype": "Tipo", "bytes_antes": "Antes (bytes)", "bytes_agora": "Agora (bytes)"}),
+                use_container_width=True,
+                hide_index=True,
+            )
+
+    with tab_diagnostico:
+        # Desligado, os estágios só medem o tempo; ligado, também o pico de memória
+        # (tracemalloc, que deixa a execução mais lenta), linhas e bytes das figuras.
+        st.checkbox(
+            "Ativar diagnóstico de desempenho",
+            key="_abc_diagnostics",
+            help="Vale a partir da próxima atualização. Cada atualização gera um registro JSON no log 'abc_curva.diagnostics'.",
+        )
+        if _diagnostics_on:
+            if st.button("Refazer todos os estágios medindo", help="Esquece os resultados memorizados desta sessão; a próxima atualização executa e mede todos os estágios."):
+                stages.clear()
+                st.rerun()
+            diag_record = rerun_record(
+                stages.report(),
+                stages.stats(),
+                rerun=st.session_state["_abc_reruns"],
+                wall_seconds=time.perf_counter() - _script_start,
+                arquivo=file_name,
+                linhas_base=len(df),
+                linhas_filtradas=len(df_filtered),
+            )
+            emit_record(diag_record, _DIAGNOSTICS_FILE)
+            diag_history = st.session_state.setdefault("_abc_diagnostics_history", [])
+            diag_history.append(diag_record)
+            del diag_history[:-DIAGNOSTICS_HISTORY]
+
+            diag_cache = diag_record["cache"]
+            diag_col1, diag_col2, diag_col3, diag_col4 = st.columns(4)
+            diag_col1.metric("Atualizações na sessão", diag_record["rerun"])
+            diag_col2.metric("Tempo desta atualização", f"{diag_record['segundos'] * 1000:,.0f} ms", help="Do início do script até esta aba.")
+            diag_col3.metric(
+                "Acerto na memória de estágios",
+                f"{diag_cache['taxa_acerto']:.0%}" if diag_cache["taxa_acerto"] is not None else "—",
+                help="Estágios reaproveitados ÷ estágios pedidos, desde o início da sessão.",
+            )
+            diag_col4.metric("Linhas (base / filtradas)", f"{len(df):,} / {len(df_filtered):,}")
+            st.markdown("**Estágios desta atualização**")
+            st.caption("Pico: memória alocada durante o estágio (Python e NumPy; buffers Arrow não entram). Payload: JSON da figura enviado ao navegador.")
+            st.dataframe(
+                stage_frame(stages.report()),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "Tempo (ms)": st.column_config.NumberColumn(format="%.1f"),
+                    "Pico (MB)": st.column_config.NumberColumn(format="%.2f"),
+                    "Payload (KB)": st.column_config.NumberColumn(format="%.1f"),
+                },
+            )
+            st.markdown("**Memória de estágios desde o início da sessão**")
+            st.dataframe(
+                stats_frame(stages.stats()),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "Taxa de acerto": st.column_config.NumberColumn(format="percent"),
+                    "Tempo total (ms)": st.column_config.NumberColumn(format="%.1f"),
+                },
+            )
+            st.download_button(
+                label=f"Baixar diagnóstico (JSON Lines, {len(diag_history)} atualizações)",
+                data="".join(json.dumps(r, ensure_ascii=False) + "\n" for r in diag_history),
+                file_name=f"{Path(file_name).stem.replace(' ', '_')}_diagnostico.jsonl",
+                mime="application/jsonl",
+            )
+else:
+    st.markdown("""
+    <div style="
+        text-align: center;
+        padding: 50px;
+        background: linear-gradient(135deg, rgba(6, 214, 160, 0.1) 0%, rgba(17, 138, 178, 0.1) 100%);
+        border-radius: 20px;
+        border: 2px solid rgba(6, 214, 160, 0.3);
+        margin: 20px 0;
+    ">
+        <h1 style="color: #06d6a0; font-size: 3em; margin-bottom: 20px;">👋 Bem-vindo ao Dashboard ABC!</h1>
+        <p style="color: #e0e0e0; font-size: 1.2em; margin-bottom: 30px;">
+            Análise inteligente da curva ABC para otimização de estoques e vendas.
+        </p>
+        <div style="
+            background: rgba(31, 119, 180, 0.1);
+            padding: 20px;
+            border-radius: 10px;
+            margin: 20px 0;
+            text-align: left;
+            max-width: 600px;
+            margin-left: auto;
+            margin-right: auto;
+        ">
+            <h3 style="color: #ffffff; margin-top: 0;">📤 Faça upload do seu arquivo (Excel, CSV ou Parquet)</h3>
+            <p style="color: #cccccc; margin-bottom: 10px;">O arquivo deve conter as seguintes colunas:</p>
+            <ul style="color: #cccccc;">
+                <li><code>descricao</code> - Descrição do produto</li>
+                <li><code>KG</code> - Quantidade em quilogramas</li>
+                <li><code>% individual</code> - Percentual individual</li>
+                <li><code>Tipo Item</code> - Tipo/categoria do item</li>
+                <li><code>% acumulado</code> - Percentual acumulado</li>
+            </ul>
+        </div>
+        <p style="color: #b0b0b0; font-style: italic;">
+            Após o upload, explore gráficos interativos e insights sobre seus produtos mais importantes!
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
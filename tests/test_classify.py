@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from abc_curva import CLASSES, classify_abc, classify_abc_grouped, classify_abc_matrix
+
+
+def _reference_codes(q: np.ndarray, cuts=(80.0, 95.0)) -> np.ndarray:
+    # Regra do dashboard, direta: ordem decrescente estável (empates pela ordem
+    # original), primeira posição cujo acumulado atinge cada corte.
+    codes = np.full(len(q), -1, dtype=np.int8)
+    valid = np.flatnonzero(~np.isnan(q))
+    total = q[valid].sum()
+    if len(valid) == 0 or total <= 0:
+        return codes
+    order = valid[np.argsort(-q[valid], kind="stable")]
+    acum = np.cumsum(q[order] / total * 100)
+    running_max = np.maximum.accumulate(acum)
+    stops = [min(int(np.searchsorted(running_max, c)), len(order) - 1) + 1 for c in cuts]
+    for pos, row in enumerate(order):
+        codes[row] = sum(pos >= s for s in stops)
+    return codes
+
+
+def _quantities(kind: str, n: int, rng) -> np.ndarray:
+    if kind == "pareto":
+        return np.round(rng.pareto(1.2, n) * 10, 2)
+    if kind == "empates":
+        return rng.integers(0, 6, n).astype(float)
+    if kind == "negativos":
+        return rng.normal(5, 10, n).round()
+    if kind == "zeros":
+        return rng.choice([0.0, -0.0, 1.0, 2.5], n)
+    return rng.random(n)
+
+
+@pytest.mark.parametrize("kind", ["pareto", "empates", "negativos", "zeros", "uniforme"])
+@pytest.mark.parametrize("with_nan", [False, True])
+def test_classify_abc_matches_reference(kind, with_nan):
+    rng = np.random.default_rng(len(kind) + with_nan)
+    for _ in range(20):
+        q = _quantities(kind, int(rng.integers(1, 3000)), rng)
+        if with_nan:
+            q[rng.random(len(q)) < 0.1] = np.nan
+        result = classify_abc(q)
+        expected = _reference_codes(q)
+        assert (np.asarray(result.classes.codes) == expected).all()
+        total = np.nansum(q)
+        if total > 0:
+            np.testing.assert_allclose(result.pct_individual, q / total * 100, rtol=1e-12)
+
+
+def test_classify_abc_matrix_columns_are_independent():
+    rng = np.random.default_rng(0)
+    values = np.column_stack([rng.integers(0, 9, 500).astype(float), rng.pareto(1.5, 500), np.full(500, np.nan)])
+    result = classify_abc_matrix(values)
+    for j in range(values.shape[1]):
+        single = classify_abc(values[:, j])
+        assert (result.codes[:, j] == np.asarray(single.classes.codes)).all()
+        assert result.codes[:, j].flags.c_contiguous
+    assert (result.codes[:, 2] == -1).all()
+
+
+def test_tie_on_cut_follows_row_order():
+    # 20 itens iguais: 80% no 16º e 95% no 19º, pela ordem das linhas.
+    result = classify_abc(np.ones(20))
+    assert list(result.classes) == ["A"] * 16 + ["B"] * 3 + ["C"]
+    assert set(result.classes.categories) == set(CLASSES)
+
+
+def test_non_positive_total_is_unclassified():
+    result = classify_abc(np.array([0.0, 0.0, np.nan]))
+    assert result.classes.isna().all()
+    assert np.isnan(result.pct_acumulado).all()
+
+
+@pytest.mark.parametrize("kind", ["pareto", "empates", "negativos", "uniforme"])
+@pytest.mark.parametrize("n_groups", [1, 7, 300])
+def test_grouped_matches_each_group_alone(kind, n_groups):
+    rng = np.random.default_rng(len(kind) * 1000 + n_groups)
+    n = 6000
+    values = np.column_stack([_quantities(kind, n, rng), _quantities("pareto", n, rng)])
+    values[rng.random(values.shape) < 0.05] = np.nan
+    # Grupos intercalados nas linhas; -1 = sem grupo
+    groups = rng.integers(-1, n_groups, n)
+    result = classify_abc_grouped(values, groups)
+    assert (result.codes[groups == -1] == -1).all()
+    for g in range(n_groups):
+        rows = np.flatnonzero(groups == g)
+        alone = classify_abc_matrix(values[rows])
+        assert (result.codes[rows] == alone.codes).all()
+        np.testing.assert_allclose(result.pct_individual[rows], alone.pct_individual, rtol=1e-12)
+        # Entre quantidades iguais fora dos cortes a ordem do acumulado é livre: compara os valores.
+        np.testing.assert_allclose(
+            np.sort(result.pct_acumulado[rows], axis=0), np.sort(alone.pct_acumulado, axis=0), rtol=1e-9, atol=1e-9
+        )
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from abc_curva import ANALYSIS_VOLUME, cli
+from abc_curva.synthetic import synthetic_dataset, write_dataset
+
+
+def _write(path: Path, rows: int = 200, seed: int = 0) -> Path:
+    return write_dataset(synthetic_dataset(rows, seed=seed), path)
+
+
+def test_same_name_in_different_folders_and_formats(tmp_path):
+    inputs = [
+        _write(tmp_path / "a" / "vendas.csv", seed=1),
+        _write(tmp_path / "b" / "vendas.csv", seed=2),
+        _write(tmp_path / "b" / "Vendas.parquet", seed=3),
+        _write(tmp_path / "b" / "outra.csv", seed=4),
+    ]
+    index = cli.run_batch(inputs, tmp_path / "saida", analysis_type=ANALYSIS_VOLUME)
+    assert (index["status"] == "ok").all()
+    assert list(index["saida"]) == ["vendas_csv_abc.csv", "vendas_csv_2_abc.csv", "Vendas_parquet_abc.csv", "outra_abc.csv"]
+    for row in index.itertuples():
+        assert len(pd.read_csv(tmp_path / "saida" / row.saida, sep=";")) == row.linhas
+
+
+def test_unexpected_error_is_recorded_and_batch_continues(tmp_path, monkeypatch):
+    inputs = [_write(tmp_path / "ruim.csv"), _write(tmp_path / "boa.csv", seed=1)]
+    write_frame = cli.write_frame
+
+    def _failing(df, out, *args, **kwargs):
+        if Path(out.name).name.startswith("ruim"):
+            raise ValueError("valor inesperado")
+        return write_frame(df, out, *args, **kwargs)
+
+    monkeypatch.setattr(cli, "write_frame", _failing)
+    index = cli.run_batch(inputs, tmp_path / "saida", analysis_type=ANALYSIS_VOLUME)
+    assert list(index["status"]) == ["erro", "ok"]
+    assert index.loc[0, "erro"] == "ValueError: valor inesperado"
+    assert (tmp_path / "saida" / cli.INDEX_FILE).exists()
+
+
+@pytest.mark.parametrize("command", [["classify", "base.csv"], ["classify-large", "base.csv", "-o", "saida.parquet"]])
+def test_unknown_locale_is_rejected_before_reading(command, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main([*command, "--locale", "pt_BR"])
+    assert exit_info.value.code == 2
+    assert "--locale" in capsys.readouterr().err
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from abc_curva.memory import compact_frame, memory_table, retained_nbytes
+
+
+def _frame(n: int = 1000) -> pd.DataFrame:
+    return pd.DataFrame({
+        "descricao": [f"produto {i}" for i in range(n)],
+        "Tipo Item": np.where(np.arange(n) % 2, "A", "B"),
+        "KG": np.arange(n, dtype=float),
+    })
+
+
+def test_compact_frame_layout():
+    df = compact_frame(_frame(), text_columns=["descricao", "Tipo Item"], integer_columns=["KG"])
+    assert isinstance(df["Tipo Item"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["descricao"].dtype, pd.StringDtype)
+    assert df["KG"].dtype == np.int32
+
+
+def test_memory_table_covers_every_column():
+    df = compact_frame(_frame(), text_columns=["descricao", "Tipo Item"], integer_columns=["KG"])
+    table = memory_table(df)
+    assert list(table["coluna"]) == [*df.columns, "(índice)"]
+    assert (table["bytes_agora"] > 0).all()
+
+
+def test_retained_nbytes_counts_shared_buffers_once():
+    df = compact_frame(_frame(), text_columns=["descricao", "Tipo Item"], integer_columns=["KG"])
+    alone = retained_nbytes([df])
+    assert alone > 0
+    assert retained_nbytes([df, df["KG"], {"de novo": df}]) == alone
+    assert retained_nbytes([df], exclude=[df]) == 0
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from abc_curva.parsing import parse_numbers
+
+
+def _to_number_ptbr(series: pd.Series) -> pd.Series:
+    # Conversor antigo do pipeline (substituído por ``parse_numbers``), mantido aqui como referência.
+    s0 = series.copy()
+    if pd.api.types.is_numeric_dtype(s0):
+        return pd.to_numeric(s0, errors='coerce')
+
+    s = s0.astype(str).str.strip()
+    s = s.replace({"": pd.NA, "nan": pd.NA, "None": pd.NA, "NaN": pd.NA})
+    s = s.str.replace("%", "", regex=False)
+    s = s.str.replace(" ", "", regex=False)
+    s = s.str.replace(" ", "", regex=False)
+    s = s.str.replace(r"[^0-9,\.\-]", "", regex=True)
+
+    has_comma = s.str.contains(",", na=False)
+    has_dot = s.str.contains(r"\.", na=False)
+
+    mask_pt = has_comma & has_dot
+    s.loc[mask_pt] = s.loc[mask_pt].str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+
+    mask_comma_only = has_comma & (~has_dot)
+    s.loc[mask_comma_only] = s.loc[mask_comma_only].str.replace(",", ".", regex=False)
+
+    mask_dot_only = has_dot & (~has_comma)
+    s.loc[mask_dot_only] = s.loc[mask_dot_only].str.replace(",", "", regex=False)
+
+    return pd.to_numeric(s, errors='coerce')
+
+
+def _to_number_enus(series: pd.Series) -> pd.Series:
+    # en-US: vírgula é sempre milhar, ponto é decimal.
+    s = series.astype(str).str.replace(r"[^0-9,\.\-]", "", regex=True).str.replace(",", "", regex=False)
+    return pd.to_numeric(s, errors="coerce").where(series.notna())
+
+
+EDGE_CASES = [
+    # sinais
+    "-1,5", "1-", "--1", "- 1", "+3", "-", "-,5", "1,-5", "-0", "-0,0",
+    # milhar e decimal
+    "1.234,56", "1.234.567", "1,234.56", "1.2.3", "1,2,3", ",5", "5,", ".5", "5.", "1 234,5", "1 234,5",
+    # vazios e textos
+    "", " ", "   ", "nan", "None", "NaN", "abc", "R$ 12,90", "12,5%", "  7  ",
+    # mais de 15 dígitos
+    "1234567890123456789", "0,12345678901234567", "123456789012345,6", "9999999999999999", "1.234.567.890.123.456,78",
+    # mais de 32 caracteres
+    "1" * 40, "R$" + " " * 35 + "1.234,56", "-" + "0" * 33 + "1,5",
+    # comuns
+    "0", "10", "3,14", "1000", "0,001", "100%",
+]
+
+
+def _assert_same(result: pd.Series, expected: pd.Series) -> None:
+    np.testing.assert_array_equal(result.to_numpy(dtype=float), expected.to_numpy(dtype=float, na_value=np.nan))
+
+
+@pytest.mark.parametrize("dtype", [object, "string[pyarrow]"])
+def test_ptbr_edge_cases_match_reference(dtype):
+    series = pd.Series(EDGE_CASES + [None], dtype=dtype)
+    _assert_same(parse_numbers(series, "pt-BR"), _to_number_ptbr(series.astype(object)))
+
+
+def test_enus_edge_cases_match_reference():
+    series = pd.Series(EDGE_CASES + [None], dtype=object)
+    expected = _to_number_enus(series)
+    _assert_same(parse_numbers(series, "en-US"), expected)
+
+
+def test_mixed_type_cells():
+    series = pd.Series([1, "2,5", 3.0, None, "1.000,25"], dtype=object)
+    _assert_same(parse_numbers(series), _to_number_ptbr(series))
+
+
+def test_numeric_column_passes_through():
+    series = pd.Series([1, 2, None], dtype="Int64")
+    _assert_same(parse_numbers(series), pd.Series([1.0, 2.0, np.nan]))
+
+
+def test_random_strings_match_reference():
+    rng = np.random.default_rng(0)
+    alphabet = np.array(list("0123456789,.-% a "))
+    lengths = rng.integers(0, 40, 5000)
+    texts = ["".join(rng.choice(alphabet, size)) for size in lengths]
+    series = pd.Series(texts, dtype=object)
+    _assert_same(parse_numbers(series, "pt-BR"), _to_number_ptbr(series))
+
+
+def test_ptbr_formatted_values_match_reference():
+    # Padded (Horner) e caminho limpo (cast do Arrow) na mesma base
+    rng = np.random.default_rng(1)
+    values = np.round(rng.lognormal(5, 3, 20000) * rng.choice([-1, 1], 20000), 2)
+    formatted = pd.Series([f"{v:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".") for v in values])
+    _assert_same(parse_numbers(formatted, "pt-BR"), _to_number_ptbr(formatted))
+    plain = pd.Series([f"{v:.2f}" for v in values])
+    _assert_same(parse_numbers(plain, "pt-BR"), _to_number_ptbr(plain))
+
+
+def test_auto_detects_locale():
+    en = pd.Series(["1,234.50", "2,000.25", "3.5"])
+    pt = pd.Series(["1.234,50", "2.000,25", "3,5"])
+    _assert_same(parse_numbers(en, "auto"), pd.Series([1234.5, 2000.25, 3.5]))
+    _assert_same(parse_numbers(pt, "auto"), pd.Series([1234.5, 2000.25, 3.5]))
+
+
+def test_invalid_locale():
+    with pytest.raises(ValueError):
+        parse_numbers(pd.Series(["1"]), "fr-FR")
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from abc_curva import ANALYSIS_VOLUME, CLASSES, SQLStore, classify_metrics, ingest_dataset, normalize_dataset
+from abc_curva.synthetic import synthetic_dataset, write_dataset
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    path = write_dataset(synthetic_dataset(5_000, seed=5), tmp_path_factory.mktemp("base") / "base.csv")
+    return normalize_dataset(ingest_dataset(path, path.name, ANALYSIS_VOLUME))
+
+
+@pytest.mark.parametrize("grouped", [False, True])
+def test_classes_match_pandas(dataset, grouped):
+    group_by = dataset.col_tipo if grouped else None
+    expected = classify_metrics(dataset, group_by=group_by).result
+    store = SQLStore("sqlite").load(dataset, chunk_rows=777)
+    try:
+        result = store.classify(group_by=group_by).result
+    finally:
+        store.close()
+    assert (result.codes == expected.codes).all()
+    # Entre quantidades iguais fora dos cortes a ordem do acumulado é livre: compara os valores.
+    np.testing.assert_allclose(
+        np.sort(result.pct_acumulado, axis=0), np.sort(expected.pct_acumulado, axis=0), rtol=1e-9, atol=1e-9
+    )
+
+
+def test_aggregates_match_frame(dataset):
+    store = SQLStore("sqlite").load(dataset)
+    try:
+        store.classify()
+        metric = next(iter(store.metrics))
+        tipo = dataset.df[dataset.col_tipo].dropna().iloc[0]
+        rows = dataset.df[dataset.df[dataset.col_tipo] == tipo]
+        assert store.count(tipo) == len(rows)
+        assert store.stats(metric, tipo)["sum"] == pytest.approx(rows[dataset.col_quantidade].sum())
+        totals = dataset.df.groupby(dataset.col_tipo, observed=True)[dataset.col_quantidade].sum()
+        assert store.type_totals(metric).to_dict() == pytest.approx(totals.to_dict())
+    finally:
+        store.close()
+
+
+def test_each_grouping_keeps_its_classes(dataset):
+    # Classificar por tipo e depois a base toda (ou o inverso) não mistura as classes das duas
+    store = SQLStore("sqlite").load(dataset)
+    try:
+        store.classify(group_by=dataset.col_tipo)
+        store.classify()
+        metric = next(iter(store.metrics))
+        tipo = dataset.df[dataset.col_tipo].dropna().iloc[0]
+        for group_by in (None, dataset.col_tipo):
+            codes = classify_metrics(dataset, group_by=group_by).result.codes[:, 0]
+            for filter_tipo in (None, tipo):
+                rows = np.ones(len(codes), dtype=bool) if filter_tipo is None else (
+                    dataset.df[dataset.col_tipo] == filter_tipo).to_numpy()
+                expected = {c: int(np.count_nonzero(codes[rows] == i)) for i, c in enumerate(CLASSES)}
+                assert store.class_counts(metric, filter_tipo, group_by=group_by) == expected
+            in_a = dataset.df[codes == 0]
+            top = in_a.groupby(dataset.col_descricao, observed=True)[dataset.col_quantidade].sum()
+            top = top.sort_values(ascending=False).head(20)
+            result = store.top_products(metric, classes=["A"], n=20, group_by=group_by)
+            assert result.to_numpy() == pytest.approx(top.to_numpy())
+    finally:
+        store.close()
+
+
+def test_aggregates_need_classify(dataset):
+    store = SQLStore("sqlite").load(dataset)
+    try:
+        with pytest.raises(ValueError):
+            store.class_counts(next(iter(store.metrics)))
+    finally:
+        store.close()
@@ -0,0 +1,77 @@
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from abc_curva.stages import STATUS_RAN, STATUS_REUSED, STATUS_SHARED, SharedMemo, StageGraph
+
+
+def _graph() -> StageGraph:
+    graph = StageGraph()
+
+    @graph.stage("base", "ingest", params=("n",), shared=True)
+    def _base(n):
+        return np.arange(n, dtype=float)
+
+    @graph.stage("total", "aggregate", deps=("base",), params=("scale",))
+    def _total(base, scale):
+        return float(base.sum()) * scale
+
+    return graph
+
+
+def test_changing_a_param_reruns_only_downstream_stages():
+    session = _graph().session()
+    session.begin(n=10, scale=1)
+    assert session.get("total") == 45
+    session.begin(n=10, scale=2)
+    assert session.get("total") == 90
+    assert {r.name: r.status for r in session.runs} == {"base": STATUS_REUSED, "total": STATUS_RAN}
+
+
+def test_shared_stage_runs_once_across_sessions():
+    graph, shared = _graph(), SharedMemo()
+    first = graph.session(shared=shared).begin(n=10, scale=1)
+    second = graph.session(shared=shared).begin(n=10, scale=1)
+    assert first.get("base") is second.get("base")
+    assert [r.status for r in second.runs] == [STATUS_SHARED]
+
+
+def test_shared_stage_cannot_depend_on_session_stage():
+    graph = _graph()
+    with pytest.raises(ValueError):
+        graph.stage("x", "render", deps=("total",), shared=True)
+
+
+def test_concurrent_profiled_sessions_measure_their_own_peak():
+    graph = StageGraph()
+
+    @graph.stage("big", "aggregate", params=("n",))
+    def _big(n):
+        values = np.ones(n)
+        time.sleep(0.01)
+        return float(values.sum())
+
+    peaks, errors = [], []
+
+    def _session(n):
+        try:
+            for _ in range(5):
+                session = graph.session(profile=True).begin(n=n)
+                session.get("big")
+                peaks.append((n, session.runs[0].peak_bytes))
+        except Exception as e:  # falha de qualquer thread reprova o teste
+            errors.append(e)
+
+    threads = [threading.Thread(target=_session, args=(n,)) for n in (100_000, 1_000_000) * 3]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert not tracemalloc.is_tracing()
+    # Com os estágios medidos um por vez, cada pico é o do próprio array (8 bytes por valor).
+    for n, peak in peaks:
+        assert 8 * n <= peak < 8 * n + 1_000_000